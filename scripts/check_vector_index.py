@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Check (and optionally rebuild) the pgvector ANN index used by retrieval.
+
+Runs EXPLAIN on the exact query retrieve_chunks() issues and reports whether
+the plan uses an idx_embedding_vector_* index or falls back to a sequential scan.
+
+Usage:
+    # Check the index for the configured metric/index type
+    python scripts/check_vector_index.py
+
+    # Rebuild as IVFFlat with inner product, then check
+    python scripts/check_vector_index.py --rebuild --metric inner_product --index-type ivfflat --lists 20
+
+    # Prove the index *can* serve the query even on a tiny table
+    python scripts/check_vector_index.py --force-index
+
+    # Build and check the half-precision index (set VECTOR_STORAGE=halfvec to search with it)
+    python scripts/check_vector_index.py --rebuild --storage halfvec
+
+    # Build and check a binary-quantized index over the first 512 dimensions
+    # (set VECTOR_STORAGE=binary and VECTOR_COARSE_DIMENSIONS=512 to search with it)
+    python scripts/check_vector_index.py --rebuild --storage binary --coarse-dimensions 512
+
+    # Rebuild one registered model's partial index (other models' indexes are kept)
+    python scripts/check_vector_index.py --rebuild --model text-embedding-3-large
+
+    # Check a category-filtered search (iterative scan, or the category index)
+    python scripts/check_vector_index.py --category experience --category projects
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import text
+
+from src.config import settings
+from src.database import SessionLocal
+from src.retrieval import explain_search
+from src.retrieval.vector_index import (
+    COMPACT_STORAGE_MIN_VERSION,
+    DISTANCE_METRICS,
+    INDEX_TYPES,
+    VECTOR_STORAGES,
+    create_compact_index_sql,
+    create_index_sql,
+    get_pgvector_version,
+    model_predicate,
+)
+
+
+def random_unit_vector(dimensions: int) -> list:
+    """Random normalized vector, good enough to exercise the query plan."""
+    vector = [random.gauss(0, 1) for _ in range(dimensions)]
+    norm = sum(x * x for x in vector) ** 0.5
+    return [x / norm for x in vector]
+
+
+def rebuild_index(session, args):
+    """Drop existing ANN indexes on chunk_embeddings and build the requested one.
+
+    With --model, only the shared indexes and that model's partial indexes are
+    dropped, and the new index is partial too. Compact storage needs pgvector
+    0.7+; on an older extension nothing is dropped and the script exits.
+    """
+    if args.storage != "full":
+        version = get_pgvector_version(session)
+        if version < COMPACT_STORAGE_MIN_VERSION:
+            minimum = ".".join(map(str, COMPACT_STORAGE_MIN_VERSION))
+            sys.exit(
+                f"❌ --storage {args.storage} needs pgvector {minimum}+ (installed: "
+                f"{'.'.join(map(str, version))}). Ask the extension owner to run ALTER EXTENSION vector UPDATE."
+            )
+
+    existing = session.execute(text("""
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE tablename = 'chunk_embeddings' AND indexname LIKE 'idx_embedding_vector%'
+    """)).all()
+    if args.model:
+        # indexdef renders the predicate as ((embedding_model)::text = 'name'::text)
+        literal = model_predicate(args.model).split(" = ", 1)[1]
+        existing = [row for row in existing if " WHERE " not in row.indexdef or literal in row.indexdef]
+    for name, _ in existing:
+        print(f"🗑️  Dropping {name}")
+        session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    if args.storage == "full":
+        print(f"🔨 Building {args.index_type} index for {args.metric} distance...")
+        statement = create_index_sql(
+            args.metric, args.index_type,
+            lists=args.lists, m=args.m, ef_construction=args.ef_construction,
+            embedding_model=args.model
+        )
+    else:
+        dimensions = args.coarse_dimensions or settings.EMBEDDING_DIMENSIONS
+        print(f"🔨 Building {args.index_type} index on {args.storage} ({dimensions} dimensions)...")
+        statement = create_compact_index_sql(
+            args.metric, args.index_type, args.storage, args.coarse_dimensions,
+            lists=args.lists, m=args.m, ef_construction=args.ef_construction,
+            embedding_model=args.model
+        )
+    session.execute(text(statement))
+    session.execute(text("ANALYZE chunk_embeddings"))
+    session.commit()
+    print("   ✅ Done")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the pgvector ANN index")
+    parser.add_argument("--metric", choices=list(DISTANCE_METRICS), default=settings.VECTOR_DISTANCE_METRIC)
+    parser.add_argument("--index-type", choices=list(INDEX_TYPES), default=settings.VECTOR_INDEX_TYPE)
+    parser.add_argument("--storage", choices=list(VECTOR_STORAGES), default=settings.VECTOR_STORAGE,
+                        help="Representation the index searches (compact ones are reranked on full vectors)")
+    parser.add_argument("--coarse-dimensions", type=int, default=settings.VECTOR_COARSE_DIMENSIONS,
+                        help="Index only the first N dimensions (compact storage)")
+    parser.add_argument("--model", help="Embedding model whose partial index to rebuild and check "
+                                        "(default: shared index, EMBEDDING_MODEL rows)")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and rebuild the ANN index first")
+    parser.add_argument("--lists", type=int, default=100, help="IVFFlat lists (~rows / 1000)")
+    parser.add_argument("--m", type=int, default=16, help="HNSW max connections per layer")
+    parser.add_argument("--ef-construction", type=int, default=64, help="HNSW build candidate list")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--mode", choices=["vector", "hybrid"], default=settings.RETRIEVAL_MODE,
+                        help="Retrieval statement to explain")
+    parser.add_argument("--category", action="append", dest="categories",
+                        help="Explain a search filtered to this category (repeatable)")
+    parser.add_argument("--force-index", action="store_true",
+                        help="Disable sequential scans so small tables still show the index path")
+    parser.add_argument("--show-plan", action="store_true", help="Print the full JSON plan")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Vector Index Check")
+    print("=" * 60)
+    print(f"Metric: {args.metric}   Index type: {args.index_type}   Storage: {args.storage}")
+    print()
+
+    session = SessionLocal()
+    try:
+        if args.rebuild:
+            rebuild_index(session, args)
+
+        if args.force_index:
+            session.execute(text("SET LOCAL enable_seqscan = off"))
+
+        result = explain_search(
+            session,
+            random_unit_vector(settings.EMBEDDING_DIMENSIONS),
+            embedding_model=args.model or settings.EMBEDDING_MODEL,
+            top_k=args.top_k,
+            metric=args.metric,
+            index_type=args.index_type,
+            mode=args.mode,
+            storage=args.storage,
+            coarse_dimensions=args.coarse_dimensions,
+            categories=args.categories
+        )
+        session.rollback()
+    finally:
+        session.close()
+
+    if result["uses_vector_index"]:
+        print(f"✅ Query is served by: {', '.join(result['index_names'])}")
+    else:
+        print("❌ Query does NOT use an ANN index (sequential scan)")
+        print("   → Check that the index operator class matches VECTOR_DISTANCE_METRIC")
+        print("   → On very small tables the planner may prefer a seq scan; try --force-index")
+
+    if args.show_plan:
+        print()
+        print(json.dumps(result["plan"], indent=2))
+
+    sys.exit(0 if result["uses_vector_index"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,39 @@
 This script:
 1. Scans the /content directory for markdown files
 2. Parses YAML frontmatter and content
-3. Chunks content based on strategy (whole or paragraph)
-4. Generates embeddings via OpenAI API
-5. Stores chunks and embeddings in the database
+3. Chunks content based on strategy (whole, paragraph, or markdown: heading-aware
+   chunks of about CHUNK_TARGET_TOKENS with overlap, see src/chunking.py)
+4. Diffs chunks against the database by content hash
+5. Generates embeddings via OpenAI API for new/changed chunks only, with
+   concurrent token-budgeted requests paced by the API's rate limits
+6. Applies the changes in bulk, one transaction per batch of files: inserts new
+   chunks, updates moved ones, deletes orphans. A batch is written as soon as
+   its embeddings are in, while later ones are still being embedded
+
+Re-running it is incremental: unchanged chunks are left alone, chunks whose text
+already has an embedding (e.g. moved between files) reuse it, and chunks from
+deleted files or removed paragraphs are deleted.
+
+Embeddings are generated with the active model from the embedding model registry
+(EMBEDDING_MODEL while it is empty). --backfill-model embeds the stored chunks
+for another registered model instead, without touching /content, so it can be
+shadowed and promoted (see scripts/manage_embedding_models.py).
+
+Usage:
+    python scripts/ingest_content.py
+    python scripts/ingest_content.py --dry-run   # Print the plan and estimated tokens
+    python scripts/ingest_content.py --backfill-model text-embedding-3-large
 """
 
+import argparse
+import asyncio
+import hashlib
+import json
 import sys
+from collections import defaultdict
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import time
 
 # Add project root to Python path
@@ -19,17 +44,35 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 import frontmatter
-from openai import OpenAI
+from sqlalchemy import delete, insert, select, update
 
+from src.chunking import chunk_markdown
 from src.config import settings
-from src.database import SessionLocal, DocumentChunk, ChunkEmbedding
+from src.database import SessionLocal, DocumentChunk, ChunkEmbedding, EmbeddingModel
+from src.database.model_registry import active_model, get_models
+from src.embedding.pipeline import EmbeddingPipeline
+from src.providers import aclose_provider
+from src.tokenizer import count_tokens
 
 
 # Constants
 CONTENT_DIR = project_root / "content"
-EMBEDDING_MODEL = "text-embedding-3-small"
-EMBEDDING_DIMENSIONS = 1536
-BATCH_SIZE = 20  # Number of texts to embed in one API call
+EMBEDDING_MODEL = settings.EMBEDDING_MODEL
+EMBEDDING_CONCURRENCY = 4  # Embedding requests in flight at once
+EMBEDDING_BATCH_TOKENS = 16_000  # Token budget per embeddings request
+FILES_PER_TRANSACTION = 10  # Files written per bulk transaction
+# USD per 1M input tokens, for the --dry-run estimate (other models: no estimate)
+EMBEDDING_PRICES_PER_1M_TOKENS = {
+    "text-embedding-3-small": 0.02,
+    "text-embedding-3-large": 0.13,
+    "text-embedding-ada-002": 0.10,
+}
+
+
+def estimate_cost(tokens: int, embedding_model: str) -> str:
+    """Cost suffix for a token estimate (e.g. ", ~$0.0123"); empty for models without a known price."""
+    price = EMBEDDING_PRICES_PER_1M_TOKENS.get(embedding_model)
+    return f", ~${tokens / 1_000_000 * price:.4f}" if price is not None else ""
 
 
 def find_markdown_files() -> List[Path]:
@@ -60,198 +103,528 @@ def parse_markdown_file(file_path: Path) -> Optional[Dict[str, Any]]:
         return None
 
 
-def chunk_content(content: str, strategy: str, context_prefix: str = "") -> List[str]:
+def chunk_content(
+    content: str,
+    strategy: str,
+    context_prefix: str = "",
+    target_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None
+) -> List[Tuple[str, Optional[List[str]]]]:
     """Chunk content based on the specified strategy.
 
     Args:
         content: The markdown content to chunk
-        strategy: Either "whole" or "paragraph"
+        strategy: "whole", "paragraph" or "markdown"
         context_prefix: Optional prefix to add to each chunk
+        target_tokens: Chunk size for "markdown" (defaults to CHUNK_TARGET_TOKENS)
+        overlap_tokens: Overlap for "markdown" (defaults to CHUNK_OVERLAP_TOKENS)
 
     Returns:
-        List of text chunks
+        List of (text, heading_path) chunks; heading_path is None except for "markdown"
     """
     if strategy == "whole":
         # Single chunk for entire content
-        chunks = [content]
+        chunks = [(content, None)]
+    elif strategy == "markdown":
+        # Heading-aware chunks of about target_tokens, lists and tables kept whole
+        chunks = chunk_markdown(
+            content,
+            EMBEDDING_MODEL,
+            target_tokens or settings.CHUNK_TARGET_TOKENS,
+            settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        )
     elif strategy == "paragraph":
         # Split on double newlines, filter empty paragraphs
         paragraphs = content.split('\n\n')
-        chunks = [p.strip() for p in paragraphs if p.strip()]
+        chunks = [(p.strip(), None) for p in paragraphs if p.strip()]
     else:
         print(f"  ⚠️  Unknown chunk_strategy: {strategy}, defaulting to 'paragraph'")
         paragraphs = content.split('\n\n')
-        chunks = [p.strip() for p in paragraphs if p.strip()]
+        chunks = [(p.strip(), None) for p in paragraphs if p.strip()]
 
     # Add context prefix if provided
     if context_prefix:
-        chunks = [f"{context_prefix}{chunk}" for chunk in chunks]
+        chunks = [(f"{context_prefix}{chunk}", path) for chunk, path in chunks]
 
     return chunks
 
 
-def generate_embeddings(texts: List[str], client: OpenAI) -> List[List[float]]:
-    """Generate embeddings for a batch of texts using OpenAI API.
+def content_hash(text: str) -> str:
+    """Hex SHA-256 of a chunk's text (matches the content_hash migration backfill)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-    Args:
-        texts: List of text strings to embed
-        client: OpenAI client instance
+
+def load_document(file_path: Path) -> Dict[str, Any]:
+    """Parse and chunk a file into the rows it should have in the database.
+
+    Empty or unparseable files produce no chunks, so their stored rows get deleted.
+    """
+    relative_path = str(file_path.relative_to(project_root))
+    parsed = parse_markdown_file(file_path)
+    if parsed is None:
+        return {'source_file': relative_path, 'chunks': []}
+
+    # Round-trip through JSON so it compares equal to what JSONB gives back
+    metadata = json.loads(json.dumps(parsed['frontmatter'], default=str))
+    chunks = chunk_content(
+        parsed['content'],
+        metadata.get('chunk_strategy', 'paragraph'),
+        metadata.get('context_prefix', ''),
+        metadata.get('chunk_tokens'),
+        metadata.get('chunk_overlap')
+    )
+    return {
+        'source_file': relative_path,
+        'category': metadata.get('category'),
+        'document_title': metadata.get('title'),
+        'chunks': [
+            {
+                'content': text,
+                'content_hash': content_hash(text),
+                # Frontmatter, plus the chunk's heading path for structure-aware chunks
+                'metadata_json': metadata if path is None else {**metadata, 'heading_path': path},
+            }
+            for text, path in chunks
+        ],
+    }
+
+
+def load_stored_chunks(session, embedding_model: str = EMBEDDING_MODEL) -> Dict[str, List[Dict[str, Any]]]:
+    """Stored chunks per source file, with whether they have an embedding for embedding_model."""
+    embedded = (
+        select(ChunkEmbedding.chunk_id)
+        .where(ChunkEmbedding.embedding_model == embedding_model)
+    )
+    rows = session.execute(
+        select(
+            DocumentChunk.chunk_id,
+            DocumentChunk.source_file,
+            DocumentChunk.chunk_index,
+            DocumentChunk.content_hash,
+            DocumentChunk.category,
+            DocumentChunk.document_title,
+            DocumentChunk.metadata_json,
+            DocumentChunk.chunk_id.in_(embedded).label("has_embedding"),
+        ).order_by(DocumentChunk.source_file, DocumentChunk.chunk_index)
+    ).mappings().all()
+
+    stored = defaultdict(list)
+    for row in rows:
+        stored[row['source_file']].append(dict(row))
+    return stored
+
+
+def plan_document(document: Dict[str, Any], stored_rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Diff a document's chunks against its stored rows by content hash.
 
     Returns:
-        List of embedding vectors
+        Plan dict with 'insert' (new chunk dicts with their chunk_index), 'update'
+        (kept rows whose position or metadata changed), 'delete' (orphan chunk_ids),
+        'embed' (kept rows missing an embedding) and 'unchanged' count
     """
-    try:
-        response = client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=texts
+    available = defaultdict(list)
+    for row in stored_rows:
+        available[row['content_hash']].append(row)
+
+    plan = {'source_file': document['source_file'], 'insert': [], 'update': [], 'delete': [], 'embed': [], 'unchanged': 0}
+    fields = {key: document.get(key) for key in ('category', 'document_title')}
+
+    for index, chunk in enumerate(document['chunks']):
+        if not available[chunk['content_hash']]:
+            plan['insert'].append({**chunk, 'chunk_index': index})
+            continue
+
+        row = available[chunk['content_hash']].pop(0)
+        expected = {**fields, 'metadata_json': chunk['metadata_json']}
+        changes = {key: value for key, value in expected.items() if row[key] != value}
+        if row['chunk_index'] != index:
+            changes['chunk_index'] = index
+        if changes:
+            plan['update'].append({'chunk_id': row['chunk_id'], **changes})
+        else:
+            plan['unchanged'] += 1
+        if not row['has_embedding']:
+            plan['embed'].append({**chunk, 'chunk_id': row['chunk_id']})
+
+    # Whatever wasn't matched no longer exists in the file
+    plan['delete'] = [row['chunk_id'] for rows in available.values() for row in rows]
+    return plan
+
+
+def load_reusable_embeddings(session, hashes: List[str], embedding_model: str = EMBEDDING_MODEL) -> Dict[str, Any]:
+    """Existing embeddings (from embedding_model) for any chunk with one of these content hashes."""
+    if not hashes:
+        return {}
+    rows = session.execute(
+        select(DocumentChunk.content_hash, ChunkEmbedding.embedding)
+        .join(ChunkEmbedding, ChunkEmbedding.chunk_id == DocumentChunk.chunk_id)
+        .where(
+            ChunkEmbedding.embedding_model == embedding_model,
+            DocumentChunk.content_hash.in_(hashes)
         )
-        return [item.embedding for item in response.data]
-    except Exception as e:
-        print(f"  ❌ Error generating embeddings: {e}")
+    ).all()
+    return {row.content_hash: row.embedding for row in rows}
+
+
+def apply_plans(
+    plans: List[Dict[str, Any]],
+    documents: Dict[str, Dict[str, Any]],
+    embeddings: Dict[str, Any],
+    session,
+    embedding_model: str = EMBEDDING_MODEL
+) -> int:
+    """Apply a batch of file plans in one transaction with bulk statements.
+
+    New chunks go in with a single multi-row INSERT ... RETURNING chunk_id (rows
+    come back in parameter order), then every embedding is written with one bulk
+    INSERT, instead of an add + flush round trip per chunk.
+
+    Returns:
+        Number of rows inserted, updated or deleted
+    """
+    deletes = [chunk_id for plan in plans for chunk_id in plan['delete']]
+    now = datetime.now(timezone.utc)
+    updates = [{**changes, 'updated_at': now} for plan in plans for changes in plan['update']]
+    inserts = [
+        {
+            'content': chunk['content'],
+            'content_hash': chunk['content_hash'],
+            'source_file': plan['source_file'],
+            'category': documents[plan['source_file']].get('category'),
+            'document_title': documents[plan['source_file']].get('document_title'),
+            'chunk_index': chunk['chunk_index'],
+            'metadata_json': chunk['metadata_json'],
+        }
+        for plan in plans
+        for chunk in plan['insert']
+    ]
+    embedding_rows = [
+        {
+            'chunk_id': chunk['chunk_id'],
+            'embedding': embeddings[chunk['content_hash']],
+            'embedding_model': embedding_model,
+        }
+        for plan in plans
+        for chunk in plan['embed']
+    ]
+
+    try:
+        if deletes:
+            # chunk_embeddings rows go with them (ON DELETE CASCADE)
+            session.execute(delete(DocumentChunk).where(DocumentChunk.chunk_id.in_(deletes)))
+
+        if updates:
+            # ORM bulk UPDATE by primary key
+            session.execute(update(DocumentChunk), updates)
+
+        if inserts:
+            chunk_ids = session.scalars(
+                insert(DocumentChunk).returning(DocumentChunk.chunk_id, sort_by_parameter_order=True),
+                inserts
+            ).all()
+            embedding_rows.extend(
+                {
+                    'chunk_id': chunk_id,
+                    'embedding': embeddings[row['content_hash']],
+                    'embedding_model': embedding_model,
+                }
+                for chunk_id, row in zip(chunk_ids, inserts)
+            )
+
+        if embedding_rows:
+            session.execute(insert(ChunkEmbedding), embedding_rows)
+
+        session.commit()
+    except Exception:
+        session.rollback()
         raise
 
+    return len(deletes) + len(updates) + len(inserts) + len(embedding_rows)
+
+
+async def embed_and_apply(
+    groups: List[List[Dict[str, Any]]],
+    documents: Dict[str, Dict[str, Any]],
+    embeddings: Dict[str, Any],
+    to_embed: Dict[str, str],
+    session,
+    args,
+    embedding_model: str = EMBEDDING_MODEL
+) -> tuple:
+    """Run the embedding pipeline with apply_plans() as its writer stage.
 
-def process_file(file_path: Path, client: OpenAI, session) -> int:
-    """Process a single markdown file and insert into database.
+    Groups of files are applied in order, each as soon as every embedding it
+    needs is available (one transaction per group; a failure only rolls back
+    its own group).
 
     Returns:
-        Number of chunks created
+        (applied files, failed files, rows written, seconds spent writing)
     """
-    # Get relative path for storage
-    relative_path = file_path.relative_to(project_root)
+    needs = [
+        {chunk['content_hash'] for plan in group for chunk in plan['insert'] + plan['embed']}
+        for group in groups
+    ]
+    counts = {'applied': 0, 'failed': 0, 'rows': 0, 'seconds': 0.0}
+    next_group = 0
+
+    async def apply_ready_groups() -> None:
+        nonlocal next_group
+        while next_group < len(groups) and needs[next_group] <= embeddings.keys():
+            group = groups[next_group]
+            next_group += 1
+            start = time.perf_counter()
+            try:
+                # The session is sync; keep the event loop free for in-flight embedding requests
+                counts['rows'] += await asyncio.to_thread(
+                    apply_plans, group, documents, embeddings, session, embedding_model
+                )
+                counts['applied'] += len(group)
+            except Exception as e:
+                print(f"  ❌ Failed to apply {', '.join(p['source_file'] for p in group)}: {e}")
+                counts['failed'] += len(group)
+            counts['seconds'] += time.perf_counter() - start
+
+    async def write(hashes: List[str], vectors: List[List[float]]) -> None:
+        embeddings.update(zip(hashes, vectors))
+        await apply_ready_groups()
+
+    await apply_ready_groups()  # Groups that only delete/update or reuse embeddings
+    if to_embed:
+        print(f"🔢 Embedding {len(to_embed)} chunk(s) ({args.concurrency} concurrent requests, "
+              f"{args.batch_tokens:,} tokens per batch)...")
+        pipeline = EmbeddingPipeline(
+            model=embedding_model,
+            concurrency=args.concurrency,
+            max_batch_tokens=args.batch_tokens
+        )
+        try:
+            stats = await pipeline.run(to_embed, write)
+        finally:
+            await aclose_provider()
+        print(f"   {stats['texts']} embedding(s) in {stats['batches']} request(s), {stats['seconds']:.1f}s "
+              f"(rate-limit waits: {stats['rate_limit_waits']}, {stats['rate_limit_wait_seconds']:.1f}s)")
+        print()
+
+    return counts['applied'], counts['failed'], counts['rows'], counts['seconds']
 
-    # Parse file
-    parsed = parse_markdown_file(file_path)
-    if parsed is None:
-        return 0
 
-    frontmatter = parsed['frontmatter']
-    content = parsed['content']
+def load_missing_chunks(session, embedding_model: str) -> List[Dict[str, Any]]:
+    """Stored chunks (chunk_id, content, content_hash) with no embedding for embedding_model."""
+    embedded = (
+        select(ChunkEmbedding.chunk_id)
+        .where(ChunkEmbedding.embedding_model == embedding_model)
+    )
+    rows = session.execute(
+        select(DocumentChunk.chunk_id, DocumentChunk.content, DocumentChunk.content_hash)
+        .where(DocumentChunk.chunk_id.not_in(embedded))
+        .order_by(DocumentChunk.chunk_id)
+    ).mappings().all()
+    return [dict(row) for row in rows]
 
-    # Extract metadata
-    category = frontmatter.get('category')
-    document_title = frontmatter.get('title')
-    chunk_strategy = frontmatter.get('chunk_strategy', 'paragraph')
-    context_prefix = frontmatter.get('context_prefix', '')
 
-    # Chunk the content
-    chunks = chunk_content(content, chunk_strategy, context_prefix)
+def write_backfill(session, chunks: List[Dict[str, Any]], embeddings: Dict[str, Any], embedding_model: str) -> int:
+    """Insert embedding_model embeddings for these chunks in one transaction.
 
-    if not chunks:
-        print(f"  ⚠️  No chunks created (empty content)")
+    Returns:
+        Number of embedding rows inserted
+    """
+    rows = [
+        {
+            'chunk_id': chunk['chunk_id'],
+            'embedding': embeddings[chunk['content_hash']],
+            'embedding_model': embedding_model,
+        }
+        for chunk in chunks
+    ]
+    if not rows:
         return 0
+    try:
+        session.execute(insert(ChunkEmbedding), rows)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return len(rows)
 
-    print(f"  📝 Created {len(chunks)} chunk(s)")
 
-    # Generate embeddings in batches
-    all_embeddings = []
-    for i in range(0, len(chunks), BATCH_SIZE):
-        batch = chunks[i:i + BATCH_SIZE]
-        batch_embeddings = generate_embeddings(batch, client)
-        all_embeddings.extend(batch_embeddings)
+async def backfill(session, embedding_model: str, args) -> int:
+    """Embed every stored chunk that has no embedding for embedding_model.
 
-        # Small delay to avoid rate limits
-        if i + BATCH_SIZE < len(chunks):
-            time.sleep(0.1)
+    /content isn't read: the model gets embeddings for exactly the chunks the
+    active model serves. Chunks sharing a content hash share one embedding, and
+    each embeddings response is committed as soon as it arrives, so an
+    interrupted backfill picks up where it stopped.
 
-    print(f"  🔢 Generated {len(all_embeddings)} embedding(s)")
+    Returns:
+        Number of embedding rows written
+    """
+    missing = load_missing_chunks(session, embedding_model)
+    by_hash = defaultdict(list)
+    for chunk in missing:
+        by_hash[chunk['content_hash']].append(chunk)
+    reusable = load_reusable_embeddings(session, list(by_hash), embedding_model)
+    to_embed = {h: chunks[0]['content'] for h, chunks in by_hash.items() if h not in reusable}
+    tokens = sum(count_tokens(text, embedding_model) for text in to_embed.values())
+
+    print(f"🔢 {len(missing)} chunk(s) without a {embedding_model} embedding: {len(reusable)} reusable, "
+          f"{len(to_embed)} to generate (~{tokens:,} tokens{estimate_cost(tokens, embedding_model)})")
+    print()
+    if args.dry_run or not missing:
+        return 0
 
-    # Insert into database
-    try:
-        for idx, (chunk_text, embedding) in enumerate(zip(chunks, all_embeddings)):
-            # Create document chunk
-            db_chunk = DocumentChunk(
-                content=chunk_text,
-                source_file=str(relative_path),
-                category=category,
-                document_title=document_title,
-                chunk_index=idx,
-                metadata_json=frontmatter
-            )
-            session.add(db_chunk)
-            session.flush()  # Get the chunk_id
-
-            # Create embedding
-            db_embedding = ChunkEmbedding(
-                chunk_id=db_chunk.chunk_id,
-                embedding=embedding,
-                embedding_model=EMBEDDING_MODEL
-            )
-            session.add(db_embedding)
+    written = await asyncio.to_thread(
+        write_backfill, session, [chunk for h in reusable for chunk in by_hash[h]], reusable, embedding_model
+    )
+
+    async def write(hashes: List[str], vectors: List[List[float]]) -> None:
+        nonlocal written
+        embeddings = dict(zip(hashes, vectors))
+        chunks = [chunk for h in hashes for chunk in by_hash[h]]
+        written += await asyncio.to_thread(write_backfill, session, chunks, embeddings, embedding_model)
+
+    if to_embed:
+        print(f"🔢 Embedding {len(to_embed)} chunk(s) ({args.concurrency} concurrent requests, "
+              f"{args.batch_tokens:,} tokens per batch)...")
+        pipeline = EmbeddingPipeline(
+            model=embedding_model,
+            concurrency=args.concurrency,
+            max_batch_tokens=args.batch_tokens
+        )
+        try:
+            stats = await pipeline.run(to_embed, write)
+        finally:
+            await aclose_provider()
+        print(f"   {stats['texts']} embedding(s) in {stats['batches']} request(s), {stats['seconds']:.1f}s "
+              f"(rate-limit waits: {stats['rate_limit_waits']}, {stats['rate_limit_wait_seconds']:.1f}s)")
+        print()
+    return written
 
-        session.commit()
-        print(f"  ✅ Saved to database")
 
+def run_backfill(session, embedding_model: str, args) -> None:
+    """--backfill-model: check the model is registered, then backfill it."""
+    if session.get(EmbeddingModel, embedding_model) is None:
+        session.close()
+        print(f"❌ {embedding_model} is not registered")
+        print(f"   Register it first: python scripts/manage_embedding_models.py register {embedding_model}")
+        sys.exit(1)
+
+    try:
+        written = asyncio.run(backfill(session, embedding_model, args))
     except Exception as e:
-        session.rollback()
-        print(f"  ❌ Database error: {e}")
-        raise
+        print(f"❌ Backfill failed: {e}")
+        print("   Embeddings written so far are committed; re-run to continue")
+        sys.exit(1)
+    finally:
+        session.close()
 
-    return len(chunks)
+    print("✨ Dry run complete!" if args.dry_run else f"✨ Backfill complete! {written} embedding(s) written")
 
 
 def main():
     """Main ingestion pipeline."""
+    parser = argparse.ArgumentParser(description="Incrementally ingest /content into the database")
+    parser.add_argument("--dry-run", action="store_true", help="Print the planned changes without embedding or writing")
+    parser.add_argument("--concurrency", type=int, default=EMBEDDING_CONCURRENCY,
+                        help="Embedding requests in flight at once")
+    parser.add_argument("--batch-tokens", type=int, default=EMBEDDING_BATCH_TOKENS,
+                        help="Token budget per embeddings request")
+    parser.add_argument("--files-per-transaction", type=int, default=FILES_PER_TRANSACTION,
+                        help="Files written per bulk transaction")
+    parser.add_argument("--backfill-model", metavar="NAME",
+                        help="Embed stored chunks for this registered model instead of ingesting /content")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("RAG Resume Assistant - Content Ingestion Pipeline")
+    if args.dry_run:
+        print("(dry run - nothing will be embedded or written)")
     print("=" * 60)
     print()
 
-    # Initialize OpenAI client
-    print("🔑 Initializing OpenAI client...")
-    try:
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    except Exception as e:
-        print(f"❌ Failed to initialize OpenAI client: {e}")
-        print("   Make sure OPENAI_API_KEY is set in .env")
-        sys.exit(1)
-
     # Initialize database session
     print("🗄️  Connecting to database...")
     try:
         session = SessionLocal()
+        if not args.backfill_model:
+            embedding_model, _ = active_model(get_models(session))
+            stored = load_stored_chunks(session, embedding_model)
     except Exception as e:
         print(f"❌ Failed to connect to database: {e}")
         print("   Make sure DATABASE_URL is set correctly in .env")
         sys.exit(1)
 
+    if args.backfill_model:
+        run_backfill(session, args.backfill_model, args)
+        return
+    print(f"   Embedding model: {embedding_model}")
+
     # Find markdown files
     print(f"📂 Scanning {CONTENT_DIR} for markdown files...")
     markdown_files = find_markdown_files()
     print(f"   Found {len(markdown_files)} file(s)")
     print()
 
-    # Process each file
-    total_chunks = 0
-    processed_files = 0
-    skipped_files = 0
+    # Diff every file (plus stored files that no longer exist) against the database
+    documents = {doc['source_file']: doc for doc in map(load_document, markdown_files)}
+    for source_file in stored.keys() - documents.keys():
+        documents[source_file] = {'source_file': source_file, 'chunks': []}
+
+    plans = []
+    for source_file in sorted(documents):
+        plan = plan_document(documents[source_file], stored.get(source_file, []))
+        if plan['insert'] or plan['update'] or plan['delete'] or plan['embed']:
+            plans.append(plan)
+            print(f"{source_file}: +{len(plan['insert'])} new, ~{len(plan['update'])} updated, "
+                  f"-{len(plan['delete'])} deleted, ={plan['unchanged']} unchanged")
+
+    # Work out which texts actually need an API call
+    needed = {
+        chunk['content_hash']: chunk['content']
+        for plan in plans
+        for chunk in plan['insert'] + plan['embed']
+    }
+    reusable = load_reusable_embeddings(session, list(needed), embedding_model)
+    to_embed = {h: text for h, text in needed.items() if h not in reusable}
+    tokens = sum(count_tokens(text, embedding_model) for text in to_embed.values())
 
-    for file_path in markdown_files:
-        print(f"Processing {file_path.relative_to(project_root)}...")
+    print()
+    print("=" * 60)
+    print("Plan")
+    print("=" * 60)
+    print(f"📄 Files changed: {len(plans)} of {len(documents)}")
+    print(f"➕ Chunks to insert: {sum(len(p['insert']) for p in plans)}")
+    print(f"✏️  Chunks to update: {sum(len(p['update']) for p in plans)}")
+    print(f"🗑️  Chunks to delete: {sum(len(p['delete']) for p in plans)}")
+    print(f"♻️  Embeddings reused: {len(reusable)}")
+    print(f"🔢 Embeddings to generate: {len(to_embed)} "
+          f"(~{tokens:,} tokens{estimate_cost(tokens, embedding_model)})")
+    print()
 
-        try:
-            num_chunks = process_file(file_path, client, session)
-            if num_chunks > 0:
-                total_chunks += num_chunks
-                processed_files += 1
-            else:
-                print(f"  ⏭️  Skipped (empty or no content)")
-                skipped_files += 1
-        except Exception as e:
-            print(f"  ❌ Failed to process file: {e}")
-            skipped_files += 1
-            continue
+    if args.dry_run or not plans:
+        session.close()
+        print("✨ Nothing to do!" if not plans else "✨ Dry run complete!")
+        return
 
-        print()
+    # Embed and write concurrently: each batch of files is applied once its embeddings are in
+    groups = [plans[i:i + args.files_per_transaction] for i in range(0, len(plans), args.files_per_transaction)]
+    try:
+        result = asyncio.run(embed_and_apply(groups, documents, dict(reusable), to_embed, session, args, embedding_model))
+    except Exception as e:
+        session.close()
+        print(f"❌ Embedding failed: {e}")
+        print("   Make sure OPENAI_API_KEY (or LLM_PROVIDER) is set in .env; files applied so far are committed")
+        sys.exit(1)
+    applied_files, failed_files, rows_written, write_seconds = result
 
     # Summary
     print("=" * 60)
     print("Summary")
     print("=" * 60)
-    print(f"✅ Successfully processed: {processed_files} file(s)")
-    print(f"⏭️  Skipped (empty): {skipped_files} file(s)")
-    print(f"📦 Total chunks created: {total_chunks}")
-    print(f"🔢 Total embeddings generated: {total_chunks}")
+    print(f"✅ Files applied: {applied_files}")
+    if failed_files:
+        print(f"❌ Files failed: {failed_files}")
+    print(f"💾 Rows written: {rows_written} in {write_seconds:.2f}s "
+          f"({rows_written / write_seconds if write_seconds else 0:,.0f} rows/sec)")
     print()
 
     # Verify database contents
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Manage the embedding model registry: register, backfill status, promote.
+
+Each registered (non-retired) model gets its own partial ANN index, built with
+CREATE INDEX CONCURRENTLY so ingestion and queries keep running. Once every
+serving model has one, the shared index (if it is still there) is dropped.
+
+A model migration, with no API restart (workers re-read the registry every
+EMBEDDING_REGISTRY_TTL_SECONDS):
+
+    # 1. Register the candidate; it starts as a shadow model
+    python scripts/manage_embedding_models.py register text-embedding-3-large --dimensions 1536
+
+    # 2. Embed the stored chunks with it
+    python scripts/ingest_content.py --backfill-model text-embedding-3-large
+
+    # 3. Compare on live traffic: GET /models (overlap with the active model, latency)
+    python scripts/manage_embedding_models.py list
+
+    # 4. Promote it (the previous active model becomes a shadow, ready for rollback)
+    python scripts/manage_embedding_models.py promote text-embedding-3-large
+
+    # Stop shadowing a model, or build indexes after changing VECTOR_STORAGE
+    python scripts/manage_embedding_models.py status text-embedding-3-small retired
+    python scripts/manage_embedding_models.py index
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import func, select, text
+
+from src.config import settings
+from src.database import SessionLocal, ChunkEmbedding, DocumentChunk
+from src.database.session import engine
+from src.database.model_registry import MODEL_STATUSES, list_models, register_model, set_model_status
+from src.retrieval.vector_index import DISTANCE_METRICS, get_index_name, model_index_sql
+
+
+def embedding_counts(session) -> dict:
+    """Stored embeddings per model, and the number of chunks each should cover."""
+    counts = dict(session.execute(
+        select(ChunkEmbedding.embedding_model, func.count()).group_by(ChunkEmbedding.embedding_model)
+    ).all())
+    return {"chunks": session.scalar(select(func.count()).select_from(DocumentChunk)), "models": counts}
+
+
+def build_indexes(models) -> None:
+    """Build missing partial indexes for serving models, then drop shared ANN indexes.
+
+    CREATE INDEX CONCURRENTLY can't run inside a transaction, hence AUTOCOMMIT.
+    """
+    serving = [model for model in models if model.status != "retired"]
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for model in serving:
+            name = get_index_name(
+                model.metric, settings.VECTOR_INDEX_TYPE, settings.VECTOR_STORAGE,
+                settings.VECTOR_COARSE_DIMENSIONS, model.name
+            )
+            print(f"🔨 {model.name}: {name}")
+            connection.execute(text(model_index_sql(model.name, model.metric, concurrently=True)))
+        if not serving:
+            return
+
+        shared = connection.execute(text("""
+            SELECT indexname FROM pg_indexes
+            WHERE tablename = 'chunk_embeddings'
+              AND indexname LIKE 'idx_embedding_vector%'
+              AND indexdef NOT LIKE '%WHERE%'
+        """)).scalars().all()
+        for name in shared:
+            print(f"🗑️  Dropping shared index {name}")
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        connection.execute(text("ANALYZE chunk_embeddings"))
+
+
+def print_models(session) -> None:
+    counts = embedding_counts(session)
+    models = list_models(session)
+    if not models:
+        print(f"No registered models; {settings.EMBEDDING_MODEL} (EMBEDDING_MODEL) serves queries")
+        return
+    print(f"{'Model':<40} {'Status':<8} {'Metric':<14} {'Embedded':>16}")
+    for model in models:
+        embedded = counts["models"].get(model.name, 0)
+        print(f"{model.name:<40} {model.status:<8} {model.metric:<14} {embedded:>7}/{counts['chunks']:<8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the embedding model registry")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Registered models and how many chunks each has embedded")
+
+    register = commands.add_parser("register", help="Register a model and build its partial index")
+    register.add_argument("name")
+    register.add_argument("--dimensions", type=int, default=settings.EMBEDDING_DIMENSIONS)
+    register.add_argument("--metric", choices=list(DISTANCE_METRICS), default=settings.VECTOR_DISTANCE_METRIC)
+    register.add_argument("--status", choices=list(MODEL_STATUSES), default="shadow")
+
+    promote = commands.add_parser("promote", help="Make a model the one serving queries")
+    promote.add_argument("name")
+    promote.add_argument("--force", action="store_true", help="Promote even if its backfill is incomplete")
+
+    status = commands.add_parser("status", help="Set a model's status")
+    status.add_argument("name")
+    status.add_argument("status", choices=list(MODEL_STATUSES))
+
+    commands.add_parser("index", help="Build missing partial indexes for serving models")
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Embedding Model Registry")
+    print("=" * 60)
+    print()
+
+    session = SessionLocal()
+    try:
+        if args.command == "register":
+            register_model(session, args.name, args.dimensions, args.metric, args.status)
+            session.commit()
+            print(f"✅ Registered {args.name} ({args.status})")
+            build_indexes(list_models(session))
+            print(f"   Next: python scripts/ingest_content.py --backfill-model {args.name}")
+
+        elif args.command == "promote":
+            counts = embedding_counts(session)
+            embedded = counts["models"].get(args.name, 0)
+            if embedded < counts["chunks"] and not args.force:
+                print(f"❌ {args.name} has embeddings for {embedded} of {counts['chunks']} chunks")
+                print(f"   Finish the backfill (ingest_content.py --backfill-model {args.name}) or pass --force")
+                sys.exit(1)
+            set_model_status(session, args.name, "active")
+            session.commit()
+            print(f"✅ {args.name} now serves queries (within {settings.EMBEDDING_REGISTRY_TTL_SECONDS:g}s)")
+            build_indexes(list_models(session))
+
+        elif args.command == "status":
+            set_model_status(session, args.name, args.status)
+            session.commit()
+            print(f"✅ {args.name} is now {args.status}")
+            if args.status != "retired":
+                build_indexes(list_models(session))
+
+        elif args.command == "index":
+            build_indexes(list_models(session))
+
+        print()
+        print_models(session)
+    except ValueError as e:
+        session.rollback()
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,17 +8,16 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from openai import OpenAI
 from sqlalchemy import text
 
-from src.config import settings
+from src.clients import get_openai_client
 from src.database import SessionLocal
 
 
 def search(query: str, top_k: int = 5):
     """Search for relevant content chunks."""
     # Initialize clients
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    client = get_openai_client()
     session = SessionLocal()
 
     try:
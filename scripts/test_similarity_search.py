@@ -8,10 +8,9 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from openai import OpenAI
 from sqlalchemy import text
 
-from src.config import settings
+from src.clients import get_openai_client
 from src.database import SessionLocal
 
 
@@ -24,7 +23,7 @@ def test_similarity_search(query: str, top_k: int = 5):
     print()
 
     # Initialize OpenAI client
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    client = get_openai_client()
 
     # Generate query embedding
     print("Generating query embedding...")
@@ -59,7 +59,9 @@ def verify_setup():
     print("4️⃣  Checking OPENAI_API_KEY...")
     try:
         api_key = settings.OPENAI_API_KEY
-        if api_key.startswith("sk-") and len(api_key) > 20:
+        if settings.LLM_PROVIDER != "openai":
+            print(f"   ✅ Not needed with LLM_PROVIDER={settings.LLM_PROVIDER}")
+        elif api_key.startswith("sk-") and len(api_key) > 20:
             print(f"   ✅ OPENAI_API_KEY is configured (sk-...{api_key[-4:]})")
         else:
             print("   ⚠️  OPENAI_API_KEY format looks unusual")
@@ -9,7 +9,7 @@ from alembic import context
 from src.config import settings
 from src.database.base import Base
 # Import all models to ensure they're registered with SQLAlchemy metadata
-from src.database.models import DocumentChunk, ChunkEmbedding, QueryLog  # noqa: F401
+from src.database.models import DocumentChunk, ChunkEmbedding, EmbeddingModel, QueryLog, QueryEmbeddingCache  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
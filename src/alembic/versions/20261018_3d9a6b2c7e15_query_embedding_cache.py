@@ -0,0 +1,37 @@
+"""add query embedding cache table
+
+Revision ID: 3d9a6b2c7e15
+Revises: 8c2f1e7a9b41
+Create Date: 2026-10-18 11:47:03.902164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9a6b2c7e15'
+down_revision: Union[str, Sequence[str], None] = '8c2f1e7a9b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Shared tier of the query-embedding cache (EMBEDDING_CACHE_BACKEND=postgres)
+    op.create_table(
+        'query_embedding_cache',
+        sa.Column('cache_key', sa.String(length=256), nullable=False),
+        sa.Column('embedding_model', sa.String(length=128), nullable=False),
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('cache_key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('query_embedding_cache')
@@ -0,0 +1,36 @@
+"""add content hash to document chunks
+
+Revision ID: 4f1c8a2d6b93
+Revises: b7e4c19d2a60
+Create Date: 2026-10-18 15:12:48.604211
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1c8a2d6b93'
+down_revision: Union[str, Sequence[str], None] = 'b7e4c19d2a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('document_chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    # Backfill with the same hash the ingestion script computes (hex SHA-256 of the UTF-8 text)
+    op.execute(
+        "UPDATE document_chunks "
+        "SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')"
+    )
+    op.alter_column('document_chunks', 'content_hash', nullable=False)
+    op.create_index(op.f('ix_document_chunks_content_hash'), 'document_chunks', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_document_chunks_content_hash'), table_name='document_chunks')
+    op.drop_column('document_chunks', 'content_hash')
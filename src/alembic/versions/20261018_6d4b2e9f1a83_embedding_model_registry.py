@@ -0,0 +1,119 @@
+"""add embedding model registry and per-model partial vector indexes
+
+Revision ID: 6d4b2e9f1a83
+Revises: f2b8d4a6c913
+Create Date: 2026-10-18 20:41:07.863125
+
+"""
+import hashlib
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d4b2e9f1a83'
+down_revision: Union[str, Sequence[str], None] = 'f2b8d4a6c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _model_index_name(prefix: str, embedding_model: str) -> str:
+    """Partial index name for a model, as src/retrieval/vector_index.py named it at this revision."""
+    name = f"{prefix}_{re.sub(r'[^a-z0-9]+', '_', embedding_model.lower()).strip('_')}"
+    if len(name) > 63:
+        digest = hashlib.sha1(embedding_model.encode("utf-8")).hexdigest()[:8]
+        name = f"{name[:54]}_{digest}"
+    return name
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'embedding_models',
+        sa.Column('name', sa.String(length=128), nullable=False),
+        sa.Column('dimensions', sa.Integer(), nullable=False),
+        sa.Column('metric', sa.String(length=32), nullable=False, server_default='cosine'),
+        sa.Column('status', sa.String(length=16), nullable=False, server_default='shadow'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.CheckConstraint("status IN ('active', 'shadow', 'retired')", name='ck_embedding_models_status'),
+        sa.CheckConstraint("metric IN ('cosine', 'inner_product', 'l2')", name='ck_embedding_models_metric'),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_index(
+        'uq_embedding_models_active', 'embedding_models', ['status'],
+        unique=True, postgresql_where=sa.text("status = 'active'")
+    )
+
+    # Register the models already embedded: the one with the most rows serves
+    # queries, any others are left retired until promoted or shadowed.
+    op.execute("""
+        INSERT INTO embedding_models (name, dimensions, metric, status)
+        SELECT
+            embedding_model,
+            max(vector_dims(embedding)),
+            'cosine',
+            CASE WHEN row_number() OVER (ORDER BY count(*) DESC, embedding_model) = 1
+                THEN 'active' ELSE 'retired' END
+        FROM chunk_embeddings
+        GROUP BY embedding_model
+    """)
+
+    # Replace the shared ANN indexes with partial ones for the active model, so
+    # adding a second model's rows can't crowd its results out. Each shared
+    # index that exists is rebuilt with the model predicate, so the partial
+    # indexes match whatever storage / index type the deployment built (the
+    # default is the full-precision HNSW index alone). On an empty table the
+    # shared indexes stay until scripts/manage_embedding_models.py registers a
+    # model; `manage_embedding_models.py index` builds any that are missing.
+    bind = op.get_bind()
+    active = bind.execute(sa.text(
+        "SELECT name FROM embedding_models WHERE status = 'active'"
+    )).scalar()
+    if active is not None:
+        predicate = "embedding_model = '" + active.replace("'", "''") + "'"
+        shared = bind.execute(sa.text("""
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE tablename = 'chunk_embeddings'
+              AND indexname LIKE 'idx_embedding_vector%'
+              AND indexdef NOT LIKE '%WHERE%'
+        """)).all()
+        for name, indexdef in shared:
+            # indexdef is "CREATE INDEX <name> ON public.chunk_embeddings USING ..."
+            partial = indexdef.replace(
+                f"INDEX {name} ON", f"INDEX IF NOT EXISTS {_model_index_name(name, active)} ON", 1
+            )
+            op.execute(f"{partial} WHERE {predicate}")
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_embedding_vector_hnsw_cosine
+        ON chunk_embeddings
+        USING hnsw (embedding vector_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+    # Per-model partial indexes have model-specific names; drop whichever exist
+    op.execute("""
+        DO $$
+        DECLARE index_name text;
+        BEGIN
+            FOR index_name IN
+                SELECT indexname FROM pg_indexes
+                WHERE tablename = 'chunk_embeddings'
+                  AND indexname LIKE 'idx_embedding_vector%'
+                  AND indexdef LIKE '%WHERE%'
+            LOOP
+                EXECUTE format('DROP INDEX IF EXISTS %I', index_name);
+            END LOOP;
+        END $$
+    """)
+    op.drop_index('uq_embedding_models_active', table_name='embedding_models')
+    op.drop_table('embedding_models')
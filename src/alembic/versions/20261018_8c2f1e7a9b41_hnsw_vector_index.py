@@ -0,0 +1,44 @@
+"""replace ivfflat vector index with hnsw
+
+Revision ID: 8c2f1e7a9b41
+Revises: 5a003342d559
+Create Date: 2026-10-18 09:12:40.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2f1e7a9b41'
+down_revision: Union[str, Sequence[str], None] = '5a003342d559'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The IVFFlat index was built on an empty table (so its list centroids are
+    # meaningless) and the search query ordered by l2_distance(), which a
+    # vector_cosine_ops index can't serve. HNSW needs no training data and
+    # keeps good recall as rows are added, so it's the default going forward.
+    # Use scripts/check_vector_index.py --rebuild for other metric/index combos.
+    op.execute('DROP INDEX IF EXISTS idx_embedding_vector_cosine')
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_embedding_vector_hnsw_cosine
+        ON chunk_embeddings
+        USING hnsw (embedding vector_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS idx_embedding_vector_hnsw_cosine')
+    op.execute("""
+        CREATE INDEX idx_embedding_vector_cosine
+        ON chunk_embeddings
+        USING ivfflat (embedding vector_cosine_ops)
+        WITH (lists = 100)
+    """)
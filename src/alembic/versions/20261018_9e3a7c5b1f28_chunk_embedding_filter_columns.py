@@ -0,0 +1,82 @@
+"""denormalize chunk category and source_file into chunk_embeddings for filtered search
+
+Revision ID: 9e3a7c5b1f28
+Revises: 6d4b2e9f1a83
+Create Date: 2026-10-18 21:37:42.519804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3a7c5b1f28'
+down_revision: Union[str, Sequence[str], None] = '6d4b2e9f1a83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chunk_embeddings', sa.Column('category', sa.String(length=128), nullable=True))
+    op.add_column('chunk_embeddings', sa.Column('source_file', sa.String(length=512), nullable=True))
+    op.execute("""
+        UPDATE chunk_embeddings e
+        SET category = c.category, source_file = c.source_file
+        FROM document_chunks c
+        WHERE c.chunk_id = e.chunk_id
+    """)
+
+    # Filtered vector search reads these copies instead of joining document_chunks
+    # for every candidate row. Triggers keep them in sync whoever writes: new
+    # embeddings copy them from their chunk, and chunk updates are propagated.
+    op.execute("""
+        CREATE FUNCTION chunk_embeddings_copy_chunk_fields() RETURNS trigger AS $$
+        BEGIN
+            SELECT c.category, c.source_file INTO NEW.category, NEW.source_file
+            FROM document_chunks c
+            WHERE c.chunk_id = NEW.chunk_id;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER chunk_embeddings_copy_chunk_fields
+        BEFORE INSERT OR UPDATE OF chunk_id ON chunk_embeddings
+        FOR EACH ROW EXECUTE FUNCTION chunk_embeddings_copy_chunk_fields()
+    """)
+    op.execute("""
+        CREATE FUNCTION document_chunks_sync_embedding_fields() RETURNS trigger AS $$
+        BEGIN
+            UPDATE chunk_embeddings
+            SET category = NEW.category, source_file = NEW.source_file
+            WHERE chunk_id = NEW.chunk_id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER document_chunks_sync_embedding_fields
+        AFTER UPDATE OF category, source_file ON document_chunks
+        FOR EACH ROW
+        WHEN (OLD.category IS DISTINCT FROM NEW.category OR OLD.source_file IS DISTINCT FROM NEW.source_file)
+        EXECUTE FUNCTION document_chunks_sync_embedding_fields()
+    """)
+
+    # A selective filter can be served exactly from these (then sorted by distance)
+    op.create_index('idx_chunk_embeddings_model_category', 'chunk_embeddings', ['embedding_model', 'category'])
+    op.create_index('idx_chunk_embeddings_model_source', 'chunk_embeddings', ['embedding_model', 'source_file'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_chunk_embeddings_model_source', table_name='chunk_embeddings')
+    op.drop_index('idx_chunk_embeddings_model_category', table_name='chunk_embeddings')
+    op.execute('DROP TRIGGER IF EXISTS document_chunks_sync_embedding_fields ON document_chunks')
+    op.execute('DROP FUNCTION IF EXISTS document_chunks_sync_embedding_fields()')
+    op.execute('DROP TRIGGER IF EXISTS chunk_embeddings_copy_chunk_fields ON chunk_embeddings')
+    op.execute('DROP FUNCTION IF EXISTS chunk_embeddings_copy_chunk_fields()')
+    op.drop_column('chunk_embeddings', 'source_file')
+    op.drop_column('chunk_embeddings', 'category')
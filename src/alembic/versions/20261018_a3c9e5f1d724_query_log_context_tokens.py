@@ -0,0 +1,28 @@
+"""add context token count to query logs
+
+Revision ID: a3c9e5f1d724
+Revises: e1a7f3c9b258
+Create Date: 2026-10-18 18:02:13.540218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e5f1d724'
+down_revision: Union[str, Sequence[str], None] = 'e1a7f3c9b258'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('query_logs', sa.Column('context_tokens', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('query_logs', 'context_tokens')
@@ -0,0 +1,34 @@
+"""add latency breakdown to query logs
+
+Revision ID: b7e4c19d2a60
+Revises: 3d9a6b2c7e15
+Create Date: 2026-10-18 14:05:27.331870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4c19d2a60'
+down_revision: Union[str, Sequence[str], None] = '3d9a6b2c7e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('query_logs', sa.Column('embed_ms', sa.Float(), nullable=True))
+    op.add_column('query_logs', sa.Column('search_ms', sa.Float(), nullable=True))
+    op.add_column('query_logs', sa.Column('generate_ms', sa.Float(), nullable=True))
+    op.add_column('query_logs', sa.Column('total_ms', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('query_logs', 'total_ms')
+    op.drop_column('query_logs', 'generate_ms')
+    op.drop_column('query_logs', 'search_ms')
+    op.drop_column('query_logs', 'embed_ms')
@@ -0,0 +1,37 @@
+"""add full-text search vector to document chunks
+
+Revision ID: c5e2d8a1f374
+Revises: 4f1c8a2d6b93
+Create Date: 2026-10-18 16:03:11.470562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2d8a1f374'
+down_revision: Union[str, Sequence[str], None] = '4f1c8a2d6b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Generated column: Postgres keeps it in sync with content, existing rows included
+    op.add_column('document_chunks', sa.Column(
+        'content_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', content)", persisted=True),
+        nullable=True
+    ))
+    op.create_index('idx_chunks_content_tsv', 'document_chunks', ['content_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_chunks_content_tsv', table_name='document_chunks', postgresql_using='gin')
+    op.drop_column('document_chunks', 'content_tsv')
@@ -0,0 +1,28 @@
+"""add rerank latency to query logs
+
+Revision ID: e1a7f3c9b258
+Revises: c5e2d8a1f374
+Create Date: 2026-10-18 17:21:40.918337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7f3c9b258'
+down_revision: Union[str, Sequence[str], None] = 'c5e2d8a1f374'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('query_logs', sa.Column('rerank_ms', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('query_logs', 'rerank_ms')
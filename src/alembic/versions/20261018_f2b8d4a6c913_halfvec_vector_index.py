@@ -0,0 +1,34 @@
+"""half-precision expression index for compact vector search (now opt-in)
+
+Revision ID: f2b8d4a6c913
+Revises: a3c9e5f1d724
+Create Date: 2026-10-18 19:26:51.207344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4a6c913'
+down_revision: Union[str, Sequence[str], None] = 'a3c9e5f1d724'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nothing to do. Only VECTOR_STORAGE=halfvec reads a halfvec index, and the
+    # default (full) doesn't, so it isn't built for every deployment: like the
+    # binary and reduced-dimension indexes, build it with
+    # scripts/check_vector_index.py --rebuild --storage halfvec, which checks
+    # for pgvector 0.7+ (halfvec, binary_quantize, subvector) first. The
+    # extension is left alone: updating it is the database owner's call.
+    pass
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Built by earlier versions of upgrade(), or by check_vector_index.py
+    op.execute('DROP INDEX IF EXISTS idx_embedding_vector_halfvec_hnsw_cosine')
@@ -1,23 +1,117 @@
 """FastAPI application for RAG Resume Assistant."""
 
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Annotated, Optional
+
+from fastapi import FastAPI, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.database import AsyncSessionLocal, get_async_session
+from src.database.content_version import aget_content_version
+from src.database.model_registry import active_model, aget_models, shadow_models
+from src.database.query_logger import get_query_log_writer
+from src.embedding import aembed_queries, aembed_query, get_embedding_cache
+from src.retrieval import (
+    aretrieve_chunks,
+    aretrieve_chunks_batch,
+    arerank_chunks,
+    aget_chunk_indexes,
+    candidate_count,
+    get_chunk_cache,
+    get_memory_index,
+    get_reranker,
+    get_shadow_runner,
+)
+from src.generation import agenerate_response, astream_response, get_answer_cache
+from src.observability import (
+    MetricsMiddleware,
+    TracingMiddleware,
+    configure_tracing,
+    observe_stages,
+    record_context,
+    record_error,
+    record_tokens,
+    render_metrics,
+    server_timing,
+    shutdown_tracing,
+    span,
+)
+from src.providers import aclose_provider
+from src.tokenizer import load_encoding
+
 
-from src.database import get_session
-from src.database.models import QueryLog
-from src.retrieval import retrieve_chunks
-from src.generation import generate_response
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks."""
+    configure_tracing()  # No-op unless TRACING_ENABLED
+    # tiktoken may download its BPE file on first use; do that here, off the event loop
+    if not await asyncio.to_thread(load_encoding, settings.GENERATION_MODEL):
+        print(f"Warning: No tiktoken encoding for {settings.GENERATION_MODEL}; estimating token counts")
+    query_log_writer = get_query_log_writer()
+    await query_log_writer.start()
+    if settings.RETRIEVAL_BACKEND == "memory":
+        # Warm the active model's in-process index so the first query doesn't pay for the load
+        try:
+            async with AsyncSessionLocal() as session:
+                embedding_model, metric = active_model(await aget_models(session))
+                await get_memory_index(embedding_model, metric).arefresh(session)
+        except Exception as e:
+            print(f"Warning: Failed to load in-memory vector index (will retry on first query): {e}")
+    yield
+    # Let shadow retrievals finish, flush pending query logs, then close the provider's pooled connections
+    await get_shadow_runner().drain()
+    await query_log_writer.stop()
+    await aclose_provider()
+    shutdown_tracing()
 
 
 app = FastAPI(
     title="RAG Resume Assistant",
     description="Ask questions about Franklin Dickinson's background and experience",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
 
-class QueryRequest(BaseModel):
+
+class RetrievalFilters(BaseModel):
+    """Optional restrictions on which chunks retrieval may use."""
+    categories: Optional[list[Annotated[str, Field(min_length=1, max_length=128)]]] = Field(
+        default=None,
+        max_length=20,
+        description="Only use chunks in these categories (e.g. experience, projects)"
+    )
+    source_files: Optional[list[Annotated[str, Field(min_length=1, max_length=512)]]] = Field(
+        default=None,
+        max_length=50,
+        description="Only use chunks from these source files (e.g. content/experience/meta.md)"
+    )
+
+    def filters(self) -> dict:
+        """The filters that are set, as retrieval keyword arguments."""
+        return {
+            name: values
+            for name, values in (("categories", self.categories), ("source_files", self.source_files))
+            if values
+        }
+
+    def cache_scope(self) -> str:
+        """Answer cache scope, so answers retrieved under other filters are never reused."""
+        filters = self.filters()
+        return json.dumps({name: sorted(values) for name, values in filters.items()}) if filters else ""
+
+
+class QueryRequest(RetrievalFilters):
     """Request model for query endpoint."""
     query: str = Field(..., min_length=1, max_length=500, description="Question to ask")
     top_k: int = Field(default=5, ge=1, le=20, description="Number of chunks to retrieve")
@@ -28,6 +122,34 @@ class QueryResponse(BaseModel):
     query: str
     answer: str
     sources: list[str]
+    cached: bool = False
+    context_tokens: Optional[int] = None
+
+
+class BatchQueryRequest(RetrievalFilters):
+    """Request model for the batch query endpoint (filters apply to every question)."""
+    queries: list[Annotated[str, Field(min_length=1, max_length=500)]] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BATCH_MAX_QUERIES,
+        description="Questions to ask"
+    )
+    top_k: int = Field(default=5, ge=1, le=20, description="Number of chunks to retrieve per question")
+
+
+class BatchQueryResult(BaseModel):
+    """One question's outcome in a batch; error is set instead of answer on failure."""
+    query: str
+    answer: Optional[str] = None
+    sources: list[str] = []
+    cached: bool = False
+    context_tokens: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for the batch query endpoint (results in request order)."""
+    results: list[BatchQueryResult]
 
 
 @app.get("/")
@@ -40,25 +162,127 @@ async def root():
     }
 
 
+async def _chunk_indexes(session: AsyncSession, chunks, timings: dict) -> Optional[dict]:
+    """chunk_id -> chunk_index for merging adjacent chunks into one passage, if enabled.
+
+    Served by the chunk content cache; a lookup of chunks it hasn't seen yet
+    is counted in the search stage.
+    """
+    if not settings.CONTEXT_MERGE_ADJACENT or len(chunks) < 2:
+        return None
+    start = time.perf_counter()
+    chunk_indexes = await aget_chunk_indexes(session, [chunk_id for chunk_id, _, _, _, _ in chunks])
+    timings["search_ms"] = timings.get("search_ms", 0.0) + (time.perf_counter() - start) * 1000
+    return chunk_indexes
+
+
+async def _rerank(query: str, chunks, top_k: int, reranker, timings: dict):
+    """Rerank candidates down to top_k, traced as its own stage when a reranker is set."""
+    if reranker is None:
+        return await arerank_chunks(query, chunks, top_k, reranker, timings)
+    with span("rerank", {"rerank.candidates": len(chunks), "rerank.top_k": top_k}):
+        return await arerank_chunks(query, chunks, top_k, reranker, timings)
+
+
+def _record_metrics(timings: dict, usage: Optional[dict] = None, context_stats: Optional[dict] = None) -> None:
+    """Observe per-stage latency, token counts and context size for one answer."""
+    if settings.METRICS_ENABLED:
+        observe_stages(timings)
+        record_tokens(settings.GENERATION_MODEL, usage)
+        record_context(context_stats)
+
+
+def _record_error(endpoint: str, error: Exception) -> None:
+    if settings.METRICS_ENABLED:
+        record_error(endpoint, error)
+
+
+def _log_query(query_text: str, chunks, answer: str, timings: dict, context_stats: Optional[dict] = None) -> None:
+    """Queue a QueryLog record for the background batch writer (never blocks)."""
+    get_query_log_writer().log({
+        "query_text": query_text,
+        "retrieved_chunk_ids": [chunk_id for chunk_id, _, _, _, _ in chunks],
+        "response_text": answer,
+        "embed_ms": timings.get("embed_ms"),
+        "search_ms": timings.get("search_ms"),
+        "rerank_ms": timings.get("rerank_ms"),
+        "generate_ms": timings.get("generate_ms"),
+        "total_ms": timings.get("total_ms"),
+        "context_tokens": (context_stats or {}).get("context_tokens"),
+    })
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.post("/query", response_model=QueryResponse)
 async def query(
     request: QueryRequest,
-    session: Session = Depends(get_session)
+    response: Response,
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Answer a question about Franklin's resume using RAG.
 
     Process:
-    1. Retrieve relevant chunks from vector database
-    2. Generate response using LLM with retrieved context
-    3. Return answer with source files
+    1. Embed the query with the active embedding model and check the semantic answer cache
+    2. Retrieve relevant chunks from vector database (over-fetched if a reranker is set);
+       a sample is also retrieved with each shadow model in the background
+    3. Rerank candidates down to top_k (RERANKER)
+    4. Generate response using LLM with retrieved context (deduplicated,
+       merged and fitted to CONTEXT_MAX_TOKENS)
+    5. Return answer with source files and the context tokens used
+
+    The Server-Timing header breaks the latency down by stage.
     """
+    start = time.perf_counter()
+    timings = {}
     try:
-        # Retrieve relevant chunks
-        chunks = retrieve_chunks(
+        models = await aget_models(session)
+        embedding_model, metric = active_model(models)
+        with span("embed", {"embedding.model": embedding_model}):
+            query_embedding = await aembed_query(request.query, embedding_model)
+        timings["embed_ms"] = (time.perf_counter() - start) * 1000
+
+        # Reuse the answer to a near-duplicate question if we have one
+        answer_cache = get_answer_cache()
+        if answer_cache is not None:
+            content_version = await aget_content_version(session)
+            cached = answer_cache.get(
+                query_embedding, request.top_k, settings.GENERATION_MODEL, content_version,
+                scope=request.cache_scope()
+            )
+            if cached is not None:
+                answer, sources, _ = cached
+                timings["total_ms"] = (time.perf_counter() - start) * 1000
+                _record_metrics(timings)
+                response.headers["Server-Timing"] = server_timing(timings)
+                return QueryResponse(
+                    query=request.query,
+                    answer=answer,
+                    sources=sources,
+                    cached=True
+                )
+
+        # Retrieve relevant chunks, then rerank the candidates down to top_k
+        reranker = get_reranker()
+        candidates = candidate_count(request.top_k, reranker)
+        chunks = await aretrieve_chunks(
             query=request.query,
             session=session,
-            top_k=request.top_k
+            top_k=candidates,
+            embedding_model=embedding_model,
+            metric=metric,
+            query_embedding=query_embedding,
+            timings=timings,
+            categories=request.categories,
+            source_files=request.source_files
+        )
+        get_shadow_runner().submit(
+            request.query, chunks, candidates, shadow_models(models), AsyncSessionLocal, request.filters()
         )
+        chunks = await _rerank(request.query, chunks, request.top_k, reranker, timings)
 
         if not chunks:
             raise HTTPException(
@@ -67,41 +291,291 @@ async def query(
             )
 
         # Generate response
-        answer = generate_response(
+        chunk_indexes = await _chunk_indexes(session, chunks, timings)
+        context_stats = {}
+        usage = {}
+        generate_start = time.perf_counter()
+        answer = await agenerate_response(
             query=request.query,
-            retrieved_chunks=chunks
+            retrieved_chunks=chunks,
+            model=settings.GENERATION_MODEL,
+            usage=usage,
+            chunk_indexes=chunk_indexes,
+            context_stats=context_stats
         )
+        timings["generate_ms"] = (time.perf_counter() - generate_start) * 1000
 
         # Extract unique source files
         sources = list(set(source_file for _, _, source_file, _, _ in chunks))
 
-        # Log query to database
-        try:
-            chunk_ids = [chunk_id for chunk_id, _, _, _, _ in chunks]
-            query_log = QueryLog(
-                query_text=request.query,
-                retrieved_chunk_ids=chunk_ids,
-                response_text=answer
+        if answer_cache is not None:
+            answer_cache.put(
+                query_embedding, request.top_k, settings.GENERATION_MODEL,
+                content_version, answer, sources, scope=request.cache_scope()
             )
-            session.add(query_log)
-            session.commit()
-        except Exception as log_error:
-            # Don't fail the request if logging fails
-            print(f"Warning: Failed to log query: {log_error}")
+
+        # Log query to database (batched in the background)
+        timings["total_ms"] = (time.perf_counter() - start) * 1000
+        _log_query(request.query, chunks, answer, timings, context_stats)
+        _record_metrics(timings, usage, context_stats)
+        response.headers["Server-Timing"] = server_timing(timings)
 
         return QueryResponse(
             query=request.query,
             answer=answer,
-            sources=sources
+            sources=sources,
+            context_tokens=context_stats.get("context_tokens")
         )
 
     except Exception as e:
+        _record_error("/query", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error processing query: {str(e)}"
         )
 
 
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_batch(
+    request: BatchQueryRequest,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session)
+) -> BatchQueryResponse:
+    """Answer many questions in one request.
+
+    Process:
+    1. Embed every question in one embeddings call (cached ones are skipped)
+    2. Serve near-duplicates from the semantic answer cache
+    3. Retrieve chunks for all remaining questions in one SQL statement
+    4. Rerank each question's candidates down to top_k (RERANKER)
+    5. Generate answers concurrently, at most BATCH_GENERATION_CONCURRENCY at a time
+
+    A failure while generating one answer is reported in that item's error;
+    failures in the shared embedding or retrieval steps fail the whole request.
+    The Server-Timing header covers the shared steps and the whole batch.
+    """
+    start = time.perf_counter()
+    timings = {}
+    try:
+        embedding_model, metric = active_model(await aget_models(session))
+        with span("embed", {"embedding.model": embedding_model, "embedding.queries": len(request.queries)}):
+            embeddings = await aembed_queries(request.queries, embedding_model)
+        timings["embed_ms"] = (time.perf_counter() - start) * 1000
+
+        results = [BatchQueryResult(query=query) for query in request.queries]
+        pending = list(range(len(request.queries)))
+
+        answer_cache = get_answer_cache()
+        if answer_cache is not None:
+            content_version = await aget_content_version(session)
+            for i in list(pending):
+                cached = answer_cache.get(
+                    embeddings[i], request.top_k, settings.GENERATION_MODEL, content_version,
+                    scope=request.cache_scope()
+                )
+                if cached is not None:
+                    answer, sources, _ = cached
+                    results[i] = BatchQueryResult(query=request.queries[i], answer=answer, sources=sources, cached=True)
+                    pending.remove(i)
+
+        reranker = get_reranker()
+        retrieved = await aretrieve_chunks_batch(
+            queries=[request.queries[i] for i in pending],
+            session=session,
+            top_k=candidate_count(request.top_k, reranker),
+            embedding_model=embedding_model,
+            metric=metric,
+            query_embeddings=[embeddings[i] for i in pending],
+            timings=timings,
+            categories=request.categories,
+            source_files=request.source_files
+        )
+        chunk_indexes = await _chunk_indexes(session, [chunk for chunks in retrieved for chunk in chunks], timings)
+    except Exception as e:
+        _record_error("/query/batch", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing batch: {str(e)}"
+        )
+
+    semaphore = asyncio.Semaphore(settings.BATCH_GENERATION_CONCURRENCY)
+
+    async def answer_one(i: int, chunks) -> None:
+        query = request.queries[i]
+        if not chunks:
+            results[i].error = "No relevant content found for query"
+            return
+        item_timings = {}
+        context_stats = {}
+        usage = {}
+        try:
+            chunks = await _rerank(query, chunks, request.top_k, reranker, item_timings)
+            async with semaphore:
+                generate_start = time.perf_counter()
+                answer = await agenerate_response(
+                    query=query,
+                    retrieved_chunks=chunks,
+                    model=settings.GENERATION_MODEL,
+                    usage=usage,
+                    chunk_indexes=chunk_indexes,
+                    context_stats=context_stats
+                )
+            item_timings["generate_ms"] = (time.perf_counter() - generate_start) * 1000
+        except Exception as e:
+            _record_error("/query/batch", e)
+            results[i].error = f"Error processing query: {str(e)}"
+            return
+        # Shared embed/search steps are observed once per batch, not per item
+        _record_metrics(item_timings, usage, context_stats)
+
+        sources = list(set(source_file for _, _, source_file, _, _ in chunks))
+        results[i] = BatchQueryResult(
+            query=query, answer=answer, sources=sources, context_tokens=context_stats.get("context_tokens")
+        )
+        if answer_cache is not None:
+            answer_cache.put(
+                embeddings[i], request.top_k, settings.GENERATION_MODEL,
+                content_version, answer, sources, scope=request.cache_scope()
+            )
+        item_timings["total_ms"] = (time.perf_counter() - start) * 1000
+        _log_query(query, chunks, answer, {**timings, **item_timings}, context_stats)
+
+    await asyncio.gather(*(answer_one(i, chunks) for i, chunks in zip(pending, retrieved)))
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    _record_metrics(timings)
+    response.headers["Server-Timing"] = server_timing(timings)
+    return BatchQueryResponse(results=results)
+
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """Answer a question as a Server-Sent Events stream.
+
+    Events, in order:
+    - sources: source files and chunk ids, sent as soon as retrieval finishes
+    - token: one per LLM text delta
+    - done: token usage, context stats, latency breakdown and whether the answer was cached
+    - error: sent instead of the remaining events if anything fails
+
+    Headers are sent before any work is done, so there is no Server-Timing
+    header here; the done event carries the latency breakdown instead.
+    """
+    async def event_stream():
+        start = time.perf_counter()
+        timings = {}
+        # Opened here rather than via Depends so it stays valid while streaming
+        async with AsyncSessionLocal() as session:
+            try:
+                models = await aget_models(session)
+                embedding_model, metric = active_model(models)
+                with span("embed", {"embedding.model": embedding_model}):
+                    query_embedding = await aembed_query(request.query, embedding_model)
+                timings["embed_ms"] = (time.perf_counter() - start) * 1000
+
+                answer_cache = get_answer_cache()
+                if answer_cache is not None:
+                    content_version = await aget_content_version(session)
+                    cached = answer_cache.get(
+                        query_embedding, request.top_k, settings.GENERATION_MODEL, content_version,
+                        scope=request.cache_scope()
+                    )
+                    if cached is not None:
+                        answer, sources, _ = cached
+                        _record_metrics(timings)
+                        yield _sse("sources", {"sources": sources, "chunk_ids": []})
+                        yield _sse("token", {"text": answer})
+                        yield _sse("done", {
+                            "cached": True,
+                            "usage": None,
+                            "latency_ms": {"total": (time.perf_counter() - start) * 1000}
+                        })
+                        return
+
+                reranker = get_reranker()
+                candidates = candidate_count(request.top_k, reranker)
+                chunks = await aretrieve_chunks(
+                    query=request.query,
+                    session=session,
+                    top_k=candidates,
+                    embedding_model=embedding_model,
+                    metric=metric,
+                    query_embedding=query_embedding,
+                    timings=timings,
+                    categories=request.categories,
+                    source_files=request.source_files
+                )
+                get_shadow_runner().submit(
+                    request.query, chunks, candidates, shadow_models(models), AsyncSessionLocal, request.filters()
+                )
+                chunks = await _rerank(request.query, chunks, request.top_k, reranker, timings)
+                retrieval_ms = (time.perf_counter() - start) * 1000
+
+                if not chunks:
+                    yield _sse("error", {"detail": "No relevant content found for query"})
+                    return
+
+                sources = list(set(source_file for _, _, source_file, _, _ in chunks))
+                yield _sse("sources", {
+                    "sources": sources,
+                    "chunk_ids": [chunk_id for chunk_id, _, _, _, _ in chunks]
+                })
+
+                chunk_indexes = await _chunk_indexes(session, chunks, timings)
+                context_stats = {}
+                usage = {}
+                answer_parts = []
+                first_token_ms = None
+                generate_start = time.perf_counter()
+                async for token in astream_response(
+                    query=request.query,
+                    retrieved_chunks=chunks,
+                    model=settings.GENERATION_MODEL,
+                    usage=usage,
+                    chunk_indexes=chunk_indexes,
+                    context_stats=context_stats
+                ):
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                    answer_parts.append(token)
+                    yield _sse("token", {"text": token})
+
+                answer = "".join(answer_parts)
+                timings["generate_ms"] = (time.perf_counter() - generate_start) * 1000
+                timings["total_ms"] = (time.perf_counter() - start) * 1000
+                yield _sse("done", {
+                    "cached": False,
+                    "usage": usage or None,
+                    "context": context_stats,
+                    "latency_ms": {
+                        "retrieval": retrieval_ms,
+                        "rerank": timings.get("rerank_ms"),
+                        "first_token": first_token_ms,
+                        "total": timings["total_ms"]
+                    }
+                })
+
+                if answer_cache is not None:
+                    answer_cache.put(
+                        query_embedding, request.top_k, settings.GENERATION_MODEL,
+                        content_version, answer, sources, scope=request.cache_scope()
+                    )
+                _log_query(request.query, chunks, answer, timings, context_stats)
+                _record_metrics(timings, usage, context_stats)
+
+            except Exception as e:
+                _record_error("/query/stream", e)
+                yield _sse("error", {"detail": f"Error processing query: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Don't let proxies buffer the stream
+        }
+    )
+
+
 @app.get("/health")
 async def health():
     """Detailed health check."""
@@ -110,3 +584,44 @@ async def health():
         "database": "connected",
         "services": ["retrieval", "generation"]
     }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency, requests, errors, tokens, caches, DB pool."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
+@app.get("/models")
+async def embedding_models(session: AsyncSession = Depends(get_async_session)):
+    """Embedding model registry, and how each shadow model's retrieval compares with the active one."""
+    models = await aget_models(session)
+    return {
+        "active": active_model(models)[0],
+        "models": models,
+        "shadow": get_shadow_runner().stats()
+    }
+
+
+@app.get("/logs/stats")
+async def log_stats():
+    """Background query log writer counters (queued, written, dropped)."""
+    return get_query_log_writer().stats()
+
+
+@app.get("/cache/stats")
+async def cache_stats(session: AsyncSession = Depends(get_async_session)):
+    """Cache counters (hits, misses, latency saved) and the active model's in-memory index size."""
+    answer_cache = get_answer_cache()
+    vector_index = None
+    if settings.RETRIEVAL_BACKEND == "memory":
+        vector_index = get_memory_index(*active_model(await aget_models(session))).stats()
+    return {
+        "embedding_cache": get_embedding_cache().stats(),
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "vector_index": vector_index,
+        "chunk_cache": get_chunk_cache().stats() if settings.RETRIEVAL_FETCH == "two_step" else None
+    }
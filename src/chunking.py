@@ -0,0 +1,249 @@
+"""Structure-aware markdown chunking (chunk_strategy: "markdown").
+
+The older strategies are either too coarse ("whole": one chunk per file, up to
+hundreds of tokens of unrelated sections) or too fine ("paragraph": every blank
+line starts a chunk, so a heading or a one-line bullet becomes its own chunk).
+chunk_markdown instead:
+
+- Parses the text into blocks: headings, paragraphs, lists (with the line that
+  introduces them), tables and fenced code. Lists, tables and code blocks are
+  never split unless a single one is larger than max_tokens.
+- Packs blocks into chunks of about target_tokens, starting a new chunk at a
+  heading once the current one is at least half full, so small sections are
+  merged rather than emitted as fragments.
+- When a long section has to be split, the next chunk repeats the section's
+  heading and the last ~overlap_tokens of the previous chunk, so each chunk
+  still reads on its own.
+- Returns each chunk's heading path (["Meta Projects", "Project 1: ...",
+  "Situation"]), which ingestion stores in metadata_json.
+
+Usage:
+    from src.chunking import chunk_markdown
+
+    for text, heading_path in chunk_markdown(content, "text-embedding-3-small", 400, 50):
+        ...
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from src.tokenizer import count_tokens
+
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+_TABLE_ROW = re.compile(r"^\s*\|")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+# Sentence ends and line breaks: where an oversized paragraph or an overlap tail may be cut
+_SEGMENT_END = re.compile(r"(?<=[.!?])\s+|\n")
+
+# A chunk at least this fraction of target_tokens is closed when a new section starts
+_SECTION_BREAK_FILL = 0.5
+
+Block = Tuple[str, str]  # (kind, text): heading, paragraph, list, table or code
+
+
+def parse_blocks(content: str) -> List[Block]:
+    """Split markdown into heading, paragraph, list, table and code blocks."""
+    blocks: List[Block] = []
+    kind: Optional[str] = None
+    lines: List[str] = []
+    fence: Optional[str] = None
+    blank_before = False
+
+    def close() -> None:
+        nonlocal kind, lines
+        if kind is not None:
+            blocks.append((kind, "\n".join(lines).strip("\n")))
+        kind, lines = None, []
+
+    for line in content.splitlines():
+        if fence is not None:
+            lines.append(line)
+            if line.strip().startswith(fence):
+                fence = None
+                close()
+            continue
+
+        if not line.strip():
+            # Lists may have blank lines between items; anything else ends here
+            if kind != "list":
+                close()
+            blank_before = True
+            continue
+
+        fence_match = _FENCE.match(line)
+        heading = _HEADING.match(line)
+        if fence_match:
+            close()
+            kind, lines, fence = "code", [line], fence_match.group(1)
+        elif heading:
+            close()
+            blocks.append(("heading", line.strip()))
+        elif _TABLE_ROW.match(line):
+            if kind != "table":
+                close()
+                kind = "table"
+            lines.append(line)
+        elif _LIST_ITEM.match(line):
+            if kind == "paragraph" and not blank_before:
+                kind = "list"  # Keep the line introducing a list with it
+            elif kind != "list":
+                close()
+                kind = "list"
+            elif blank_before:
+                lines.append("")
+            lines.append(line)
+        elif kind == "list" and (line[:1].isspace() or not blank_before):
+            # Indented continuation of an item (or a lazy continuation line)
+            if blank_before:
+                lines.append("")
+            lines.append(line)
+        else:
+            if kind != "paragraph":
+                close()
+                kind = "paragraph"
+            lines.append(line)
+        blank_before = False
+
+    close()
+    return blocks
+
+
+def _split_block(kind: str, text: str, max_tokens: int, model: str) -> List[str]:
+    """Split one oversized block into pieces of at most max_tokens.
+
+    Paragraphs split at sentence ends; lists, tables and code at line breaks.
+    Table pieces repeat the header row so every piece is still a table.
+    """
+    if kind == "paragraph":
+        segments = [segment for segment in _SEGMENT_END.split(text) if segment.strip()]
+        separator = " "
+    else:
+        segments = text.split("\n")
+        separator = "\n"
+
+    header: List[str] = []
+    if kind == "table" and len(segments) > 2:
+        header, segments = segments[:2], segments[2:]
+
+    pieces: List[str] = []
+    current: List[str] = list(header)
+    for segment in segments:
+        candidate = separator.join(current + [segment])
+        if len(current) > len(header) and count_tokens(candidate, model) > max_tokens:
+            pieces.append(separator.join(current))
+            current = list(header)
+        current.append(segment)
+    if len(current) > len(header):
+        pieces.append(separator.join(current))
+    return pieces
+
+
+def _tail(text: str, max_tokens: int, model: str) -> str:
+    """The last whole sentences/lines of text that fit in max_tokens (overlap)."""
+    if max_tokens <= 0:
+        return ""
+    segments = [segment for segment in _SEGMENT_END.split(text) if segment.strip()]
+    tail: List[str] = []
+    for segment in reversed(segments):
+        if count_tokens(" ".join([segment] + tail), model) > max_tokens:
+            break
+        tail.insert(0, segment)
+    # Overlapping with the whole previous piece would only duplicate it
+    return " ".join(tail) if len(tail) < len(segments) else ""
+
+
+def _common_prefix(paths: List[List[str]]) -> List[str]:
+    prefix: List[str] = []
+    for titles in zip(*paths):
+        if any(title != titles[0] for title in titles):
+            break
+        prefix.append(titles[0])
+    return prefix
+
+
+def chunk_markdown(
+    content: str,
+    model: str,
+    target_tokens: int,
+    overlap_tokens: int,
+    max_tokens: Optional[int] = None
+) -> List[Tuple[str, List[str]]]:
+    """Chunk markdown along its heading structure.
+
+    Args:
+        content: Markdown text (frontmatter already removed)
+        model: Model whose tokenizer measures chunk size
+        target_tokens: Size chunks are packed up to
+        overlap_tokens: Tokens repeated from the previous chunk when a section is split
+        max_tokens: Largest list, table or code block kept whole (defaults to
+            2 x target_tokens); larger ones are split at line breaks
+
+    Returns:
+        List of (chunk_text, heading_path) in document order
+    """
+    max_tokens = max_tokens or 2 * target_tokens
+    chunks: List[Tuple[str, List[str]]] = []
+
+    stack: List[Tuple[int, str]] = []  # (level, title) of the enclosing headings
+    pending_headings: List[str] = []  # Headings waiting for their first content
+    section_heading: Optional[str] = None  # Heading line repeated on continuation chunks
+
+    parts: List[str] = []
+    paths: List[List[str]] = []
+    tokens = 0
+    has_content = False
+
+    def flush() -> None:
+        nonlocal parts, paths, tokens, has_content
+        if has_content:
+            chunks.append(("\n\n".join(parts), _common_prefix(paths)))
+        parts, paths, tokens, has_content = [], [], 0, False
+
+    def add(text: str, path: List[str]) -> None:
+        nonlocal tokens, has_content
+        parts.append(text)
+        paths.append(path)
+        tokens += count_tokens(text, model)
+        has_content = True
+
+    for kind, text in parse_blocks(content):
+        if kind == "heading":
+            level_marks, title = _HEADING.match(text).groups()
+            level = len(level_marks)
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, title))
+            if not pending_headings and tokens >= target_tokens * _SECTION_BREAK_FILL:
+                flush()
+            pending_headings.append(text)
+            section_heading = text
+            continue
+
+        path = [title for _, title in stack]
+        limit = target_tokens if kind == "paragraph" else max_tokens
+        pieces = [text] if count_tokens(text, model) <= limit else _split_block(kind, text, target_tokens, model)
+
+        for piece in pieces:
+            unit = "\n\n".join(pending_headings + [piece])
+            unit_tokens = count_tokens(unit, model)
+            if has_content and tokens + unit_tokens > target_tokens:
+                previous = parts[-1]
+                flush()
+                if not pending_headings:
+                    # Continuing a split section: repeat its heading and a little context
+                    if section_heading is not None:
+                        parts.append(section_heading)
+                        paths.append(path)
+                        tokens += count_tokens(section_heading, model)
+                    overlap = _tail(previous, overlap_tokens, model)
+                    if overlap:
+                        parts.append(overlap)
+                        paths.append(path)
+                        tokens += count_tokens(overlap, model)
+            add(unit, path)
+            pending_headings = []
+
+    flush()
+    return chunks
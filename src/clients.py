@@ -0,0 +1,104 @@
+"""Application-scoped OpenAI clients with pooled, keep-alive HTTP connections.
+
+Creating an OpenAI client per call pays for a new connection pool, TLS context
+and TLS handshake every time. Instead, one sync and one async client are created
+lazily and shared by retrieval, generation and the scripts. Pool size, timeouts
+and retries come from Settings; the SDK retries 408/409/429/5xx and connection
+errors with exponential backoff and jitter, honouring Retry-After.
+
+Usage:
+    from src.clients import get_openai_client, get_async_openai_client
+
+    client = get_openai_client()
+
+FastAPI closes both clients on shutdown via aclose_openai_clients().
+"""
+
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from src.config import settings
+
+
+_client: Optional[OpenAI] = None
+_async_client: Optional[AsyncOpenAI] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.OPENAI_TIMEOUT_SECONDS,
+        connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS
+    )
+
+
+def create_openai_client(api_key: Optional[str], base_url: Optional[str]) -> OpenAI:
+    """Build a sync client with the pooled connection limits, timeouts and retries from Settings.
+
+    For OpenAI-compatible servers other than the shared client's (e.g. the local provider).
+    """
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=_timeout(),
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=DefaultHttpxClient(limits=_limits(), timeout=_timeout())
+    )
+
+
+def create_async_openai_client(api_key: Optional[str], base_url: Optional[str]) -> AsyncOpenAI:
+    """Async variant of create_openai_client."""
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=_timeout(),
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout())
+    )
+
+
+def get_openai_client() -> OpenAI:
+    """Get the shared sync OpenAI client (created on first use)."""
+    global _client
+    if _client is None:
+        _client = create_openai_client(settings.OPENAI_API_KEY, settings.OPENAI_BASE_URL)
+    return _client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Get the shared async OpenAI client (created on first use).
+
+    The underlying connection pool belongs to the event loop that first uses
+    it, so call aclose_openai_clients() before switching loops (e.g. between
+    separate asyncio.run() calls in a script).
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = create_async_openai_client(settings.OPENAI_API_KEY, settings.OPENAI_BASE_URL)
+    return _async_client
+
+
+def close_openai_client() -> None:
+    """Close the shared sync client and its connection pool."""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+async def aclose_openai_clients() -> None:
+    """Close both shared clients (used on FastAPI shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+    close_openai_client()
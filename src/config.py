@@ -1,7 +1,9 @@
 """Application configuration using Pydantic Settings."""
 
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field, field_validator
+from pydantic import Field, field_validator, model_validator
 
 
 class Settings(BaseSettings):
@@ -11,15 +13,346 @@ class Settings(BaseSettings):
         ...,
         description="PostgreSQL connection string with pgvector support"
     )
-    OPENAI_API_KEY: str = Field(
-        ...,
-        description="OpenAI API key for generating embeddings"
+    OPENAI_API_KEY: Optional[str] = Field(
+        default=None,
+        description="OpenAI API key for embeddings and generation (required when LLM_PROVIDER=openai)"
     )
     ENVIRONMENT: str = Field(
         default="development",
         description="Environment: development, staging, or production"
     )
 
+    ASYNC_PREPARED_STATEMENT_CACHE_SIZE: int = Field(
+        default=100,
+        ge=0,
+        description="Prepared statements cached per asyncpg connection (0 for PgBouncer transaction mode)"
+    )
+
+    # Embedding / chat completion provider
+    LLM_PROVIDER: str = Field(
+        default="openai",
+        description="openai, fake (deterministic offline stand-in for tests and benchmarks) "
+                    "or local (OpenAI-compatible local server, e.g. Ollama or vLLM)"
+    )
+    LOCAL_BASE_URL: str = Field(
+        default="http://localhost:11434/v1",
+        description="Base URL of the OpenAI-compatible server for LLM_PROVIDER=local"
+    )
+    LOCAL_API_KEY: str = Field(
+        default="local",
+        description="API key sent to the local server (most ignore it)"
+    )
+    FAKE_EMBEDDING_LATENCY_MS: float = Field(
+        default=0.0,
+        ge=0,
+        description="Artificial latency per embeddings call with LLM_PROVIDER=fake"
+    )
+    FAKE_GENERATION_LATENCY_MS: float = Field(
+        default=0.0,
+        ge=0,
+        description="Artificial time to first token per completion with LLM_PROVIDER=fake"
+    )
+    FAKE_TOKEN_LATENCY_MS: float = Field(
+        default=0.0,
+        ge=0,
+        description="Artificial delay per generated token with LLM_PROVIDER=fake"
+    )
+
+    # OpenAI HTTP client (shared, pooled)
+    OPENAI_BASE_URL: Optional[str] = Field(
+        default=None,
+        description="Override the OpenAI API base URL (proxies, local stand-ins)"
+    )
+    OPENAI_MAX_CONNECTIONS: int = Field(
+        default=100,
+        ge=1,
+        description="Maximum concurrent HTTP connections to the OpenAI API"
+    )
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=20,
+        ge=0,
+        description="Idle connections kept open for reuse"
+    )
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = Field(
+        default=60.0,
+        ge=0,
+        description="How long an idle connection is kept before closing"
+    )
+    OPENAI_TIMEOUT_SECONDS: float = Field(
+        default=30.0,
+        gt=0,
+        description="Overall timeout per OpenAI request"
+    )
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = Field(
+        default=5.0,
+        gt=0,
+        description="Timeout for establishing a connection"
+    )
+    OPENAI_MAX_RETRIES: int = Field(
+        default=2,
+        ge=0,
+        description="Retries (exponential backoff with jitter) on 429/5xx/connection errors"
+    )
+
+    # Models
+    EMBEDDING_MODEL: str = Field(
+        default="text-embedding-3-small",
+        description="OpenAI embedding model used for queries and ingestion"
+    )
+    EMBEDDING_DIMENSIONS: int = Field(
+        default=1536,
+        description="Dimensions of EMBEDDING_MODEL vectors"
+    )
+    EMBEDDING_REGISTRY_TTL_SECONDS: float = Field(
+        default=30.0,
+        ge=0,
+        description="How long to memoize the embedding model registry (the active model overrides "
+                    "EMBEDDING_MODEL; EMBEDDING_MODEL is the fallback while the registry is empty)"
+    )
+    SHADOW_SAMPLE_RATE: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of /query requests also retrieved with each shadow model, in the background"
+    )
+    SHADOW_MAX_PENDING: int = Field(
+        default=8,
+        ge=1,
+        description="Shadow retrievals in flight at once per worker; samples beyond this are skipped"
+    )
+    GENERATION_MODEL: str = Field(
+        default="gpt-4o-mini",
+        description="OpenAI chat model used to generate answers"
+    )
+
+    # Ingestion chunking (chunk_strategy: "markdown"; per file: chunk_tokens / chunk_overlap)
+    CHUNK_TARGET_TOKENS: int = Field(
+        default=400,
+        ge=50,
+        description="Size structure-aware chunks are packed up to"
+    )
+    CHUNK_OVERLAP_TOKENS: int = Field(
+        default=50,
+        ge=0,
+        description="Tokens repeated from the previous chunk when a section is split"
+    )
+
+    # Prompt context assembly
+    CONTEXT_MAX_TOKENS: int = Field(
+        default=3000,
+        ge=100,
+        description="Token budget for retrieved context in the generation prompt"
+    )
+    CONTEXT_MIN_TRUNCATED_TOKENS: int = Field(
+        default=64,
+        ge=1,
+        description="Truncate the passage that overflows the budget only if this many tokens remain; "
+                    "otherwise drop it"
+    )
+    CONTEXT_MERGE_ADJACENT: bool = Field(
+        default=True,
+        description="Merge retrieved chunks that are adjacent in the same file (chunk_index comes from the "
+                    "chunk content cache; only chunks it hasn't seen are looked up)"
+    )
+
+    # Batch queries (/query/batch)
+    BATCH_MAX_QUERIES: int = Field(
+        default=50,
+        ge=1,
+        description="Maximum questions accepted by one /query/batch request"
+    )
+    BATCH_GENERATION_CONCURRENCY: int = Field(
+        default=8,
+        ge=1,
+        description="Answers generated in parallel per /query/batch request"
+    )
+
+    # Vector search
+    VECTOR_DISTANCE_METRIC: str = Field(
+        default="cosine",
+        description="Distance metric for vector search: cosine, inner_product, or l2"
+    )
+    VECTOR_INDEX_TYPE: str = Field(
+        default="hnsw",
+        description="ANN index type on chunk_embeddings.embedding: hnsw or ivfflat"
+    )
+    IVFFLAT_PROBES: int = Field(
+        default=10,
+        ge=1,
+        description="Lists probed per IVFFlat query (higher = better recall, slower)"
+    )
+    HNSW_EF_SEARCH: int = Field(
+        default=40,
+        ge=1,
+        description="HNSW candidate list size per query (higher = better recall, slower)"
+    )
+    VECTOR_STORAGE: str = Field(
+        default="full",
+        description="Representation the ANN index searches: full (float32), halfvec (float16) or binary "
+                    "(1 bit per dimension); compact ones are reranked exactly on the full vectors"
+    )
+    VECTOR_COARSE_DIMENSIONS: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Index only the first N embedding dimensions for compact storage (unset = all)"
+    )
+    VECTOR_COARSE_CANDIDATES: int = Field(
+        default=40,
+        ge=1,
+        description="Candidates taken from the compact index and reranked on full precision"
+    )
+    VECTOR_ITERATIVE_SCAN: str = Field(
+        default="relaxed_order",
+        description="pgvector 0.8+ iterative index scans for category/source filtered searches: off, "
+                    "relaxed_order or strict_order (the ANN scan continues until top_k rows pass the filter)"
+    )
+
+    # Retrieval
+    RETRIEVAL_MODE: str = Field(
+        default="vector",
+        description="Retrieval strategy: vector (ANN only) or hybrid (ANN + full-text, rank-fused; "
+                    "needs the content_tsv migration, c5e2d8a1f374)"
+    )
+    HYBRID_CANDIDATES: int = Field(
+        default=20,
+        ge=1,
+        description="Candidates taken from each of the vector and full-text rankings before fusion"
+    )
+    HYBRID_RRF_K: int = Field(
+        default=60,
+        ge=1,
+        description="Reciprocal rank fusion constant (score = sum of 1 / (k + rank))"
+    )
+    RERANKER: str = Field(
+        default="none",
+        description="Rerank stage after retrieval: none, heuristic (vector + term overlap) or "
+                    "cross_encoder (local sentence-transformers model)"
+    )
+    RERANK_OVERFETCH: int = Field(
+        default=4,
+        ge=1,
+        description="With a reranker, retrieve top_k x this many candidates to rerank down to top_k"
+    )
+    RERANK_LEXICAL_WEIGHT: float = Field(
+        default=0.4,
+        ge=0.0,
+        le=1.0,
+        description="Weight of query-term overlap vs vector closeness in the heuristic reranker"
+    )
+    RERANK_CROSS_ENCODER_MODEL: str = Field(
+        default="cross-encoder/ms-marco-MiniLM-L-6-v2",
+        description="sentence-transformers CrossEncoder model for RERANKER=cross_encoder"
+    )
+    RETRIEVAL_BACKEND: str = Field(
+        default="postgres",
+        description="Where vector search runs: postgres (pgvector) or memory (in-process NumPy index, "
+                    "vector mode only; for small corpora)"
+    )
+    VECTOR_INDEX_SNAPSHOT_DIR: Optional[str] = Field(
+        default=None,
+        description="Directory for memory-mapped snapshots of the in-process index (unset = no snapshots)"
+    )
+    RETRIEVAL_FETCH: str = Field(
+        default="join",
+        description="How postgres retrieval gets chunk content: join (in the search statement) or two_step "
+                    "(search returns ids and distances; content comes from the in-process chunk cache)"
+    )
+    CHUNK_CACHE_MAX_MB: float = Field(
+        default=16.0,
+        gt=0,
+        description="Memory budget for the in-process chunk content cache used by RETRIEVAL_FETCH=two_step (MB)"
+    )
+
+    # Query-embedding cache
+    EMBEDDING_CACHE_MAX_MB: float = Field(
+        default=32.0,
+        gt=0,
+        description="Memory budget for the in-process query-embedding LRU (MB)"
+    )
+    EMBEDDING_CACHE_BACKEND: str = Field(
+        default="none",
+        description="Shared query-embedding cache tier: none, sqlite, or postgres"
+    )
+    EMBEDDING_CACHE_PATH: str = Field(
+        default=".cache/query_embeddings.sqlite3",
+        description="SQLite file for the shared cache tier when backend is sqlite"
+    )
+
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED: bool = Field(
+        default=True,
+        description="Reuse answers for near-duplicate questions"
+    )
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = Field(
+        default=0.95,
+        ge=0.0,
+        le=1.0,
+        description="Minimum cosine similarity between queries to reuse an answer"
+    )
+    ANSWER_CACHE_MAX_ENTRIES: int = Field(
+        default=2000,
+        ge=1,
+        description="Maximum cached answers (oldest are overwritten first)"
+    )
+    CONTENT_VERSION_TTL_SECONDS: float = Field(
+        default=30.0,
+        ge=0,
+        description="How long to memoize the content version before re-checking the database"
+    )
+
+    # Query logging (batched, off the request path)
+    QUERY_LOG_QUEUE_SIZE: int = Field(
+        default=1000,
+        ge=1,
+        description="Maximum query log records waiting to be written"
+    )
+    QUERY_LOG_BATCH_SIZE: int = Field(
+        default=50,
+        ge=1,
+        description="Records per multi-row INSERT"
+    )
+    QUERY_LOG_FLUSH_INTERVAL_SECONDS: float = Field(
+        default=2.0,
+        gt=0,
+        description="Maximum time a record waits before its batch is written"
+    )
+    QUERY_LOG_DROP_POLICY: str = Field(
+        default="drop_newest",
+        description="When the queue is full: drop_newest or drop_oldest"
+    )
+
+    # Observability
+    METRICS_ENABLED: bool = Field(
+        default=True,
+        description="Expose Prometheus metrics on /metrics and record per-stage latency"
+    )
+    TRACING_ENABLED: bool = Field(
+        default=False,
+        description="Record OpenTelemetry traces (needs the tracing extra: pip install -e '.[tracing]')"
+    )
+    TRACING_EXPORTER: str = Field(
+        default="otlp",
+        description="Where spans go: otlp (collector over HTTP), console, or file (JSON lines)"
+    )
+    TRACING_OTLP_ENDPOINT: str = Field(
+        default="http://localhost:4318/v1/traces",
+        description="OTLP/HTTP traces endpoint of the collector"
+    )
+    TRACING_FILE_PATH: str = Field(
+        default="traces.jsonl",
+        description="Output file for TRACING_EXPORTER=file"
+    )
+    TRACING_SERVICE_NAME: str = Field(
+        default="ask-my-resume",
+        description="service.name resource attribute on every span"
+    )
+    TRACING_SAMPLE_RATIO: float = Field(
+        default=1.0,
+        ge=0,
+        le=1,
+        description="Fraction of traces recorded (an incoming traceparent's decision wins)"
+    )
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -35,6 +368,116 @@ class Settings(BaseSettings):
             raise ValueError("DATABASE_URL must be a PostgreSQL connection string")
         return v
 
+    @field_validator("VECTOR_DISTANCE_METRIC")
+    @classmethod
+    def validate_distance_metric(cls, v: str) -> str:
+        """Validate that the distance metric is supported by pgvector."""
+        if v not in ("cosine", "inner_product", "l2"):
+            raise ValueError("VECTOR_DISTANCE_METRIC must be cosine, inner_product, or l2")
+        return v
+
+    @field_validator("VECTOR_INDEX_TYPE")
+    @classmethod
+    def validate_index_type(cls, v: str) -> str:
+        """Validate that the index type is supported by pgvector."""
+        if v not in ("hnsw", "ivfflat"):
+            raise ValueError("VECTOR_INDEX_TYPE must be hnsw or ivfflat")
+        return v
+
+    @field_validator("VECTOR_STORAGE")
+    @classmethod
+    def validate_vector_storage(cls, v: str) -> str:
+        """Validate that the vector storage is supported by pgvector."""
+        if v not in ("full", "halfvec", "binary"):
+            raise ValueError("VECTOR_STORAGE must be full, halfvec, or binary")
+        return v
+
+    @field_validator("VECTOR_ITERATIVE_SCAN")
+    @classmethod
+    def validate_vector_iterative_scan(cls, v: str) -> str:
+        """Validate the pgvector iterative scan mode."""
+        if v not in ("off", "relaxed_order", "strict_order"):
+            raise ValueError("VECTOR_ITERATIVE_SCAN must be off, relaxed_order, or strict_order")
+        return v
+
+    @field_validator("RETRIEVAL_MODE")
+    @classmethod
+    def validate_retrieval_mode(cls, v: str) -> str:
+        """Validate that the retrieval mode is supported."""
+        if v not in ("vector", "hybrid"):
+            raise ValueError("RETRIEVAL_MODE must be vector or hybrid")
+        return v
+
+    @field_validator("RETRIEVAL_BACKEND")
+    @classmethod
+    def validate_retrieval_backend(cls, v: str) -> str:
+        """Validate that the retrieval backend is supported."""
+        if v not in ("postgres", "memory"):
+            raise ValueError("RETRIEVAL_BACKEND must be postgres or memory")
+        return v
+
+    @field_validator("RETRIEVAL_FETCH")
+    @classmethod
+    def validate_retrieval_fetch(cls, v: str) -> str:
+        """Validate that the content fetch strategy is supported."""
+        if v not in ("join", "two_step"):
+            raise ValueError("RETRIEVAL_FETCH must be join or two_step")
+        return v
+
+    @field_validator("LLM_PROVIDER")
+    @classmethod
+    def validate_llm_provider(cls, v: str) -> str:
+        """Validate that the provider is supported."""
+        if v not in ("openai", "fake", "local"):
+            raise ValueError("LLM_PROVIDER must be openai, fake, or local")
+        return v
+
+    @field_validator("TRACING_EXPORTER")
+    @classmethod
+    def validate_tracing_exporter(cls, v: str) -> str:
+        """Validate that the span exporter is supported."""
+        if v not in ("otlp", "console", "file"):
+            raise ValueError("TRACING_EXPORTER must be otlp, console, or file")
+        return v
+
+    @model_validator(mode="after")
+    def require_openai_api_key(self) -> "Settings":
+        """The OpenAI provider needs an API key; fake and local don't."""
+        if self.LLM_PROVIDER == "openai" and not self.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY is required when LLM_PROVIDER=openai")
+        return self
+
+    @model_validator(mode="after")
+    def validate_coarse_dimensions(self) -> "Settings":
+        """A coarse prefix can't be longer than the embeddings it's cut from."""
+        if self.VECTOR_COARSE_DIMENSIONS and self.VECTOR_COARSE_DIMENSIONS > self.EMBEDDING_DIMENSIONS:
+            raise ValueError("VECTOR_COARSE_DIMENSIONS must not exceed EMBEDDING_DIMENSIONS")
+        return self
+
+    @field_validator("RERANKER")
+    @classmethod
+    def validate_reranker(cls, v: str) -> str:
+        """Validate that the reranker is supported."""
+        if v not in ("none", "heuristic", "cross_encoder"):
+            raise ValueError("RERANKER must be none, heuristic, or cross_encoder")
+        return v
+
+    @field_validator("EMBEDDING_CACHE_BACKEND")
+    @classmethod
+    def validate_embedding_cache_backend(cls, v: str) -> str:
+        """Validate the shared embedding cache tier."""
+        if v not in ("none", "sqlite", "postgres"):
+            raise ValueError("EMBEDDING_CACHE_BACKEND must be none, sqlite, or postgres")
+        return v
+
+    @field_validator("QUERY_LOG_DROP_POLICY")
+    @classmethod
+    def validate_query_log_drop_policy(cls, v: str) -> str:
+        """Validate the query log back-pressure policy."""
+        if v not in ("drop_newest", "drop_oldest"):
+            raise ValueError("QUERY_LOG_DROP_POLICY must be drop_newest or drop_oldest")
+        return v
+
     def get_sqlalchemy_url(self) -> str:
         """Get the database URL for SQLAlchemy.
 
@@ -42,6 +485,13 @@ class Settings(BaseSettings):
         """
         return self.DATABASE_URL.replace("postgres://", "postgresql://")
 
+    def get_async_sqlalchemy_url(self) -> str:
+        """Get the database URL for the async SQLAlchemy engine.
+
+        Uses the asyncpg driver so queries don't block the event loop.
+        """
+        return self.get_sqlalchemy_url().replace("postgresql://", "postgresql+asyncpg://", 1)
+
 
 # Singleton instance
 settings = Settings()
@@ -1,14 +1,23 @@
 """Database package for RAG Resume Assistant."""
 
 from src.database.base import Base
-from src.database.models import DocumentChunk, ChunkEmbedding, QueryLog
-from src.database.session import get_session, SessionLocal
+from src.database.models import DocumentChunk, ChunkEmbedding, EmbeddingModel, QueryLog, QueryEmbeddingCache
+from src.database.session import (
+    get_session,
+    get_async_session,
+    SessionLocal,
+    AsyncSessionLocal,
+)
 
 __all__ = [
     "Base",
     "DocumentChunk",
     "ChunkEmbedding",
+    "EmbeddingModel",
     "QueryLog",
+    "QueryEmbeddingCache",
     "get_session",
     "SessionLocal",
+    "get_async_session",
+    "AsyncSessionLocal",
 ]
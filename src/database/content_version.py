@@ -0,0 +1,76 @@
+"""Content version: a fingerprint of the ingested corpus for cache invalidation.
+
+Anything derived from the corpus (cached answers, in-process indexes) is keyed by
+this version, so re-running scripts/ingest_content.py invalidates it automatically.
+The fingerprint is computed from cheap aggregates over document_chunks and
+chunk_embeddings, plus the embedding model registry (promoting a model changes
+which embeddings answers were retrieved with), and memoized for
+CONTENT_VERSION_TTL_SECONDS.
+"""
+
+import hashlib
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import settings
+
+
+CONTENT_VERSION_SQL = text("""
+    SELECT
+        (SELECT count(*) FROM document_chunks),
+        (SELECT coalesce(max(chunk_id), 0) FROM document_chunks),
+        (SELECT coalesce(max(updated_at)::text, '') FROM document_chunks),
+        (SELECT count(*) FROM chunk_embeddings),
+        (SELECT coalesce(max(embedding_id), 0) FROM chunk_embeddings),
+        (SELECT coalesce(string_agg(name || ':' || status, ',' ORDER BY name), '') FROM embedding_models)
+""")
+
+# (version, fetched_at)
+_cached_version: Optional[Tuple[str, float]] = None
+
+
+def _fingerprint(row) -> str:
+    return hashlib.sha256("|".join(str(value) for value in row).encode("utf-8")).hexdigest()[:16]
+
+
+def _fresh() -> Optional[str]:
+    if _cached_version is None:
+        return None
+    version, fetched_at = _cached_version
+    if time.monotonic() - fetched_at > settings.CONTENT_VERSION_TTL_SECONDS:
+        return None
+    return version
+
+
+def _remember(version: str) -> str:
+    global _cached_version
+    _cached_version = (version, time.monotonic())
+    return version
+
+
+def get_content_version(session: Session) -> str:
+    """Get the current content version (memoized for a short TTL)."""
+    version = _fresh()
+    if version is not None:
+        return version
+    row = session.execute(CONTENT_VERSION_SQL).one()
+    return _remember(_fingerprint(row))
+
+
+async def aget_content_version(session: AsyncSession) -> str:
+    """Async variant of get_content_version for the API request path."""
+    version = _fresh()
+    if version is not None:
+        return version
+    row = (await session.execute(CONTENT_VERSION_SQL)).one()
+    return _remember(_fingerprint(row))
+
+
+def reset_content_version() -> None:
+    """Forget the memoized version so the next call re-reads the database."""
+    global _cached_version
+    _cached_version = None
@@ -0,0 +1,154 @@
+"""Embedding model registry: which model serves queries and which are shadowed.
+
+The embedding_models table lists every model with chunk embeddings. The
+active one serves retrieval, shadow models get a sampled fraction of live
+queries in the background (src/retrieval/shadow.py) and retired ones are
+ignored. Migrating to a new model is therefore:
+
+1. register it as shadow (its partial ANN index is built concurrently)
+2. backfill its embeddings: python scripts/ingest_content.py --backfill-model NAME
+3. watch overlap and latency on /models and /metrics
+4. promote it; the old model becomes a shadow, ready for rollback
+
+All from scripts/manage_embedding_models.py, with no restart: API workers
+re-read the registry every EMBEDDING_REGISTRY_TTL_SECONDS. While the registry
+is empty, EMBEDDING_MODEL serves alone.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.database.models import EmbeddingModel
+
+
+MODEL_STATUSES = ("active", "shadow", "retired")
+
+_MODELS_SQL = text("SELECT name, dimensions, metric, status FROM embedding_models ORDER BY name")
+
+# (models, fetched_at)
+_cached_models: Optional[Tuple[List[Dict[str, Any]], float]] = None
+
+
+def _fresh() -> Optional[List[Dict[str, Any]]]:
+    if _cached_models is None:
+        return None
+    models, fetched_at = _cached_models
+    if time.monotonic() - fetched_at > settings.EMBEDDING_REGISTRY_TTL_SECONDS:
+        return None
+    return models
+
+
+def _remember(rows) -> List[Dict[str, Any]]:
+    global _cached_models
+    models = [dict(row._mapping) for row in rows]
+    _cached_models = (models, time.monotonic())
+    return models
+
+
+def get_models(session: Session) -> List[Dict[str, Any]]:
+    """Registered models as dicts of name, dimensions, metric and status (memoized for a short TTL)."""
+    models = _fresh()
+    if models is not None:
+        return models
+    return _remember(session.execute(_MODELS_SQL).all())
+
+
+async def aget_models(session: AsyncSession) -> List[Dict[str, Any]]:
+    """Async variant of get_models for the API request path."""
+    models = _fresh()
+    if models is not None:
+        return models
+    return _remember((await session.execute(_MODELS_SQL)).all())
+
+
+def reset_models() -> None:
+    """Forget the memoized registry so the next call re-reads the database."""
+    global _cached_models
+    _cached_models = None
+
+
+def active_model(models: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """(name, metric) of the model serving queries; EMBEDDING_MODEL if none is active."""
+    for model in models:
+        if model["status"] == "active":
+            return model["name"], model["metric"]
+    return settings.EMBEDDING_MODEL, settings.VECTOR_DISTANCE_METRIC
+
+
+def shadow_models(models: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Models receiving sampled shadow queries."""
+    return [model for model in models if model["status"] == "shadow"]
+
+
+def register_model(
+    session: Session,
+    name: str,
+    dimensions: int,
+    metric: str = "cosine",
+    status: str = "shadow"
+) -> EmbeddingModel:
+    """Add a model to the registry (the caller commits).
+
+    chunk_embeddings.embedding is a vector(EMBEDDING_DIMENSIONS) column, so a
+    model has to produce vectors of that width to be stored alongside the
+    others.
+
+    Raises:
+        ValueError: On an unknown status or metric, a dimension mismatch, or a
+            name that is already registered
+    """
+    if status not in MODEL_STATUSES:
+        raise ValueError(f"Unknown model status: {status}")
+    if metric not in ("cosine", "inner_product", "l2"):
+        raise ValueError(f"Unknown distance metric: {metric}")
+    if dimensions != settings.EMBEDDING_DIMENSIONS:
+        raise ValueError(
+            f"{name} has {dimensions} dimensions but chunk_embeddings stores {settings.EMBEDDING_DIMENSIONS}"
+        )
+    if session.get(EmbeddingModel, name) is not None:
+        raise ValueError(f"{name} is already registered")
+    if status == "active":
+        _demote_active(session)
+    model = EmbeddingModel(name=name, dimensions=dimensions, metric=metric, status=status)
+    session.add(model)
+    session.flush()
+    return model
+
+
+def set_model_status(session: Session, name: str, status: str) -> EmbeddingModel:
+    """Change a model's status (the caller commits).
+
+    Promoting a model to active demotes the current active model to shadow,
+    so it keeps being compared against (and can be promoted back).
+
+    Raises:
+        ValueError: On an unknown status or model
+    """
+    if status not in MODEL_STATUSES:
+        raise ValueError(f"Unknown model status: {status}")
+    model = session.get(EmbeddingModel, name)
+    if model is None:
+        raise ValueError(f"{name} is not registered")
+    if status == "active" and model.status != "active":
+        _demote_active(session)
+    model.status = status
+    session.flush()
+    return model
+
+
+def _demote_active(session: Session) -> None:
+    session.execute(
+        update(EmbeddingModel).where(EmbeddingModel.status == "active").values(status="shadow")
+    )
+    # The partial unique index on status would reject a second active row
+    session.flush()
+
+
+def list_models(session: Session) -> List[EmbeddingModel]:
+    """All registered models, straight from the database."""
+    return list(session.execute(select(EmbeddingModel).order_by(EmbeddingModel.name)).scalars())
@@ -11,9 +11,13 @@ from sqlalchemy import (
     UniqueConstraint,
     Index,
     ARRAY,
+    CheckConstraint,
+    Computed,
+    Float,
+    LargeBinary,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from pgvector.sqlalchemy import Vector
 
 from src.database.base import Base
@@ -29,11 +33,18 @@ class DocumentChunk(Base):
 
     chunk_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    # SHA-256 of content; lets re-ingestion skip unchanged chunks and reuse their embeddings
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
     source_file: Mapped[str] = mapped_column(String(512), nullable=False, index=True)
     category: Mapped[Optional[str]] = mapped_column(String(128), nullable=True, index=True)
     document_title: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     metadata_json: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    # Full-text search vector for hybrid retrieval, maintained by Postgres
+    content_tsv: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('english', content)", persisted=True)
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
@@ -53,6 +64,10 @@ class DocumentChunk(Base):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("idx_chunks_content_tsv", "content_tsv", postgresql_using="gin"),
+    )
+
     def __repr__(self) -> str:
         return f"<DocumentChunk(id={self.chunk_id}, source='{self.source_file}', index={self.chunk_index})>"
 
@@ -74,6 +89,10 @@ class ChunkEmbedding(Base):
     )
     embedding: Mapped[Vector] = mapped_column(Vector(1536), nullable=False)
     embedding_model: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
+    # Copies of the chunk's category and source_file so filtered vector search doesn't
+    # join document_chunks; kept in sync by database triggers, never written directly
+    category: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    source_file: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
@@ -89,12 +108,51 @@ class ChunkEmbedding(Base):
     __table_args__ = (
         UniqueConstraint("chunk_id", "embedding_model", name="uq_chunk_embedding_model"),
         Index("idx_embedding_model", "embedding_model"),
+        Index("idx_chunk_embeddings_model_category", "embedding_model", "category"),
+        Index("idx_chunk_embeddings_model_source", "embedding_model", "source_file"),
     )
 
     def __repr__(self) -> str:
         return f"<ChunkEmbedding(id={self.embedding_id}, chunk_id={self.chunk_id}, model='{self.embedding_model}')>"
 
 
+class EmbeddingModel(Base):
+    """Registry of embedding models that have (or are getting) chunk embeddings.
+
+    Exactly one model is active and serves queries. Shadow models are
+    backfilled and receive a sample of live queries for comparison; retired
+    models are kept for the record (and rollback) but never queried. Each
+    active or shadow model has its own partial ANN index on chunk_embeddings.
+    """
+    __tablename__ = "embedding_models"
+
+    name: Mapped[str] = mapped_column(String(128), primary_key=True)
+    dimensions: Mapped[int] = mapped_column(Integer, nullable=False)
+    metric: Mapped[str] = mapped_column(String(32), nullable=False, default="cosine")
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="shadow")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        CheckConstraint("status IN ('active', 'shadow', 'retired')", name="ck_embedding_models_status"),
+        CheckConstraint("metric IN ('cosine', 'inner_product', 'l2')", name="ck_embedding_models_metric"),
+        # At most one active model
+        Index("uq_embedding_models_active", "status", unique=True, postgresql_where="status = 'active'"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<EmbeddingModel(name='{self.name}', status='{self.status}')>"
+
+
 class QueryLog(Base):
     """Logs user queries and retrieval results for observability.
 
@@ -110,6 +168,14 @@ class QueryLog(Base):
     query_text: Mapped[str] = mapped_column(Text, nullable=False)
     retrieved_chunk_ids: Mapped[Optional[List[int]]] = mapped_column(ARRAY(Integer), nullable=True)
     response_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Latency breakdown (milliseconds)
+    embed_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    search_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rerank_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    generate_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    total_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Prompt tokens spent on retrieved context
+    context_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
@@ -119,3 +185,25 @@ class QueryLog(Base):
 
     def __repr__(self) -> str:
         return f"<QueryLog(id={self.query_id}, query='{self.query_text[:50]}...', created_at={self.created_at})>"
+
+
+class QueryEmbeddingCache(Base):
+    """Shared tier of the query-embedding cache.
+
+    Keyed by "<embedding_model>:<sha256 of normalized query>" so every API
+    worker reuses embeddings computed by the others, across restarts.
+    Embeddings are stored as raw float32 bytes.
+    """
+    __tablename__ = "query_embedding_cache"
+
+    cache_key: Mapped[str] = mapped_column(String(256), primary_key=True)
+    embedding_model: Mapped[str] = mapped_column(String(128), nullable=False)
+    embedding: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    def __repr__(self) -> str:
+        return f"<QueryEmbeddingCache(key='{self.cache_key}')>"
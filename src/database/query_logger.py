@@ -0,0 +1,164 @@
+"""Asynchronous, batched QueryLog writer.
+
+Logging used to add an INSERT + COMMIT round trip to every /query response. Now
+the request path only does a non-blocking put onto a bounded in-memory queue; a
+background task drains it and writes rows in multi-row INSERT batches when
+either QUERY_LOG_BATCH_SIZE records are waiting or QUERY_LOG_FLUSH_INTERVAL_SECONDS
+has passed. If the database falls behind and the queue fills, records are
+dropped (and counted) rather than slowing requests down.
+
+Usage:
+    writer = get_query_log_writer()
+    await writer.start()            # FastAPI startup
+    writer.log({"query_text": ...}) # request path, never blocks
+    await writer.stop()             # FastAPI shutdown, flushes what's left
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from src.config import settings
+from src.database.models import QueryLog
+from src.database.session import AsyncSessionLocal
+from src.observability import observe_stage, span
+
+
+# Sentinel telling the background task to finish
+_STOP: Dict[str, Any] = {}
+
+
+class QueryLogWriter:
+    """Bounded queue + background batch writer for QueryLog rows."""
+
+    def __init__(
+        self,
+        max_queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        drop_policy: str = "drop_newest"
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def log(self, record: Dict[str, Any]) -> bool:
+        """Queue a QueryLog record without blocking.
+
+        Args:
+            record: QueryLog column values
+
+        Returns:
+            True if queued, False if dropped because the queue is full
+        """
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            if self.drop_policy != "drop_oldest":
+                self.dropped += 1
+                return False
+            # Make room by discarding the oldest pending record
+            self._queue.get_nowait()
+            self.dropped += 1
+            self._queue.put_nowait(record)
+        self.enqueued += 1
+        return True
+
+    async def start(self) -> None:
+        """Start the background flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and flush everything still queued."""
+        if self._task is not None:
+            # Let the task finish its current batch instead of cancelling it mid-write
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                record = self._queue.get_nowait()
+                if record is not _STOP:
+                    batch.append(record)
+            await self._flush(batch)
+
+    async def _run(self) -> None:
+        """Flush on whichever comes first: a full batch or the flush interval."""
+        stopping = False
+        while not stopping:
+            record = await self._queue.get()
+            if record is _STOP:
+                break
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """Write a batch in one multi-row INSERT; failures are counted, not raised."""
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            # Runs in the background task, so each flush is its own trace
+            with span("query_log.write", {"query_log.records": len(batch)}):
+                async with AsyncSessionLocal() as session:
+                    await session.execute(insert(QueryLog), batch)
+                    await session.commit()
+            self.written += len(batch)
+            self.flushes += 1
+            observe_stage("log_write", time.perf_counter() - start)
+        except Exception as e:
+            # Don't take the app down if logging fails
+            self.failed += len(batch)
+            print(f"Warning: Failed to write {len(batch)} query log(s): {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and write/drop counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+
+_writer: Optional[QueryLogWriter] = None
+
+
+def get_query_log_writer() -> QueryLogWriter:
+    """Get the process-wide query log writer configured from settings."""
+    global _writer
+    if _writer is None:
+        _writer = QueryLogWriter(
+            max_queue_size=settings.QUERY_LOG_QUEUE_SIZE,
+            batch_size=settings.QUERY_LOG_BATCH_SIZE,
+            flush_interval=settings.QUERY_LOG_FLUSH_INTERVAL_SECONDS,
+            drop_policy=settings.QUERY_LOG_DROP_POLICY
+        )
+    return _writer
@@ -1,10 +1,13 @@
 """Database session factory and dependency injection."""
 
-from typing import Generator
-from sqlalchemy import create_engine
+from typing import AsyncGenerator, Generator
+from pgvector.asyncpg import register_vector
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from src.config import settings
+from src.observability.tracing import instrument_engine
 
 
 # Create SQLAlchemy engine
@@ -23,6 +26,38 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Async engine (asyncpg) for the API request path
+async_engine = create_async_engine(
+    settings.get_async_sqlalchemy_url(),
+    echo=settings.ENVIRONMENT == "development",
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    connect_args={
+        # asyncpg prepares each distinct statement once per connection and reuses it
+        "prepared_statement_cache_size": settings.ASYNC_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+)
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _register_vector_codec(dbapi_connection, connection_record):
+    """Send/receive pgvector values in binary format on every asyncpg connection."""
+    dbapi_connection.run_async(register_vector)
+
+
+if settings.TRACING_ENABLED:
+    # One span per statement (text and rows), under the request's current span
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+
+# Async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 def get_session() -> Generator[Session, None, None]:
     """Dependency injection for database sessions.
@@ -49,3 +84,21 @@ def get_session() -> Generator[Session, None, None]:
         raise
     finally:
         session.close()
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency injection for async database sessions.
+
+    Usage with FastAPI:
+        @app.get("/endpoint")
+        async def endpoint(session: AsyncSession = Depends(get_async_session)):
+            # Use session here
+            pass
+    """
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
@@ -0,0 +1,13 @@
+"""Embedding module for query embeddings and the query-embedding cache."""
+
+from src.embedding.cache import EmbeddingCache, get_embedding_cache, normalize_query
+from src.embedding.query import embed_query, aembed_query, aembed_queries
+
+__all__ = [
+    "EmbeddingCache",
+    "get_embedding_cache",
+    "normalize_query",
+    "embed_query",
+    "aembed_query",
+    "aembed_queries",
+]
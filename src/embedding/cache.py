@@ -0,0 +1,242 @@
+"""Query-embedding cache: in-process LRU tier plus optional shared tier.
+
+Traffic is dominated by a few hundred repeated questions, so the embedding of a
+normalized query is cached under (embedding model, normalized text):
+
+- Memory tier: an LRU bounded by bytes, holding float32 arrays
+- Shared tier (optional): a local SQLite file or a Postgres table, so the cache
+  survives restarts and is shared by every worker process
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.config import settings
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share a cache key.
+
+    Applies Unicode NFKC, case folding, whitespace collapsing and strips
+    trailing punctuation ("What did he do at Meta?" == "what did he do at meta").
+    """
+    normalized = unicodedata.normalize("NFKC", query).casefold()
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return normalized.rstrip("?!. ")
+
+
+def cache_key(embedding_model: str, normalized_query: str) -> str:
+    """Stable key for the shared tier (hash keeps row size small)."""
+    digest = hashlib.sha256(normalized_query.encode("utf-8")).hexdigest()
+    return f"{embedding_model}:{digest}"
+
+
+def _from_bytes(data: bytes) -> array:
+    vector = array("f")
+    vector.frombytes(data)
+    return vector
+
+
+class SQLiteEmbeddingStore:
+    """Shared tier backed by a local SQLite file (shared by workers on one host).
+
+    Each thread keeps one open connection; sqlite3 connections can't be shared
+    across threads.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        # WAL lets several worker processes read while one writes (persisted in the file)
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS query_embedding_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    embedding BLOB NOT NULL
+                )
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5)
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT embedding FROM query_embedding_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, data: bytes) -> None:
+        conn = self._connection()
+        with conn:  # Commits, or rolls back on error
+            conn.execute(
+                "INSERT OR REPLACE INTO query_embedding_cache (cache_key, embedding) VALUES (?, ?)",
+                (key, data)
+            )
+
+
+class PostgresEmbeddingStore:
+    """Shared tier backed by the query_embedding_cache table."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        from src.database import SessionLocal
+        from src.database.models import QueryEmbeddingCache
+
+        with SessionLocal() as session:
+            row = session.get(QueryEmbeddingCache, key)
+            return bytes(row.embedding) if row else None
+
+    def put(self, key: str, data: bytes) -> None:
+        from sqlalchemy.dialects.postgresql import insert
+        from src.database import SessionLocal
+        from src.database.models import QueryEmbeddingCache
+
+        embedding_model = key.rsplit(":", 1)[0]
+        stmt = insert(QueryEmbeddingCache).values(
+            cache_key=key, embedding_model=embedding_model, embedding=data
+        ).on_conflict_do_nothing(index_elements=["cache_key"])
+        with SessionLocal() as session:
+            session.execute(stmt)
+            session.commit()
+
+
+class EmbeddingCache:
+    """Thread-safe LRU of query embeddings with an optional shared tier."""
+
+    def __init__(self, max_bytes: int, shared_store=None):
+        self.max_bytes = max_bytes
+        self.shared_store = shared_store
+        self._entries: "OrderedDict[Tuple[str, str], array]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._miss_seconds = 0.0
+
+    def get(self, embedding_model: str, normalized_query: str) -> Optional[List[float]]:
+        """Look up an embedding in memory, then in the shared tier."""
+        key = (embedding_model, normalized_query)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+
+        if self.shared_store is not None:
+            try:
+                data = self.shared_store.get(cache_key(embedding_model, normalized_query))
+            except Exception as e:
+                # The shared tier is an optimization; never fail a query over it
+                print(f"Warning: Embedding cache shared tier read failed: {e}")
+                data = None
+            if data is not None:
+                vector = _from_bytes(data)
+                with self._lock:
+                    self.shared_hits += 1
+                    self._store(key, vector)
+                return vector.tolist()
+
+        return None
+
+    def put(
+        self,
+        embedding_model: str,
+        normalized_query: str,
+        embedding: List[float],
+        elapsed_seconds: float = 0.0
+    ) -> None:
+        """Store a freshly computed embedding (a miss) in both tiers."""
+        vector = array("f", embedding)
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += elapsed_seconds
+            self._store((embedding_model, normalized_query), vector)
+
+        if self.shared_store is not None:
+            try:
+                self.shared_store.put(cache_key(embedding_model, normalized_query), vector.tobytes())
+            except Exception as e:
+                print(f"Warning: Embedding cache shared tier write failed: {e}")
+
+    def _store(self, key: Tuple[str, str], vector: array) -> None:
+        """Insert into the LRU and evict until under the byte budget (lock held)."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = vector
+        self._bytes += self._entry_size(key, vector)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old_vector = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(old_key, old_vector)
+            self.evictions += 1
+
+    @staticmethod
+    def _entry_size(key: Tuple[str, str], vector: array) -> int:
+        return vector.itemsize * len(vector) + len(key[0]) + len(key[1])
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and the embedding latency they saved."""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            avg_miss_ms = (self._miss_seconds / self.misses * 1000) if self.misses else 0.0
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": ((self.hits + self.shared_hits) / lookups) if lookups else 0.0,
+                "avg_miss_latency_ms": avg_miss_ms,
+                "estimated_latency_saved_ms": (self.hits + self.shared_hits) * avg_miss_ms,
+            }
+
+    def clear(self) -> None:
+        """Drop the memory tier and reset counters (the shared tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.shared_hits = self.misses = self.evictions = 0
+            self._miss_seconds = 0.0
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide embedding cache configured from settings."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        backend = settings.EMBEDDING_CACHE_BACKEND
+        if backend == "sqlite":
+            shared_store = SQLiteEmbeddingStore(settings.EMBEDDING_CACHE_PATH)
+        elif backend == "postgres":
+            shared_store = PostgresEmbeddingStore()
+        else:
+            shared_store = None
+        _embedding_cache = EmbeddingCache(
+            max_bytes=int(settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024),
+            shared_store=shared_store
+        )
+    return _embedding_cache
+
@@ -0,0 +1,292 @@
+"""Pipelined, rate-limited bulk embedding for ingestion.
+
+Embedding a corpus one small batch at a time, with a fixed sleep between
+batches, leaves both the API's rate limit and the network mostly idle. The
+pipeline instead:
+
+1. packs texts (across files) into batches bounded by a token budget,
+2. sends up to `concurrency` batches at once, each admitted by a token-bucket
+   limiter over requests and tokens per minute that is corrected from the
+   API's x-ratelimit-* response headers,
+3. hands finished batches to a single writer stage, so results are written
+   while later batches are still being embedded.
+
+Usage:
+    pipeline = EmbeddingPipeline(model="text-embedding-3-small", concurrency=4)
+
+    async def write(keys, vectors):
+        ...
+
+    stats = await pipeline.run({"hash1": "text", ...}, write)
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, RateLimitError
+
+from src.providers import OpenAIProvider, Provider, get_provider
+from src.tokenizer import count_tokens
+
+
+# OpenAI accepts up to 2048 inputs per embeddings request
+MAX_INPUTS_PER_REQUEST = 2048
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse an x-ratelimit-reset-* value such as "1s", "6m0s" or "20ms" into seconds."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in parts)
+
+
+def pack_batches(
+    token_counts: Mapping[Hashable, int],
+    max_batch_tokens: int,
+    max_batch_size: int = MAX_INPUTS_PER_REQUEST
+) -> List[List[Hashable]]:
+    """Greedily pack keys into batches under a token budget and input count.
+
+    Keys keep their input order; a single text over the budget gets a batch to itself.
+    """
+    batches: List[List[Hashable]] = []
+    current: List[Hashable] = []
+    current_tokens = 0
+    for key, tokens in token_counts.items():
+        if current and (current_tokens + tokens > max_batch_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(key)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class RateLimiter:
+    """Async token bucket over requests and tokens per period (a minute for OpenAI).
+
+    Both buckets refill continuously at limit/period per second. After each response
+    update_from_headers() adopts the server's limits and clamps the local buckets
+    to the server's remaining counts, so several processes sharing one API key
+    still converge on the real budget.
+    """
+
+    def __init__(self, request_limit: float, token_limit: float, period: float = 60.0):
+        self.request_limit = request_limit
+        self.token_limit = token_limit
+        self.period = period
+        self._requests = float(request_limit)
+        self._tokens = float(token_limit)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.request_limit, self._requests + elapsed * self.request_limit / self.period)
+        self._tokens = min(self.token_limit, self._tokens + elapsed * self.token_limit / self.period)
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request and `tokens` tokens are available, then take them."""
+        # Never wait for more than a full bucket
+        tokens = min(tokens, self.token_limit)
+        async with self._lock:  # Admit callers in arrival order
+            while True:
+                self._refill()
+                wait = self._blocked_until - time.monotonic()
+                if wait <= 0:
+                    if self._requests >= 1 and self._tokens >= tokens:
+                        self._requests -= 1
+                        self._tokens -= tokens
+                        return
+                    wait = max(
+                        (1 - self._requests) * self.period / self.request_limit,
+                        (tokens - self._tokens) * self.period / self.token_limit
+                    )
+                self.waits += 1
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Admit nothing for `seconds` (after a 429)."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adopt limits and remaining budget from x-ratelimit-* response headers."""
+        def number(name: str) -> Optional[float]:
+            try:
+                return float(headers[name])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        self._refill()
+        limit_requests = number("x-ratelimit-limit-requests")
+        limit_tokens = number("x-ratelimit-limit-tokens")
+        if limit_requests:
+            self.request_limit = limit_requests
+        if limit_tokens:
+            self.token_limit = limit_tokens
+
+        remaining_requests = number("x-ratelimit-remaining-requests")
+        remaining_tokens = number("x-ratelimit-remaining-tokens")
+        if remaining_requests is not None:
+            self._requests = min(self._requests, remaining_requests)
+        if remaining_tokens is not None:
+            self._tokens = min(self._tokens, remaining_tokens)
+
+        # Out of requests or tokens: hold off until the server says the window resets
+        if remaining_requests == 0:
+            self.pause(parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or 0)
+        if remaining_tokens == 0:
+            self.pause(parse_reset_duration(headers.get("x-ratelimit-reset-tokens")) or 0)
+
+
+class EmbeddingPipeline:
+    """Concurrent embedding requests feeding a single writer stage."""
+
+    def __init__(
+        self,
+        model: str,
+        client: Optional[AsyncOpenAI] = None,
+        concurrency: int = 4,
+        max_batch_tokens: int = 16_000,
+        max_batch_size: int = MAX_INPUTS_PER_REQUEST,
+        limiter: Optional[RateLimiter] = None,
+        max_attempts: int = 5,
+        provider: Optional[Provider] = None,
+        retry_backoff: float = 1.0
+    ):
+        self.model = model
+        self.client = client
+        self.provider = provider
+        self.concurrency = concurrency
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        # Conservative defaults until the first response reports the real limits
+        self.limiter = limiter or RateLimiter(request_limit=500, token_limit=1_000_000)
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+    async def _embed(self, texts: List[str], tokens: int) -> List[List[float]]:
+        """One embeddings request through the limiter, retrying rate-limit and transient errors.
+
+        429s pause the shared limiter (every worker is over the limit). Connection
+        errors, timeouts and 5xx responses back off this request only, doubling
+        from retry_backoff seconds.
+        """
+        client = self.client
+        if client is None:
+            provider = self.provider or get_provider()
+            if not isinstance(provider, OpenAIProvider):
+                # No rate-limit headers to read; the limiter still paces requests
+                await self.limiter.acquire(tokens)
+                return await provider.aembed(texts, self.model)
+            client = provider.async_client
+        # Retries happen here; SDK retries would hide 429s from the limiter
+        client = client.with_options(max_retries=0)
+        for attempt in range(1, self.max_attempts + 1):
+            await self.limiter.acquire(tokens)
+            try:
+                raw = await client.embeddings.with_raw_response.create(model=self.model, input=texts)
+            except RateLimitError as e:
+                if attempt == self.max_attempts:
+                    raise
+                retry_after = parse_reset_duration(e.response.headers.get("retry-after")) or 2.0 ** attempt
+                self.limiter.update_from_headers(e.response.headers)
+                self.limiter.pause(retry_after)
+                continue
+            except (APIConnectionError, APIStatusError) as e:
+                # APITimeoutError is an APIConnectionError; 4xx other than 429 won't succeed on retry
+                transient = isinstance(e, APIConnectionError) or e.status_code >= 500
+                if not transient or attempt == self.max_attempts:
+                    raise
+                await asyncio.sleep(self.retry_backoff * 2.0 ** (attempt - 1))
+                continue
+            self.limiter.update_from_headers(raw.headers)
+            return [item.embedding for item in raw.parse().data]
+        raise RuntimeError("unreachable")
+
+    async def run(
+        self,
+        texts: Mapping[Hashable, str],
+        writer: Callable[[List[Hashable], List[List[float]]], Awaitable[None]]
+    ) -> Dict[str, Any]:
+        """Embed every text and pass each finished batch to `writer`.
+
+        Args:
+            texts: Key (e.g. content hash) -> text to embed
+            writer: Awaited with (keys, vectors) for each batch, one batch at a time
+
+        Returns:
+            Stats: batches, texts, tokens, seconds and rate-limiter waits
+        """
+        start = time.perf_counter()
+        token_counts = {key: count_tokens(text, self.model) for key, text in texts.items()}
+        batches = pack_batches(token_counts, self.max_batch_tokens, self.max_batch_size)
+
+        pending: "asyncio.Queue[List[Hashable]]" = asyncio.Queue()
+        for batch in batches:
+            pending.put_nowait(batch)
+        # Bounded so embedding can't run arbitrarily far ahead of a slow writer
+        results: "asyncio.Queue[Optional[Tuple[List[Hashable], List[List[float]]]]]" = asyncio.Queue(
+            maxsize=self.concurrency * 2
+        )
+
+        async def embed_worker() -> None:
+            while not pending.empty():
+                keys = pending.get_nowait()
+                vectors = await self._embed(
+                    [texts[key] for key in keys],
+                    sum(token_counts[key] for key in keys)
+                )
+                await results.put((keys, vectors))
+
+        async def write_worker() -> None:
+            while (item := await results.get()) is not None:
+                await writer(*item)
+
+        async def embed_all() -> None:
+            workers = [asyncio.create_task(embed_worker()) for _ in range(min(self.concurrency, len(batches)))]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+            await results.put(None)
+
+        tasks = [asyncio.create_task(embed_all()), asyncio.create_task(write_worker())]
+        try:
+            # Fail fast if either stage fails (e.g. a writer error must not leave embedders blocked)
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return {
+            "batches": len(batches),
+            "texts": len(token_counts),
+            "tokens": sum(token_counts.values()),
+            "seconds": time.perf_counter() - start,
+            "rate_limit_waits": self.limiter.waits,
+            "rate_limit_wait_seconds": self.limiter.waited_seconds,
+        }
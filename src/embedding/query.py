@@ -0,0 +1,124 @@
+"""Query embedding with caching."""
+
+import asyncio
+import time
+from typing import List, Optional
+
+from src.embedding.cache import get_embedding_cache, normalize_query
+from src.providers import Provider, get_provider
+
+
+def embed_query(
+    query: str,
+    embedding_model: str = "text-embedding-3-small",
+    provider: Optional[Provider] = None
+) -> List[float]:
+    """Embed a user query, serving repeats from the embedding cache.
+
+    The normalized query is only the cache key; the model embeds the query as
+    the user wrote it. A repeat that normalizes the same reuses that embedding.
+
+    Args:
+        query: User's question
+        embedding_model: Embedding model to use
+        provider: Embedding provider (defaults to the one set by LLM_PROVIDER)
+
+    Returns:
+        Embedding vector
+    """
+    provider = provider or get_provider()
+    cache = get_embedding_cache()
+    cache_key = provider.cache_key(embedding_model)
+    normalized = normalize_query(query)
+    cached = cache.get(cache_key, normalized)
+    if cached is not None:
+        return cached
+
+    start = time.perf_counter()
+    embedding = provider.embed([query], embedding_model)[0]
+    cache.put(cache_key, normalized, embedding, time.perf_counter() - start)
+    return embedding
+
+
+async def aembed_query(
+    query: str,
+    embedding_model: str = "text-embedding-3-small",
+    provider: Optional[Provider] = None
+) -> List[float]:
+    """Async variant of embed_query for the API request path.
+
+    The in-process LRU is checked inline; the shared tier (SQLite/Postgres)
+    does blocking I/O, so it is consulted from a worker thread.
+    """
+    provider = provider or get_provider()
+    cache = get_embedding_cache()
+    cache_key = provider.cache_key(embedding_model)
+    normalized = normalize_query(query)
+    if cache.shared_store is None:
+        cached = cache.get(cache_key, normalized)
+    else:
+        cached = await asyncio.to_thread(cache.get, cache_key, normalized)
+    if cached is not None:
+        return cached
+
+    start = time.perf_counter()
+    embedding = (await provider.aembed([query], embedding_model))[0]
+    elapsed = time.perf_counter() - start
+    if cache.shared_store is None:
+        cache.put(cache_key, normalized, embedding, elapsed)
+    else:
+        await asyncio.to_thread(cache.put, cache_key, normalized, embedding, elapsed)
+    return embedding
+
+
+async def aembed_queries(
+    queries: List[str],
+    embedding_model: str = "text-embedding-3-small",
+    provider: Optional[Provider] = None
+) -> List[List[float]]:
+    """Embed several queries with at most one embeddings call.
+
+    Queries are deduplicated by their normalized form (the cache key); cached
+    ones are served from the embedding cache and all the rest are sent to the
+    provider in a single request, as written (the first spelling of each).
+
+    Returns:
+        One embedding per input query, in input order
+    """
+    provider = provider or get_provider()
+    cache = get_embedding_cache()
+    cache_key = provider.cache_key(embedding_model)
+    normalized = [normalize_query(query) for query in queries]
+    # normalized key -> the first query with that key, which is what gets embedded
+    originals = {}
+    for key, query in zip(normalized, queries):
+        originals.setdefault(key, query)
+    unique = list(originals)
+
+    def lookup() -> dict:
+        found = {}
+        for text in unique:
+            cached = cache.get(cache_key, text)
+            if cached is not None:
+                found[text] = cached
+        return found
+
+    found = lookup() if cache.shared_store is None else await asyncio.to_thread(lookup)
+    missing = [text for text in unique if text not in found]
+
+    if missing:
+        start = time.perf_counter()
+        embeddings = await provider.aembed([originals[text] for text in missing], embedding_model)
+        elapsed = time.perf_counter() - start
+        found.update(zip(missing, embeddings))
+
+        def store() -> None:
+            for text, embedding in zip(missing, embeddings):
+                cache.put(cache_key, text, embedding, elapsed)
+
+        if cache.shared_store is None:
+            store()
+        else:
+            await asyncio.to_thread(store)
+
+    return [found[text] for text in normalized]
@@ -1,5 +1,14 @@
 """Generation module for LLM-based response generation."""
 
-from src.generation.llm import generate_response
+from src.generation.llm import generate_response, agenerate_response, astream_response
+from src.generation.context import build_context
+from src.generation.cache import SemanticAnswerCache, get_answer_cache
 
-__all__ = ["generate_response"]
+__all__ = [
+    "generate_response",
+    "agenerate_response",
+    "astream_response",
+    "build_context",
+    "SemanticAnswerCache",
+    "get_answer_cache",
+]
@@ -0,0 +1,147 @@
+"""Semantic answer cache for near-duplicate questions.
+
+Recruiter questions have a long tail of paraphrases ("What did he do at Meta?" /
+"What was Franklin's role at Meta?"). Answers are cached with the query embedding
+and reused when a new query's cosine similarity to a cached one is above
+ANSWER_CACHE_SIMILARITY_THRESHOLD. Entries are partitioned by (top_k, generation
+model, content version, scope), so re-ingesting content invalidates them
+automatically and answers retrieved under different category / source filters
+(the scope) are never mixed.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import settings
+
+
+class SemanticAnswerCache:
+    """Fixed-capacity ring buffer of (normalized embedding, answer) entries.
+
+    Embeddings live in one preallocated float32 matrix so a lookup is a single
+    matrix-vector product over all entries in the same partition.
+    """
+
+    def __init__(self, capacity: int, dimensions: int, threshold: float):
+        self.capacity = capacity
+        self.threshold = threshold
+        self._matrix = np.zeros((capacity, dimensions), dtype=np.float32)
+        # Partition id per slot; -1 marks an empty/invalidated slot
+        self._partitions = np.full(capacity, -1, dtype=np.int64)
+        self._values: List[Optional[Tuple[str, List[str]]]] = [None] * capacity
+        self._partition_ids: Dict[Tuple[int, str, str, str], int] = {}
+        self._content_version: Optional[str] = None
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _partition_id(self, key: Tuple[int, str, str, str], create: bool) -> Optional[int]:
+        if key not in self._partition_ids and create:
+            self._partition_ids[key] = len(self._partition_ids)
+        return self._partition_ids.get(key)
+
+    def _check_content_version(self, content_version: str) -> None:
+        """Drop every entry once the corpus changes (lock held)."""
+        if content_version != self._content_version:
+            self._partitions.fill(-1)
+            self._values = [None] * self.capacity
+            self._partition_ids.clear()
+            self._content_version = content_version
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        model: str,
+        content_version: str,
+        scope: str = ""
+    ) -> Optional[Tuple[str, List[str], float]]:
+        """Find a cached answer for a similar enough query under the same scope (filters).
+
+        Returns:
+            (answer, sources, similarity) or None on a miss
+        """
+        vector = self._normalize(query_embedding)
+        with self._lock:
+            self._check_content_version(content_version)
+            partition = self._partition_id((top_k, model, content_version, scope), create=False)
+            if partition is None:
+                self.misses += 1
+                return None
+
+            candidates = np.flatnonzero(self._partitions == partition)
+            if candidates.size == 0:
+                self.misses += 1
+                return None
+
+            similarities = self._matrix[candidates] @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            answer, sources = self._values[candidates[best]]
+            return answer, list(sources), similarity
+
+    def put(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        model: str,
+        content_version: str,
+        answer: str,
+        sources: List[str],
+        scope: str = ""
+    ) -> None:
+        """Cache an answer, overwriting the oldest slot when full."""
+        vector = self._normalize(query_embedding)
+        with self._lock:
+            self._check_content_version(content_version)
+            partition = self._partition_id((top_k, model, content_version, scope), create=True)
+            slot = self._next_slot
+            self._matrix[slot] = vector
+            self._partitions[slot] = partition
+            self._values[slot] = (answer, list(sources))
+            self._next_slot = (slot + 1) % self.capacity
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": int(np.count_nonzero(self._partitions >= 0)),
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Get the process-wide answer cache, or None when disabled."""
+    global _answer_cache
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache(
+            capacity=settings.ANSWER_CACHE_MAX_ENTRIES,
+            dimensions=settings.EMBEDDING_DIMENSIONS,
+            threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD
+        )
+    return _answer_cache
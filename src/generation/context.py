@@ -0,0 +1,152 @@
+"""Token-budgeted context assembly for the generation prompt.
+
+Retrieved chunks used to be pasted into the prompt verbatim, so top_k=20 over
+documents chunked "whole" could send tens of thousands of tokens per question.
+build_context() instead:
+
+1. drops duplicate chunks (same text, or text contained in another chunk),
+2. merges chunks that are adjacent in the same source file (consecutive
+   chunk_index) into one passage, without repeating a shared context prefix
+   or overlapping text,
+3. adds passages in relevance order while they fit CONTEXT_MAX_TOKENS, and
+   truncates the first one that doesn't at a paragraph or sentence end
+   (if at least CONTEXT_MIN_TRUNCATED_TOKENS remain).
+
+It reports what it did (tokens used, passages, merged/duplicate/dropped
+chunks) so the API can log the prompt size per request.
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from src.config import settings
+from src.tokenizer import count_tokens, truncate_to_tokens
+
+
+Chunk = Tuple[int, str, str, str, float]
+
+# Shorter shared prefixes/overlaps are likely coincidence, not repeated text
+_MIN_SHARED_CHARS = 20
+# Longest overlap between consecutive chunks worth looking for
+_MAX_OVERLAP_CHARS = 2000
+# Separator between passages in the prompt ("[n] " numbering is added per passage)
+_SEPARATOR = "\n\n"
+
+
+def _shared_prefix(a: str, b: str) -> int:
+    """Length of the common leading text of a and b, cut back to a word boundary."""
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i] == b[i]:
+        i += 1
+    if i < limit:
+        i = b.rfind(" ", 0, i) + 1
+    return i if i >= _MIN_SHARED_CHARS else 0
+
+
+def _overlap(a: str, b: str) -> int:
+    """Length of the longest suffix of a that is also a prefix of b."""
+    for size in range(min(len(a), len(b), _MAX_OVERLAP_CHARS), _MIN_SHARED_CHARS - 1, -1):
+        if a.endswith(b[:size]):
+            return size
+    return 0
+
+
+def _join(a: str, b: str) -> str:
+    """Append chunk b to the passage ending with chunk a, skipping repeated text."""
+    overlap = _overlap(a, b)
+    if overlap:
+        return a + b[overlap:]
+    return a + "\n\n" + b[_shared_prefix(a, b):]
+
+
+def _passages(
+    chunks: Sequence[Chunk],
+    chunk_indexes: Optional[Mapping[int, int]],
+    stats: Dict[str, int]
+) -> List[str]:
+    """Deduplicated, merged passages, ordered by their best chunk's rank."""
+    unique: List[Chunk] = []
+    for chunk in chunks:
+        text = chunk[1].strip()
+        if any(text in kept[1] for kept in unique):
+            continue
+        # A later, longer chunk can contain ones kept earlier
+        unique = [kept for kept in unique if kept[1].strip() not in text] + [chunk]
+    stats["duplicates"] = len(chunks) - len(unique)
+
+    if not chunk_indexes:
+        return [chunk[1].strip() for chunk in unique]
+
+    # Group runs of consecutive chunk_index per source file; a run ranks where its best chunk ranked
+    rank = {chunk[0]: i for i, chunk in enumerate(unique)}
+    by_position = sorted(
+        (chunk for chunk in unique if chunk[0] in chunk_indexes),
+        key=lambda chunk: (chunk[2], chunk_indexes[chunk[0]])
+    )
+    runs: List[List[Chunk]] = []
+    for chunk in by_position:
+        previous = runs[-1][-1] if runs else None
+        if (previous is not None and previous[2] == chunk[2]
+                and chunk_indexes[chunk[0]] == chunk_indexes[previous[0]] + 1):
+            runs[-1].append(chunk)
+        else:
+            runs.append([chunk])
+    runs += [[chunk] for chunk in unique if chunk[0] not in chunk_indexes]
+    runs.sort(key=lambda run: min(rank[chunk[0]] for chunk in run))
+
+    passages = []
+    for run in runs:
+        passage = run[0][1].strip()
+        for chunk in run[1:]:
+            passage = _join(passage, chunk[1].strip())
+        stats["merged"] += len(run) - 1
+        passages.append(passage)
+    return passages
+
+
+def build_context(
+    chunks: Sequence[Chunk],
+    model: str,
+    max_tokens: Optional[int] = None,
+    chunk_indexes: Optional[Mapping[int, int]] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> List[str]:
+    """Select the passages that go into the prompt, within a token budget.
+
+    Args:
+        chunks: Retrieved (chunk_id, content, source_file, category, distance), best first
+        model: Generation model (selects the tokenizer)
+        max_tokens: Context token budget (defaults to settings.CONTEXT_MAX_TOKENS)
+        chunk_indexes: Optional chunk_id -> chunk_index, enables merging adjacent chunks
+        stats: Optional dict filled with context_tokens, passages, merged,
+            duplicates, dropped and truncated
+
+    Returns:
+        Passages in relevance order, to be numbered in the prompt
+    """
+    budget = settings.CONTEXT_MAX_TOKENS if max_tokens is None else max_tokens
+    counts = {"context_tokens": 0, "passages": 0, "merged": 0, "duplicates": 0, "dropped": 0, "truncated": 0}
+
+    selected: List[str] = []
+    used = 0
+    for passage in _passages(chunks, chunk_indexes, counts):
+        # Account for the "[n] " label and the separator too
+        cost = count_tokens(f"[{len(selected) + 1}] {passage}{_SEPARATOR}", model)
+        if used + cost <= budget:
+            selected.append(passage)
+            used += cost
+            continue
+        remaining = budget - used - count_tokens(f"[{len(selected) + 1}] {_SEPARATOR}", model)
+        if remaining >= settings.CONTEXT_MIN_TRUNCATED_TOKENS:
+            passage = truncate_to_tokens(passage, remaining, model)
+            selected.append(passage)
+            used += count_tokens(f"[{len(selected)}] {passage}{_SEPARATOR}", model)
+            counts["truncated"] += 1
+        else:
+            counts["dropped"] += 1
+
+    counts["context_tokens"] = used
+    counts["passages"] = len(selected)
+    if stats is not None:
+        stats.update(counts)
+    return selected
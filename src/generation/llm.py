@@ -1,9 +1,10 @@
-"""LLM response generation using OpenAI."""
+"""LLM response generation through the configured provider."""
 
-from typing import List, Tuple
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Tuple
 
-from src.config import settings
+from src.generation.context import build_context
+from src.observability import span, start_span
+from src.providers import Provider, get_provider
 
 
 SYSTEM_PROMPT = """You are an AI assistant helping people learn about Franklin Dickinson's background, experience, and skills.
@@ -14,51 +15,161 @@ Answer questions based ONLY on the provided context. If the context doesn't cont
 Be conversational, direct, and helpful. Highlight specific projects, accomplishments, and technical details when relevant."""
 
 
+def _build_messages(
+    query: str,
+    retrieved_chunks: List[Tuple[int, str, str, str, float]],
+    model: str,
+    chunk_indexes: Optional[Mapping[int, int]] = None,
+    context_stats: Optional[Dict[str, int]] = None
+) -> List[Dict[str, str]]:
+    """Build the chat messages (system prompt + context + question)."""
+    # Build context from retrieved chunks, within the prompt token budget
+    stats = context_stats if context_stats is not None else {}
+    with span("context.build", {"context.chunks": len(retrieved_chunks)}) as context_span:
+        passages = build_context(retrieved_chunks, model, chunk_indexes=chunk_indexes, stats=stats)
+        context_span.set_attributes({f"context.{key}": value for key, value in stats.items()})
+    context_parts = [f"[{idx}] {passage}" for idx, passage in enumerate(passages, 1)]
+
+    context = "\n\n".join(context_parts)
+
+    # Create user message with context + query
+    user_message = f"""Context from Franklin's background:
+
+{context}
+
+---
+
+Question: {query}"""
+
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_message}
+    ]
+
+
+def _llm_attributes(provider: Provider, model: str, max_tokens: int) -> Dict[str, object]:
+    return {"gen_ai.system": provider.name, "gen_ai.request.model": model, "gen_ai.request.max_tokens": max_tokens}
+
+
+def _record_usage(llm_span, usage: Dict[str, int]) -> None:
+    """Put the provider's token counts on the LLM span."""
+    if usage:
+        llm_span.set_attributes({
+            "gen_ai.usage.input_tokens": usage.get("prompt_tokens", 0),
+            "gen_ai.usage.output_tokens": usage.get("completion_tokens", 0),
+        })
+
+
 def generate_response(
     query: str,
     retrieved_chunks: List[Tuple[int, str, str, str, float]],
     model: str = "gpt-4o-mini",
     temperature: float = 0.7,
-    max_tokens: int = 500
+    max_tokens: int = 500,
+    usage: Optional[Dict[str, int]] = None,
+    chunk_indexes: Optional[Mapping[int, int]] = None,
+    context_stats: Optional[Dict[str, int]] = None,
+    provider: Optional[Provider] = None
 ) -> str:
     """Generate response using retrieved context.
 
     Args:
         query: User's question
         retrieved_chunks: List of (chunk_id, content, source_file, category, distance)
-        model: OpenAI model to use
+        model: Chat model to use
         temperature: LLM temperature (0.0-2.0, higher = more creative)
         max_tokens: Maximum tokens in response
+        usage: Optional dict filled with prompt/completion token counts
+        chunk_indexes: Optional chunk_id -> chunk_index, lets adjacent chunks merge
+        context_stats: Optional dict filled with context token usage (see build_context)
+        provider: LLM provider (defaults to the one set by LLM_PROVIDER)
 
     Returns:
         Generated response text
     """
-    # Build context from retrieved chunks
-    context_parts = []
-    for idx, (chunk_id, content, source_file, category, distance) in enumerate(retrieved_chunks, 1):
-        context_parts.append(f"[{idx}] {content}")
+    provider = provider or get_provider()
+    messages = _build_messages(query, retrieved_chunks, model, chunk_indexes, context_stats)
+    usage = usage if usage is not None else {}
+    with span("llm.generate", _llm_attributes(provider, model, max_tokens)) as llm_span:
+        answer = provider.complete(messages, model, temperature, max_tokens, usage)
+        _record_usage(llm_span, usage)
+    return answer
 
-    context = "\n\n".join(context_parts)
 
-    # Create user message with context + query
-    user_message = f"""Context from Franklin's background:
+async def agenerate_response(
+    query: str,
+    retrieved_chunks: List[Tuple[int, str, str, str, float]],
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.7,
+    max_tokens: int = 500,
+    usage: Optional[Dict[str, int]] = None,
+    chunk_indexes: Optional[Mapping[int, int]] = None,
+    context_stats: Optional[Dict[str, int]] = None,
+    provider: Optional[Provider] = None
+) -> str:
+    """Async variant of generate_response for the API request path.
 
-{context}
+    Args:
+        query: User's question
+        retrieved_chunks: List of (chunk_id, content, source_file, category, distance)
+        model: Chat model to use
+        temperature: LLM temperature (0.0-2.0, higher = more creative)
+        max_tokens: Maximum tokens in response
+        usage: Optional dict filled with prompt/completion token counts
+        chunk_indexes: Optional chunk_id -> chunk_index, lets adjacent chunks merge
+        context_stats: Optional dict filled with context token usage (see build_context)
+        provider: LLM provider (defaults to the one set by LLM_PROVIDER)
 
----
+    Returns:
+        Generated response text
+    """
+    provider = provider or get_provider()
+    messages = _build_messages(query, retrieved_chunks, model, chunk_indexes, context_stats)
+    usage = usage if usage is not None else {}
+    with span("llm.generate", _llm_attributes(provider, model, max_tokens)) as llm_span:
+        answer = await provider.acomplete(messages, model, temperature, max_tokens, usage)
+        _record_usage(llm_span, usage)
+    return answer
 
-Question: {query}"""
 
-    # Call OpenAI chat completion
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_message}
-        ],
-        temperature=temperature,
-        max_tokens=max_tokens
-    )
-
-    return response.choices[0].message.content
+async def astream_response(
+    query: str,
+    retrieved_chunks: List[Tuple[int, str, str, str, float]],
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.7,
+    max_tokens: int = 500,
+    usage: Optional[Dict[str, int]] = None,
+    chunk_indexes: Optional[Mapping[int, int]] = None,
+    context_stats: Optional[Dict[str, int]] = None,
+    provider: Optional[Provider] = None
+) -> AsyncIterator[str]:
+    """Stream the response token by token as the LLM produces it.
+
+    Args:
+        query: User's question
+        retrieved_chunks: List of (chunk_id, content, source_file, category, distance)
+        model: Chat model to use
+        temperature: LLM temperature (0.0-2.0, higher = more creative)
+        max_tokens: Maximum tokens in response
+        usage: Optional dict filled with prompt/completion token counts once the
+            stream finishes
+        chunk_indexes: Optional chunk_id -> chunk_index, lets adjacent chunks merge
+        context_stats: Optional dict filled with context token usage (see build_context)
+        provider: LLM provider (defaults to the one set by LLM_PROVIDER)
+
+    Yields:
+        Text deltas in order
+    """
+    provider = provider or get_provider()
+    messages = _build_messages(query, retrieved_chunks, model, chunk_indexes, context_stats)
+    usage = usage if usage is not None else {}
+    llm_span = start_span("llm.stream", _llm_attributes(provider, model, max_tokens))
+    try:
+        async for token in provider.astream(messages, model, temperature, max_tokens, usage):
+            yield token
+    except Exception as e:
+        llm_span.record_exception(e)
+        raise
+    finally:
+        _record_usage(llm_span, usage)
+        llm_span.end()
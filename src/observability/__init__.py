@@ -0,0 +1,41 @@
+"""Observability: Prometheus metrics and OpenTelemetry tracing for the query pipeline."""
+
+from src.observability.metrics import (
+    MetricsMiddleware,
+    observe_stage,
+    observe_stages,
+    record_context,
+    record_error,
+    record_shadow,
+    record_tokens,
+    render_metrics,
+    server_timing,
+)
+from src.observability.tracing import (
+    TracingMiddleware,
+    configure_tracing,
+    instrument_engine,
+    shutdown_tracing,
+    span,
+    start_span,
+    tracing_enabled,
+)
+
+__all__ = [
+    "MetricsMiddleware",
+    "observe_stage",
+    "observe_stages",
+    "record_context",
+    "record_error",
+    "record_shadow",
+    "record_tokens",
+    "render_metrics",
+    "server_timing",
+    "TracingMiddleware",
+    "configure_tracing",
+    "instrument_engine",
+    "shutdown_tracing",
+    "span",
+    "start_span",
+    "tracing_enabled",
+]
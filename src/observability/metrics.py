@@ -0,0 +1,225 @@
+"""Prometheus metrics: per-stage latency histograms and service counters.
+
+Request handlers already collect a timings dict (embed_ms, search_ms,
+rerank_ms, generate_ms, total_ms) for the query log; observe_stages turns the
+same dict into histogram observations, so the hot path pays for a few
+histogram increments and nothing else. Gauges that already live elsewhere
+(cache hit counters, query log writer counters, database pool usage) are read
+by a collector only when /metrics is scraped.
+
+Usage:
+    from src.observability import observe_stages, server_timing
+
+    observe_stages(timings)                            # after a request
+    response.headers["Server-Timing"] = server_timing(timings)
+"""
+
+import time
+from typing import Iterator, Mapping, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+
+# 1ms .. 10s: embedding/search stages sit at the low end, generation at the high end
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each RAG pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "rag_request_duration_seconds",
+    "End-to-end HTTP request duration",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    "rag_requests",
+    "HTTP requests by endpoint and status code",
+    ["endpoint", "status"]
+)
+ERRORS = Counter(
+    "rag_errors",
+    "Errors raised while answering queries, by endpoint and exception type",
+    ["endpoint", "error"]
+)
+LLM_TOKENS = Counter(
+    "rag_llm_tokens",
+    "LLM tokens by model and direction (input = prompt, output = completion)",
+    ["model", "direction"]
+)
+CONTEXT_TOKENS = Histogram(
+    "rag_context_tokens",
+    "Tokens of retrieved context sent to the LLM per answer",
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000)
+)
+
+SHADOW_OVERLAP = Histogram(
+    "rag_shadow_overlap",
+    "Fraction of the active model's retrieved chunks a shadow model also retrieved",
+    ["model"],
+    buckets=(0.0, 0.2, 0.4, 0.6, 0.8, 0.9, 1.0)
+)
+SHADOW_SECONDS = Histogram(
+    "rag_shadow_duration_seconds",
+    "Shadow retrieval time by model and stage (embed, search)",
+    ["model", "stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+# Timings keys that are pipeline stages ("total_ms" is the request as a whole)
+_STAGES = ("embed", "search", "rerank", "generate")
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record one stage duration."""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def observe_stages(timings: Mapping[str, float]) -> None:
+    """Record every stage present in a request's timings dict (milliseconds)."""
+    for stage in _STAGES:
+        ms = timings.get(f"{stage}_ms")
+        if ms is not None:
+            STAGE_SECONDS.labels(stage).observe(ms / 1000)
+
+
+def record_tokens(model: str, usage: Optional[Mapping[str, int]]) -> None:
+    """Count prompt/completion tokens reported by the provider."""
+    if usage:
+        LLM_TOKENS.labels(model, "input").inc(usage.get("prompt_tokens", 0))
+        LLM_TOKENS.labels(model, "output").inc(usage.get("completion_tokens", 0))
+
+
+def record_context(context_stats: Optional[Mapping[str, int]]) -> None:
+    """Record the context size of one answer (see build_context)."""
+    if context_stats and context_stats.get("context_tokens") is not None:
+        CONTEXT_TOKENS.observe(context_stats["context_tokens"])
+
+
+def record_shadow(model: str, overlap: float, timings: Mapping[str, float]) -> None:
+    """Record one shadow retrieval's overlap with the active model and its stage latency."""
+    SHADOW_OVERLAP.labels(model).observe(overlap)
+    for stage in ("embed", "search"):
+        ms = timings.get(f"{stage}_ms")
+        if ms is not None:
+            SHADOW_SECONDS.labels(model, stage).observe(ms / 1000)
+
+
+def record_error(endpoint: str, error: BaseException) -> None:
+    """Count an error by endpoint and exception class."""
+    ERRORS.labels(endpoint, type(error).__name__).inc()
+
+
+def server_timing(timings: Mapping[str, float]) -> str:
+    """Server-Timing header value for a timings dict, e.g. "embed;dur=12.3, total;dur=840.1"."""
+    return ", ".join(
+        f"{stage};dur={timings[f'{stage}_ms']:.1f}"
+        for stage in (*_STAGES, "total")
+        if timings.get(f"{stage}_ms") is not None
+    )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Exposition-format payload and content type for /metrics."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class ServiceCollector:
+    """Reads cache, query log and connection pool counters at scrape time.
+
+    These are already tracked by their owners; reading them here instead of
+    mirroring every increment keeps the request path untouched.
+    """
+
+    def describe(self) -> Iterator:
+        # Nothing to describe up front: collect() imports modules that import this one
+        return iter(())
+
+    def collect(self) -> Iterator:
+        # Imported lazily: these modules import this one (or each other) at load time
+        from src.database.query_logger import get_query_log_writer
+        from src.database.session import async_engine, engine
+        from src.embedding import get_embedding_cache
+        from src.config import settings
+        from src.generation import get_answer_cache
+        from src.retrieval.chunk_cache import get_chunk_cache
+
+        cache_hits = CounterMetricFamily("rag_cache_hits", "Cache hits by cache and tier", labels=["cache", "tier"])
+        cache_misses = CounterMetricFamily("rag_cache_misses", "Cache misses by cache", labels=["cache"])
+        embedding_stats = get_embedding_cache().stats()
+        cache_hits.add_metric(["embedding", "memory"], embedding_stats["hits"])
+        cache_hits.add_metric(["embedding", "shared"], embedding_stats["shared_hits"])
+        cache_misses.add_metric(["embedding"], embedding_stats["misses"])
+        answer_cache = get_answer_cache()
+        if answer_cache is not None:
+            answer_stats = answer_cache.stats()
+            cache_hits.add_metric(["answer", "memory"], answer_stats["hits"])
+            cache_misses.add_metric(["answer"], answer_stats["misses"])
+        if settings.RETRIEVAL_FETCH == "two_step":
+            chunk_stats = get_chunk_cache().stats()
+            cache_hits.add_metric(["chunk", "memory"], chunk_stats["hits"])
+            cache_misses.add_metric(["chunk"], chunk_stats["misses"])
+        yield cache_hits
+        yield cache_misses
+
+        log_stats = get_query_log_writer().stats()
+        yield GaugeMetricFamily("rag_query_log_queued", "Query log records waiting to be written", value=log_stats["queued"])
+        log_records = CounterMetricFamily("rag_query_log_records", "Query log records by outcome", labels=["outcome"])
+        for outcome in ("written", "dropped", "failed"):
+            log_records.add_metric([outcome], log_stats[outcome])
+        yield log_records
+
+        pool_size = GaugeMetricFamily("rag_db_pool_size", "Configured connection pool size", labels=["engine"])
+        checked_out = GaugeMetricFamily("rag_db_pool_checked_out", "Connections currently in use", labels=["engine"])
+        checked_in = GaugeMetricFamily("rag_db_pool_checked_in", "Idle connections in the pool", labels=["engine"])
+        overflow = GaugeMetricFamily("rag_db_pool_overflow", "Connections open beyond pool_size", labels=["engine"])
+        for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+            pool_size.add_metric([name], pool.size())
+            checked_out.add_metric([name], pool.checkedout())
+            checked_in.add_metric([name], pool.checkedin())
+            # QueuePool reports -pool_size before the first connection opens
+            overflow.add_metric([name], max(pool.overflow(), 0))
+        yield pool_size
+        yield checked_out
+        yield checked_in
+        yield overflow
+
+
+REGISTRY.register(ServiceCollector())
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request duration and status per route.
+
+    Labels use the route template ("/query", not the raw path) so cardinality
+    stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+            REQUESTS.labels(endpoint, str(status["code"])).inc()
+
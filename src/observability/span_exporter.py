@@ -0,0 +1,42 @@
+"""JSON-lines span exporter for tests and local debugging (TRACING_EXPORTER=file)."""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+
+def span_to_dict(span: ReadableSpan) -> Dict[str, Any]:
+    """Flat, JSON-serializable view of a finished span."""
+    parent = span.parent
+    return {
+        "name": span.name,
+        "trace_id": format(span.context.trace_id, "032x"),
+        "span_id": format(span.context.span_id, "016x"),
+        "parent_id": format(parent.span_id, "016x") if parent is not None else None,
+        "start_ns": span.start_time,
+        "duration_ms": (span.end_time - span.start_time) / 1e6,
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+    }
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one JSON object per finished span to a file."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(json.dumps(span_to_dict(span), default=str) + "\n" for span in spans)
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
@@ -0,0 +1,232 @@
+"""Opt-in OpenTelemetry tracing for the query pipeline.
+
+With TRACING_ENABLED=true each request gets a trace: a root span per HTTP
+request (TracingMiddleware) with child spans for query embedding, the SQL
+search (statement and rows returned), reranking, context assembly and the LLM
+call (model and tokens). Every statement run through the SQLAlchemy engines
+gets its own span too, and query log batch writes are traced as their own
+(background) traces.
+
+Spans go to an OTLP collector (TRACING_EXPORTER=otlp), the console, or a
+JSON-lines file (TRACING_EXPORTER=file, used by the tests).
+
+OpenTelemetry is an optional dependency (pip install -e ".[tracing]") and is
+only imported once tracing is configured. While tracing is off, span() hands
+back a shared no-op context manager, so instrumented code costs one global
+lookup per stage.
+
+Usage:
+    from src.observability import span
+
+    with span("rerank", {"rerank.candidates": len(chunks)}) as current:
+        chunks = rerank(...)
+        current.set_attribute("rerank.kept", len(chunks))
+"""
+
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+
+from src.config import settings
+
+
+# Longest db.statement recorded on SQL spans
+MAX_STATEMENT_LENGTH = 2000
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is off."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: dict) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_NO_SPAN = nullcontext(_NOOP_SPAN)
+
+_tracer = None
+_tracer_provider = None
+
+
+def tracing_enabled() -> bool:
+    """Whether spans are being recorded."""
+    return _tracer is not None
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Context manager for a child span of the current span (no-op while tracing is off).
+
+    None-valued attributes are skipped, since OpenTelemetry rejects them.
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.start_as_current_span(
+        name, attributes={key: value for key, value in (attributes or {}).items() if value is not None}
+    )
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Start a child span without making it current; the caller must end() it.
+
+    For work that spans async generator yields (streaming), where switching
+    the current span would leak into the consumer.
+    """
+    if _tracer is None:
+        return _NOOP_SPAN
+    return _tracer.start_span(
+        name, attributes={key: value for key, value in (attributes or {}).items() if value is not None}
+    )
+
+
+def _span_exporter():
+    """Exporter chosen by TRACING_EXPORTER."""
+    if settings.TRACING_EXPORTER == "file":
+        from src.observability.span_exporter import FileSpanExporter
+
+        return FileSpanExporter(settings.TRACING_FILE_PATH)
+    if settings.TRACING_EXPORTER == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        return ConsoleSpanExporter()
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+
+
+def configure_tracing(span_exporter=None) -> bool:
+    """Start recording spans if TRACING_ENABLED (called on API startup).
+
+    Args:
+        span_exporter: Export spans here instead of the TRACING_EXPORTER
+            default; enables tracing regardless of TRACING_ENABLED (tests)
+
+    Returns:
+        True if tracing is on
+    """
+    global _tracer, _tracer_provider
+    if _tracer is not None:
+        return True
+    if span_exporter is None and not settings.TRACING_ENABLED:
+        return False
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    )
+    if span_exporter is None and settings.TRACING_EXPORTER == "otlp":
+        # Export off the request path, in batches
+        provider.add_span_processor(BatchSpanProcessor(_span_exporter()))
+    else:
+        # Files and the console are local; write each span as it ends
+        provider.add_span_processor(SimpleSpanProcessor(span_exporter or _span_exporter()))
+    _tracer_provider = provider
+    _tracer = provider.get_tracer("ask-my-resume")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and stop recording (called on API shutdown)."""
+    global _tracer, _tracer_provider
+    if _tracer_provider is not None:
+        _tracer_provider.shutdown()
+    _tracer = None
+    _tracer_provider = None
+
+
+def instrument_engine(engine) -> None:
+    """Trace every statement run on a (sync) SQLAlchemy engine.
+
+    For an AsyncEngine pass engine.sync_engine. Spans are only recorded while
+    tracing is configured and nest under the request's current span.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_span(conn, cursor, statement, parameters, context, executemany):
+        if _tracer is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        context._otel_span = _tracer.start_span(
+            operation,
+            attributes={
+                "db.system": engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            }
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_span(conn, cursor, statement, parameters, context, executemany):
+        current = getattr(context, "_otel_span", None)
+        if current is None:
+            return
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            current.set_attribute("db.rows", cursor.rowcount)
+        current.end()
+        context._otel_span = None
+
+    @event.listens_for(engine, "handle_error")
+    def _fail_span(exception_context):
+        current = getattr(exception_context.execution_context, "_otel_span", None)
+        if current is None:
+            return
+        from opentelemetry.trace import Status, StatusCode
+
+        current.record_exception(exception_context.original_exception)
+        current.set_status(Status(StatusCode.ERROR))
+        current.end()
+        exception_context.execution_context._otel_span = None
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of each HTTP request.
+
+    Continues a trace from an incoming traceparent header, and names the span
+    after the matched route ("POST /query") once routing has happened.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        from opentelemetry.propagate import extract
+        from opentelemetry.trace import SpanKind, Status, StatusCode
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        with _tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=extract(headers),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]}
+        ) as request_span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        request_span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    request_span.update_name(f"{scope['method']} {route.path}")
+                    request_span.set_attribute("http.route", route.path)
@@ -0,0 +1,25 @@
+"""Embedding and chat completion providers (OpenAI, local server, offline fake).
+
+Usage:
+    from src.providers import get_provider
+
+    provider = get_provider()  # Chosen by settings.LLM_PROVIDER
+    vectors = await provider.aembed(["What did Franklin do at Meta?"], settings.EMBEDDING_MODEL)
+"""
+
+from src.providers.base import Provider
+from src.providers.fake import FakeProvider, fake_embedding
+from src.providers.local import LocalProvider
+from src.providers.openai_provider import OpenAIProvider
+from src.providers.registry import aclose_provider, get_provider, set_provider
+
+__all__ = [
+    "Provider",
+    "OpenAIProvider",
+    "LocalProvider",
+    "FakeProvider",
+    "fake_embedding",
+    "get_provider",
+    "set_provider",
+    "aclose_provider",
+]
@@ -0,0 +1,75 @@
+"""Provider interface for embeddings and chat completions."""
+
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+
+Messages = List[Dict[str, str]]
+
+
+class Provider:
+    """Embeddings + chat completions behind one interface.
+
+    Implementations supply embed/aembed, complete/acomplete and astream; the
+    rest of the app (query embedding, generation, ingestion) only talks to a
+    Provider, so it runs the same against OpenAI, a local model server or the
+    offline fake.
+    """
+
+    # Short identifier (matches LLM_PROVIDER)
+    name = "base"
+
+    def cache_key(self, model: str) -> str:
+        """Model name used to key cached embeddings, so providers never share vectors."""
+        return f"{self.name}:{model}"
+
+    def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """Embed texts; one vector per text, in input order."""
+        raise NotImplementedError
+
+    async def aembed(self, texts: List[str], model: str) -> List[List[float]]:
+        """Async variant of embed."""
+        return await asyncio.to_thread(self.embed, texts, model)
+
+    def complete(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
+        """Chat completion; returns the full response text.
+
+        If usage is given, it is filled with prompt/completion/total token counts.
+        """
+        raise NotImplementedError
+
+    async def acomplete(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
+        """Async variant of complete."""
+        return await asyncio.to_thread(self.complete, messages, model, temperature, max_tokens, usage)
+
+    def astream(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion as text deltas.
+
+        If usage is given, it is filled with prompt/completion/total token
+        counts once the stream finishes.
+        """
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        """Release connections (called on API shutdown)."""
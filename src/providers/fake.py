@@ -0,0 +1,137 @@
+"""Deterministic offline provider for tests, CI and benchmarks.
+
+Embeddings are unit vectors seeded by a hash of the text, so the same text
+always gets the same vector (and identical questions hit the caches) without
+any network. Answers are templated from the first context passage in the
+prompt. Configurable artificial latency (FAKE_*_LATENCY_MS) stands in for the
+API, so benchmarks measure our own code paths with a fixed, known upstream cost.
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import numpy as np
+
+from src.config import settings
+from src.providers.base import Messages, Provider
+from src.tokenizer import count_tokens
+
+
+_PASSAGE = re.compile(r"^\[1\] (.+?)(?:\n\n\[2\] |\n\n---|\Z)", re.MULTILINE | re.DOTALL)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_QUESTION = re.compile(r"Question: (.+)\Z", re.DOTALL)
+_WORD = re.compile(r"\S+\s*")
+
+
+def fake_embedding(text: str, dimensions: int) -> List[float]:
+    """Deterministic unit vector for a text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def fake_answer(messages: Messages) -> str:
+    """Templated answer quoting the first sentence of the first context passage."""
+    prompt = messages[-1]["content"] if messages else ""
+    question = _QUESTION.search(prompt)
+    passage = _PASSAGE.search(prompt)
+    if passage is None:
+        return "I don't have information about that in Franklin's background."
+    first_sentence = _SENTENCE_END.split(passage.group(1).strip(), maxsplit=1)[0]
+    asked = f' you asked "{question.group(1).strip()}"' if question else ""
+    return f"Based on Franklin's background (offline answer,{asked}): {first_sentence}"
+
+
+class FakeProvider(Provider):
+    """Hash-based embeddings and templated answers with artificial latency."""
+
+    name = "fake"
+
+    def __init__(
+        self,
+        dimensions: Optional[int] = None,
+        embedding_latency_ms: Optional[float] = None,
+        generation_latency_ms: Optional[float] = None,
+        token_latency_ms: Optional[float] = None
+    ):
+        self.dimensions = dimensions or settings.EMBEDDING_DIMENSIONS
+        self.embedding_latency = (
+            settings.FAKE_EMBEDDING_LATENCY_MS if embedding_latency_ms is None else embedding_latency_ms
+        ) / 1000
+        self.generation_latency = (
+            settings.FAKE_GENERATION_LATENCY_MS if generation_latency_ms is None else generation_latency_ms
+        ) / 1000
+        self.token_latency = (
+            settings.FAKE_TOKEN_LATENCY_MS if token_latency_ms is None else token_latency_ms
+        ) / 1000
+
+        self.embed_calls = 0
+        self.completion_calls = 0
+
+    def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        self.embed_calls += 1
+        time.sleep(self.embedding_latency)
+        return [fake_embedding(text, self.dimensions) for text in texts]
+
+    async def aembed(self, texts: List[str], model: str) -> List[List[float]]:
+        self.embed_calls += 1
+        await asyncio.sleep(self.embedding_latency)
+        return [fake_embedding(text, self.dimensions) for text in texts]
+
+    def _answer(self, messages: Messages, max_tokens: int) -> List[str]:
+        """Answer as word-sized tokens, capped at max_tokens."""
+        self.completion_calls += 1
+        return _WORD.findall(fake_answer(messages))[:max_tokens]
+
+    @staticmethod
+    def _record_usage(usage: Optional[Dict[str, int]], messages: Messages, model: str, tokens: List[str]) -> None:
+        if usage is not None:
+            prompt_tokens = sum(count_tokens(message["content"], model) for message in messages)
+            usage["prompt_tokens"] = prompt_tokens
+            usage["completion_tokens"] = len(tokens)
+            usage["total_tokens"] = prompt_tokens + len(tokens)
+
+    def complete(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
+        tokens = self._answer(messages, max_tokens)
+        time.sleep(self.generation_latency + self.token_latency * len(tokens))
+        self._record_usage(usage, messages, model, tokens)
+        return "".join(tokens).rstrip()
+
+    async def acomplete(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
+        tokens = self._answer(messages, max_tokens)
+        await asyncio.sleep(self.generation_latency + self.token_latency * len(tokens))
+        self._record_usage(usage, messages, model, tokens)
+        return "".join(tokens).rstrip()
+
+    async def astream(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> AsyncIterator[str]:
+        tokens = self._answer(messages, max_tokens)
+        await asyncio.sleep(self.generation_latency)
+        for token in tokens:
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield token
+        self._record_usage(usage, messages, model, tokens)
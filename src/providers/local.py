@@ -0,0 +1,54 @@
+"""Local provider: an OpenAI-compatible model server on your own hardware.
+
+Ollama, vLLM, llama.cpp's server and LM Studio all expose /v1/embeddings and
+/v1/chat/completions, so the OpenAI request path works unchanged; only the
+base URL, key and model names differ. Point EMBEDDING_MODEL / GENERATION_MODEL
+at models the server has pulled, and keep EMBEDDING_DIMENSIONS in line with
+the embedding model (the chunk_embeddings column is sized for it).
+
+To run a model in-process instead, subclass Provider and implement
+embed/complete/astream; get_provider() is the single place that picks one.
+"""
+
+from typing import Optional
+
+from openai import AsyncOpenAI, OpenAI
+
+from src.clients import create_async_openai_client, create_openai_client
+from src.config import settings
+from src.providers.openai_provider import OpenAIProvider
+
+
+class LocalProvider(OpenAIProvider):
+    """OpenAI-compatible local server with its own clients (no OpenAI key needed).
+
+    The clients are built like the shared OpenAI ones (src/clients.py), with the
+    same connection pool limits, timeouts and retries.
+    """
+
+    name = "local"
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None):
+        super().__init__()
+        self.base_url = base_url or settings.LOCAL_BASE_URL
+        self.api_key = api_key or settings.LOCAL_API_KEY
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            self._client = create_openai_client(self.api_key, self.base_url)
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        if self._async_client is None:
+            self._async_client = create_async_openai_client(self.api_key, self.base_url)
+        return self._async_client
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
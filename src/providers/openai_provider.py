@@ -0,0 +1,107 @@
+"""OpenAI provider: the shared, pooled OpenAI clients from src.clients."""
+
+from typing import AsyncIterator, Dict, List, Optional
+
+from openai import AsyncOpenAI, OpenAI
+
+from src.clients import aclose_openai_clients, get_async_openai_client, get_openai_client
+from src.providers.base import Messages, Provider
+
+
+def _record_usage(usage: Optional[Dict[str, int]], reported) -> None:
+    if usage is not None and reported is not None:
+        usage["prompt_tokens"] = reported.prompt_tokens
+        usage["completion_tokens"] = reported.completion_tokens
+        usage["total_tokens"] = reported.total_tokens
+
+
+class OpenAIProvider(Provider):
+    """Embeddings and chat completions through the OpenAI API."""
+
+    name = "openai"
+
+    def __init__(self, client: Optional[OpenAI] = None, async_client: Optional[AsyncOpenAI] = None):
+        self._client = client
+        self._async_client = async_client
+
+    @property
+    def client(self) -> OpenAI:
+        return self._client or get_openai_client()
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        return self._async_client or get_async_openai_client()
+
+    def cache_key(self, model: str) -> str:
+        # Unprefixed, so embeddings cached before providers existed stay valid;
+        # OpenAI-compatible subclasses (local) are namespaced like any provider
+        if self.name != OpenAIProvider.name:
+            return super().cache_key(model)
+        return model
+
+    def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        response = self.client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    async def aembed(self, texts: List[str], model: str) -> List[List[float]]:
+        response = await self.async_client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def complete(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        _record_usage(usage, response.usage)
+        return response.choices[0].message.content
+
+    async def acomplete(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
+        response = await self.async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        _record_usage(usage, response.usage)
+        return response.choices[0].message.content
+
+    async def astream(
+        self,
+        messages: Messages,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> AsyncIterator[str]:
+        stream = await self.async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            _record_usage(usage, chunk.usage)
+
+    async def aclose(self) -> None:
+        await aclose_openai_clients()
@@ -0,0 +1,40 @@
+"""Process-wide provider selected by settings.LLM_PROVIDER."""
+
+from typing import Optional
+
+from src.config import settings
+from src.providers.base import Provider
+from src.providers.fake import FakeProvider
+from src.providers.local import LocalProvider
+from src.providers.openai_provider import OpenAIProvider
+
+
+_PROVIDERS = {
+    "openai": OpenAIProvider,
+    "fake": FakeProvider,
+    "local": LocalProvider,
+}
+
+_provider: Optional[Provider] = None
+
+
+def get_provider() -> Provider:
+    """Get the shared provider (created on first use)."""
+    global _provider
+    if _provider is None:
+        _provider = _PROVIDERS[settings.LLM_PROVIDER]()
+    return _provider
+
+
+def set_provider(provider: Optional[Provider]) -> None:
+    """Replace the shared provider (tests, benchmarks, in-process models); None resets to settings."""
+    global _provider
+    _provider = provider
+
+
+async def aclose_provider() -> None:
+    """Close the shared provider's connections (used on FastAPI shutdown)."""
+    global _provider
+    if _provider is not None:
+        await _provider.aclose()
+        _provider = None
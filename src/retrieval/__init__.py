@@ -1,5 +1,41 @@
-"""Retrieval module for vector similarity search."""
+"""Retrieval module: vector, hybrid and in-memory similarity search, reranking and shadow retrieval."""
 
-from src.retrieval.search import retrieve_chunks
+from src.retrieval.chunk_cache import ChunkContentCache, aget_chunk_indexes, get_chunk_cache
+from src.retrieval.memory_index import InMemoryVectorIndex, get_memory_index
+from src.retrieval.rerank import (
+    Reranker,
+    HeuristicReranker,
+    CrossEncoderReranker,
+    get_reranker,
+    candidate_count,
+    rerank_chunks,
+    arerank_chunks,
+)
+from src.retrieval.search import (
+    retrieve_chunks,
+    aretrieve_chunks,
+    aretrieve_chunks_batch,
+    explain_search,
+)
+from src.retrieval.shadow import ShadowRunner, get_shadow_runner
 
-__all__ = ["retrieve_chunks"]
+__all__ = [
+    "retrieve_chunks",
+    "aretrieve_chunks",
+    "aretrieve_chunks_batch",
+    "aget_chunk_indexes",
+    "explain_search",
+    "InMemoryVectorIndex",
+    "get_memory_index",
+    "ChunkContentCache",
+    "get_chunk_cache",
+    "Reranker",
+    "HeuristicReranker",
+    "CrossEncoderReranker",
+    "get_reranker",
+    "candidate_count",
+    "rerank_chunks",
+    "arerank_chunks",
+    "ShadowRunner",
+    "get_shadow_runner",
+]
@@ -0,0 +1,197 @@
+"""In-process chunk content cache for two-step retrieval.
+
+With RETRIEVAL_FETCH=two_step, the search statement touches chunk_embeddings
+alone and returns (chunk_id, distance) for the winners; their content, source
+file and category come from this cache. Only chunks it hasn't seen are read
+from document_chunks, in one primary-key lookup per search. The corpus is a
+few hundred chunks, so after warm-up a query moves ids and distances from
+Postgres and nothing else.
+
+The cache also holds each chunk's chunk_index, which the context builder uses
+to merge chunks adjacent in their file (aget_chunk_indexes), so that lookup
+costs no round trip once a chunk has been seen, whatever RETRIEVAL_FETCH is.
+
+Entries are keyed by chunk_id under the current content version: re-running
+scripts/ingest_content.py changes the version, and the first lookup after
+that empties the cache (chunks updated in place can be served stale for up
+to CONTENT_VERSION_TTL_SECONDS, like cached answers).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.database.content_version import aget_content_version, get_content_version
+
+
+# chunk_id -> (content, source_file, category, chunk_index)
+ChunkFields = Tuple[str, str, Optional[str], int]
+
+CHUNK_CONTENT_SQL = text(
+    "SELECT chunk_id, content, source_file, category, chunk_index FROM document_chunks "
+    "WHERE chunk_id = ANY(CAST(:chunk_ids AS integer[]))"
+)
+
+
+class ChunkContentCache:
+    """Thread-safe LRU of chunk fields by chunk_id, for one content version at a time."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, ChunkFields]" = OrderedDict()
+        self._bytes = 0
+        self._content_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_content_version(self, content_version: str) -> None:
+        """Drop every entry once the corpus changes (lock held)."""
+        if content_version != self._content_version:
+            self._entries.clear()
+            self._bytes = 0
+            self._content_version = content_version
+
+    def get_many(self, chunk_ids: Iterable[int], content_version: str) -> Dict[int, ChunkFields]:
+        """Cached fields for the chunk_ids it has; the rest are misses."""
+        found = {}
+        with self._lock:
+            self._check_content_version(content_version)
+            for chunk_id in chunk_ids:
+                fields = self._entries.get(chunk_id)
+                if fields is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(chunk_id)
+                self.hits += 1
+                found[chunk_id] = fields
+        return found
+
+    def put_many(self, rows: Iterable[Tuple[int, str, str, Optional[str], int]], content_version: str) -> None:
+        """Store (chunk_id, content, source_file, category, chunk_index) rows read from the database."""
+        with self._lock:
+            self._check_content_version(content_version)
+            for chunk_id, *fields in rows:
+                if chunk_id in self._entries:
+                    self._entries.move_to_end(chunk_id)
+                    continue
+                self._entries[chunk_id] = tuple(fields)
+                self._bytes += self._entry_size(fields)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, old_fields = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(old_fields)
+                self.evictions += 1
+
+    @staticmethod
+    def _entry_size(fields: Sequence[Any]) -> int:
+        return sum(len(value) for value in fields[:3] if value)
+
+    def stats(self) -> Dict[str, float]:
+        """Size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "content_version": self._content_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+def with_content(
+    nearest: Sequence[Tuple[int, float]],
+    fields: Dict[int, ChunkFields]
+) -> List[Tuple[int, str, str, Optional[str], float]]:
+    """(chunk_id, distance) search rows, in rank order, -> full retrieval rows.
+
+    A chunk deleted between the search and the content lookup is dropped.
+    """
+    return [(chunk_id, *fields[chunk_id][:3], distance) for chunk_id, distance in nearest if chunk_id in fields]
+
+
+def get_chunk_fields(session: Session, chunk_ids: Sequence[int]) -> Dict[int, ChunkFields]:
+    """Content, source file and category for chunk_ids: from the cache, reading only misses.
+
+    Returns:
+        Dict of chunk_id -> (content, source_file, category, chunk_index)
+    """
+    if not chunk_ids:
+        return {}
+    cache = get_chunk_cache()
+    version = get_content_version(session)
+    fields = cache.get_many(chunk_ids, version)
+    missing = list(dict.fromkeys(chunk_id for chunk_id in chunk_ids if chunk_id not in fields))
+    if missing:
+        rows = session.execute(CHUNK_CONTENT_SQL, {"chunk_ids": missing}).fetchall()
+        cache.put_many(rows, version)
+        fields.update((chunk_id, tuple(values)) for chunk_id, *values in rows)
+    return fields
+
+
+async def aget_chunk_fields(session: AsyncSession, chunk_ids: Sequence[int]) -> Dict[int, ChunkFields]:
+    """Async variant of get_chunk_fields for the API request path."""
+    if not chunk_ids:
+        return {}
+    cache = get_chunk_cache()
+    version = await aget_content_version(session)
+    fields = cache.get_many(chunk_ids, version)
+    missing = list(dict.fromkeys(chunk_id for chunk_id in chunk_ids if chunk_id not in fields))
+    if missing:
+        rows = (await session.execute(CHUNK_CONTENT_SQL, {"chunk_ids": missing})).fetchall()
+        cache.put_many(rows, version)
+        fields.update((chunk_id, tuple(values)) for chunk_id, *values in rows)
+    return fields
+
+
+def attach_content(
+    session: Session,
+    nearest: Sequence[Tuple[int, float]]
+) -> List[Tuple[int, str, str, Optional[str], float]]:
+    """Add content, source file and category to (chunk_id, distance) search rows.
+
+    Returns:
+        List of (chunk_id, content, source_file, category, distance) tuples, in the input order
+    """
+    return with_content(nearest, get_chunk_fields(session, [chunk_id for chunk_id, _ in nearest]))
+
+
+async def aattach_content(
+    session: AsyncSession,
+    nearest: Sequence[Tuple[int, float]]
+) -> List[Tuple[int, str, str, Optional[str], float]]:
+    """Async variant of attach_content for the API request path."""
+    return with_content(nearest, await aget_chunk_fields(session, [chunk_id for chunk_id, _ in nearest]))
+
+
+async def aget_chunk_indexes(session: AsyncSession, chunk_ids: Sequence[int]) -> Dict[int, int]:
+    """chunk_index of retrieved chunks, from the cache (reading only chunks it hasn't seen).
+
+    Lets the context builder merge chunks that are adjacent in their source file.
+
+    Returns:
+        Dict of chunk_id -> chunk_index
+    """
+    fields = await aget_chunk_fields(session, chunk_ids)
+    return {chunk_id: values[3] for chunk_id, values in fields.items()}
+
+
+_chunk_cache: Optional[ChunkContentCache] = None
+
+
+def get_chunk_cache() -> ChunkContentCache:
+    """Get the process-wide chunk content cache."""
+    global _chunk_cache
+    if _chunk_cache is None:
+        _chunk_cache = ChunkContentCache(max_bytes=int(settings.CHUNK_CACHE_MAX_MB * 1024 * 1024))
+    return _chunk_cache
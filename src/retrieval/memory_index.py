@@ -0,0 +1,247 @@
+"""In-process NumPy vector index for small corpora.
+
+The whole corpus is a few hundred chunks, so a top-k search is cheaper as one
+matrix-vector product in the API process than as a round trip to Postgres.
+With RETRIEVAL_BACKEND=memory, every embedding for the active model is loaded
+into one contiguous float32 matrix (rows pre-normalized for cosine) and
+searched with argpartition. The index is keyed by the content version and
+reloads itself after re-ingestion.
+
+If VECTOR_INDEX_SNAPSHOT_DIR is set, the matrix is also saved there per content
+version and memory-mapped on the next start, so workers skip the bulk load
+and share the pages through the OS page cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.database.content_version import aget_content_version, get_content_version
+from src.database.models import ChunkEmbedding, DocumentChunk
+
+
+class InMemoryVectorIndex:
+    """All chunk embeddings for one model and metric in a float32 matrix."""
+
+    def __init__(self, embedding_model: str, metric: str, snapshot_dir: Optional[str] = None):
+        self.embedding_model = embedding_model
+        self.metric = metric
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self.version: Optional[str] = None
+
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._squared_norms = np.zeros(0, dtype=np.float32)  # For l2 only
+        self._rows: List[Tuple[int, str, str, Optional[str]]] = []
+        self._swap_lock = threading.Lock()
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self.reloads = 0
+        self.snapshot_loads = 0
+
+    def _load_statement(self):
+        return (
+            select(
+                DocumentChunk.chunk_id,
+                DocumentChunk.content,
+                DocumentChunk.source_file,
+                DocumentChunk.category,
+                ChunkEmbedding.embedding,
+            )
+            .join(ChunkEmbedding, ChunkEmbedding.chunk_id == DocumentChunk.chunk_id)
+            .where(ChunkEmbedding.embedding_model == self.embedding_model)
+            .order_by(DocumentChunk.chunk_id)
+        )
+
+    def _prepare(self, embeddings: Sequence[Any]) -> np.ndarray:
+        """Stack embeddings into the matrix searched for this metric."""
+        if not embeddings:
+            return np.zeros((0, settings.EMBEDDING_DIMENSIONS), dtype=np.float32)
+        matrix = np.ascontiguousarray(np.stack([np.asarray(e, dtype=np.float32) for e in embeddings]))
+        if self.metric == "cosine":
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1, norms)
+        return matrix
+
+    def _install(self, version: str, matrix: np.ndarray, rows: List[Tuple[int, str, str, Optional[str]]]) -> None:
+        squared_norms = np.einsum("ij,ij->i", matrix, matrix) if self.metric == "l2" else self._squared_norms
+        with self._swap_lock:
+            self._matrix = matrix
+            self._squared_norms = squared_norms
+            self._rows = rows
+            self.version = version
+        self.reloads += 1
+
+    def _snapshot_prefix(self) -> str:
+        """File name prefix for this model/metric.
+
+        Model names like BAAI/bge-small-en aren't valid file names, so the name
+        is slugged; the digest keeps names that slug alike apart.
+        """
+        slug = re.sub(r"[^a-z0-9]+", "_", self.embedding_model.lower()).strip("_")
+        digest = hashlib.sha1(self.embedding_model.encode("utf-8")).hexdigest()[:8]
+        return f"{slug}-{digest}-{self.metric}-"
+
+    def _snapshot_paths(self, version: str) -> Optional[Tuple[Path, Path]]:
+        if self.snapshot_dir is None:
+            return None
+        stem = f"{self._snapshot_prefix()}{version}"
+        return self.snapshot_dir / f"{stem}.npy", self.snapshot_dir / f"{stem}.json"
+
+    def _load_snapshot(self, version: str) -> bool:
+        paths = self._snapshot_paths(version)
+        if paths is None or not (paths[0].exists() and paths[1].exists()):
+            return False
+        matrix = np.load(paths[0], mmap_mode="r")
+        rows = [tuple(row) for row in json.loads(paths[1].read_text(encoding="utf-8"))]
+        self._install(version, matrix, rows)
+        self.snapshot_loads += 1
+        return True
+
+    def _write_snapshot(self, version: str) -> None:
+        paths = self._snapshot_paths(version)
+        if paths is None:
+            return
+        matrix_path, rows_path = paths
+        try:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            # Write then rename so other workers never map a half-written file
+            tmp_matrix = matrix_path.with_suffix(".npy.tmp")
+            with open(tmp_matrix, "wb") as f:
+                np.save(f, np.asarray(self._matrix))
+            tmp_rows = rows_path.with_suffix(".json.tmp")
+            tmp_rows.write_text(json.dumps(self._rows), encoding="utf-8")
+            tmp_matrix.replace(matrix_path)
+            tmp_rows.replace(rows_path)
+
+            # Older versions for this model/metric are stale now
+            for path in self.snapshot_dir.glob(f"{self._snapshot_prefix()}*"):
+                if path not in paths:
+                    path.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Warning: Failed to write vector index snapshot: {e}")
+
+    def _build_from_rows(self, version: str, result_rows) -> None:
+        rows = [(row.chunk_id, row.content, row.source_file, row.category) for row in result_rows]
+        matrix = self._prepare([row.embedding for row in result_rows])
+        self._install(version, matrix, rows)
+
+    def refresh(self, session: Session) -> bool:
+        """Load or reload the index if the content version changed.
+
+        Returns:
+            True if the index was (re)loaded
+        """
+        version = get_content_version(session)
+        if version == self.version:
+            return False
+        if not self._load_snapshot(version):
+            self._build_from_rows(version, session.execute(self._load_statement()).all())
+            self._write_snapshot(version)
+        return True
+
+    async def arefresh(self, session: AsyncSession) -> bool:
+        """Async variant of refresh; concurrent callers share a single reload."""
+        version = await aget_content_version(session)
+        if version == self.version:
+            return False
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if version == self.version:
+                return False
+            if not await asyncio.to_thread(self._load_snapshot, version):
+                result = await session.execute(self._load_statement())
+                self._build_from_rows(version, result.all())
+                await asyncio.to_thread(self._write_snapshot, version)
+        return True
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        filters: Optional[Dict[str, Sequence[str]]] = None
+    ) -> List[Tuple[int, str, str, Optional[str], float]]:
+        """Top-k chunks by the index's distance metric.
+
+        Distances match the pgvector operators: cosine distance (<=>), negative
+        inner product (<#>) and Euclidean distance (<->).
+
+        Args:
+            query_embedding: Query vector
+            top_k: Number of chunks to return
+            filters: Optional "categories" / "source_files" value lists; only
+                matching chunks are ranked (the search stays exact)
+
+        Returns:
+            List of (chunk_id, content, source_file, category, distance) tuples
+        """
+        with self._swap_lock:
+            matrix, squared_norms, rows = self._matrix, self._squared_norms, self._rows
+        if not rows or top_k <= 0:
+            return []
+        allowed = _filter_mask(rows, filters) if filters else None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if self.metric == "cosine":
+            norm = np.linalg.norm(query)
+            distances = 1.0 - matrix @ (query / norm if norm else query)
+        elif self.metric == "inner_product":
+            distances = -(matrix @ query)
+        else:
+            distances = np.sqrt(np.maximum(squared_norms - 2.0 * (matrix @ query) + query @ query, 0.0))
+
+        if allowed is not None:
+            distances = np.where(allowed, distances, np.inf)
+        k = min(top_k, len(rows) if allowed is None else int(np.count_nonzero(allowed)))
+        if k == 0:
+            return []
+        nearest = np.argpartition(distances, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [(*rows[i], float(distances[i])) for i in nearest]
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and reload counters."""
+        return {
+            "embedding_model": self.embedding_model,
+            "metric": self.metric,
+            "content_version": self.version,
+            "chunks": len(self._rows),
+            "memory_mb": round(self._matrix.nbytes / (1024 * 1024), 2),
+            "memory_mapped": isinstance(self._matrix, np.memmap),
+            "reloads": self.reloads,
+            "snapshot_loads": self.snapshot_loads,
+        }
+
+
+def _filter_mask(rows: List[Tuple[int, str, str, Optional[str]]], filters: Dict[str, Sequence[str]]) -> np.ndarray:
+    """Which (chunk_id, content, source_file, category) rows pass the category / source filters."""
+    categories = set(filters.get("categories") or ())
+    source_files = set(filters.get("source_files") or ())
+    return np.fromiter(
+        (
+            (not categories or row[3] in categories) and (not source_files or row[2] in source_files)
+            for row in rows
+        ),
+        dtype=bool,
+        count=len(rows)
+    )
+
+
+_indexes: Dict[Tuple[str, str], InMemoryVectorIndex] = {}
+
+
+def get_memory_index(embedding_model: Optional[str] = None, metric: Optional[str] = None) -> InMemoryVectorIndex:
+    """Get the process-wide in-memory index for a model and metric (defaults from settings)."""
+    key = (embedding_model or settings.EMBEDDING_MODEL, metric or settings.VECTOR_DISTANCE_METRIC)
+    if key not in _indexes:
+        _indexes[key] = InMemoryVectorIndex(*key, snapshot_dir=settings.VECTOR_INDEX_SNAPSHOT_DIR)
+    return _indexes[key]
@@ -0,0 +1,183 @@
+"""Rerank stage between retrieval and generation.
+
+Retrieval ranks purely by embedding distance (or rank fusion), and every chunk
+it returns ends up in the prompt. With a reranker configured, retrieval
+over-fetches RERANK_OVERFETCH x top_k candidates, the reranker rescores them
+against the question and only the best top_k go to the LLM: fewer, better
+chunks mean smaller prompts, lower token cost and faster completions.
+
+Rerankers:
+- heuristic: blends normalized vector closeness with IDF-weighted term overlap;
+  microseconds per candidate, no dependencies
+- cross_encoder: a local sentence-transformers CrossEncoder (optional
+  dependency, loaded on first use); run in a worker thread on the API path
+"""
+
+import asyncio
+import math
+import re
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.config import settings
+
+
+Chunk = Tuple[int, str, str, str, float]
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+
+# Question words and fillers that say nothing about which chunk is relevant
+_STOPWORDS = frozenset("""
+    a an and are as at be by can did do does for from had has have he his how i in is it its
+    me my of on or she that the their them they this to was what when where which who why
+    will with would you your about tell
+""".split())
+
+
+def _terms(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+class Reranker:
+    """Base class: rescore candidate chunks for a query."""
+
+    # True if scoring runs a model (CPU-heavy); the async path then uses a worker thread
+    runs_model = False
+
+    def score(self, query: str, chunks: Sequence[Chunk]) -> List[float]:
+        """Relevance score per chunk (higher is better)."""
+        raise NotImplementedError
+
+    def rerank(self, query: str, chunks: Sequence[Chunk], top_n: int) -> List[Chunk]:
+        """Best top_n chunks by score; ties keep retrieval order."""
+        if not chunks:
+            return []
+        scores = self.score(query, chunks)
+        order = sorted(range(len(chunks)), key=lambda i: -scores[i])
+        return [chunks[i] for i in order[:top_n]]
+
+
+class HeuristicReranker(Reranker):
+    """Cheap scorer: vector closeness blended with IDF-weighted query-term overlap.
+
+    Term overlap rewards chunks that literally mention the names, technologies
+    and acronyms in the question ("Civis", "pgvector"), which embeddings tend
+    to blur. IDF is computed over the candidate set, so a term every candidate
+    shares counts for little.
+    """
+
+    def __init__(self, lexical_weight: float = 0.4):
+        self.lexical_weight = lexical_weight
+
+    def score(self, query: str, chunks: Sequence[Chunk]) -> List[float]:
+        distances = [chunk[4] for chunk in chunks]
+        low, high = min(distances), max(distances)
+        span = (high - low) or 1.0
+        closeness = [1.0 - (distance - low) / span for distance in distances]
+
+        query_terms = set(_terms(query))
+        if not query_terms:
+            return closeness
+
+        chunk_terms = [set(_terms(chunk[1])) for chunk in chunks]
+        idf = {
+            term: math.log(1 + len(chunks) / (1 + sum(term in terms for terms in chunk_terms)))
+            for term in query_terms
+        }
+        total = sum(idf.values()) or 1.0
+        overlap = [sum(idf[term] for term in query_terms & terms) / total for terms in chunk_terms]
+
+        w = self.lexical_weight
+        return [(1 - w) * c + w * o for c, o in zip(closeness, overlap)]
+
+
+class CrossEncoderReranker(Reranker):
+    """Local cross-encoder (sentence-transformers) scoring (query, chunk) pairs jointly."""
+
+    runs_model = True
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+
+    def score(self, query: str, chunks: Sequence[Chunk]) -> List[float]:
+        if self._model is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError as e:
+                raise ImportError(
+                    "RERANKER=cross_encoder needs sentence-transformers: pip install sentence-transformers"
+                ) from e
+            self._model = CrossEncoder(self.model_name)
+        return [float(s) for s in self._model.predict([(query, chunk[1]) for chunk in chunks])]
+
+
+_reranker: Optional[Reranker] = None
+
+
+def get_reranker() -> Optional[Reranker]:
+    """Get the process-wide reranker configured by RERANKER, or None when disabled."""
+    global _reranker
+    if settings.RERANKER == "none":
+        return None
+    if _reranker is None:
+        if settings.RERANKER == "cross_encoder":
+            _reranker = CrossEncoderReranker(settings.RERANK_CROSS_ENCODER_MODEL)
+        else:
+            _reranker = HeuristicReranker(settings.RERANK_LEXICAL_WEIGHT)
+    return _reranker
+
+
+def candidate_count(top_k: int, reranker: Optional[Reranker] = None) -> int:
+    """How many chunks to retrieve so the reranker has room to choose top_k."""
+    if reranker is None:
+        return top_k
+    return top_k * settings.RERANK_OVERFETCH
+
+
+def _record(timings: Optional[Dict[str, float]], start: float) -> None:
+    if timings is not None:
+        timings["rerank_ms"] = (time.perf_counter() - start) * 1000
+
+
+def rerank_chunks(
+    query: str,
+    chunks: Sequence[Chunk],
+    top_k: int,
+    reranker: Optional[Reranker] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> List[Chunk]:
+    """Rerank over-fetched candidates down to top_k (plain truncation without a reranker).
+
+    Args:
+        query: User's question
+        chunks: Candidates from retrieval, best first
+        top_k: Number of chunks to keep
+        reranker: Reranker to use (None keeps retrieval order)
+        timings: Optional dict filled with rerank_ms (left unset without a reranker)
+
+    Returns:
+        At most top_k chunks, same tuple shape as retrieval
+    """
+    if reranker is None:
+        return list(chunks[:top_k])
+    start = time.perf_counter()
+    result = reranker.rerank(query, chunks, top_k)
+    _record(timings, start)
+    return result
+
+
+async def arerank_chunks(
+    query: str,
+    chunks: Sequence[Chunk],
+    top_k: int,
+    reranker: Optional[Reranker] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> List[Chunk]:
+    """Async variant of rerank_chunks; model-based rerankers run in a worker thread."""
+    if reranker is None or not reranker.runs_model:
+        return rerank_chunks(query, chunks, top_k, reranker, timings)
+    start = time.perf_counter()
+    result = await asyncio.to_thread(reranker.rerank, query, chunks, top_k)
+    _record(timings, start)
+    return result
@@ -1,18 +1,420 @@
-"""Vector similarity search for retrieving relevant resume chunks."""
+"""Vector and hybrid (vector + full-text) search for retrieving relevant resume chunks.
 
-from typing import List, Tuple
+Searches can be restricted to some categories and/or source files. The filter
+columns are denormalized into chunk_embeddings, so the ANN scan filters rows
+without joining document_chunks. An ANN index hands back a fixed number of
+nearest rows before the filter runs, so a selective filter could leave fewer
+than top_k. Two things prevent that:
+
+- pgvector iterative index scans (VECTOR_ITERATIVE_SCAN) keep the scan going
+  until enough rows pass the filter; they are only enabled when the installed
+  pgvector is 0.8+ (checked once per process), since older versions reject
+  the setting
+- if a filtered search still comes back short (iterative scans off or not
+  supported), it is re-run as an exact scan over the matching rows, which the
+  (embedding_model, category / source_file) indexes keep cheap
+
+With RETRIEVAL_FETCH=two_step the search statement doesn't join
+document_chunks at all: it returns (chunk_id, distance) rows, and content,
+source file and category are added from the in-process chunk content cache
+(src/retrieval/chunk_cache.py), which reads only the chunks it hasn't seen.
+"""
+
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pgvector import Vector
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from openai import OpenAI
 
 from src.config import settings
+from src.embedding import aembed_queries, aembed_query, embed_query
+from src.observability import span
+from src.retrieval.chunk_cache import aattach_content, aget_chunk_fields, attach_content, with_content
+from src.retrieval.memory_index import get_memory_index
+from src.retrieval.vector_index import (
+    compact_expression,
+    get_coarse_operator,
+    get_distance_operator,
+    aget_pgvector_version,
+    get_pgvector_version,
+    iterative_scan_sql,
+    model_predicate,
+    search_tuning_sql,
+    uses_vector_index,
+    find_index_scans,
+)
+
+
+def _record(timings: Optional[Dict[str, float]], stage: str, start: float) -> None:
+    """Store elapsed milliseconds since start under stage, if timings are wanted."""
+    if timings is not None:
+        timings[stage] = (time.perf_counter() - start) * 1000
+
+
+def _search_span(backend: str, mode: Optional[str], top_k: int, queries: int = 1,
+                 filters: Optional[Dict[str, List[str]]] = None):
+    """Tracing span for the search stage (the SQL statement and rows are added to it)."""
+    attributes = {
+        "retrieval.backend": backend,
+        "retrieval.mode": (mode or settings.RETRIEVAL_MODE) if backend == "postgres" else "vector",
+        "retrieval.top_k": top_k,
+        "retrieval.queries": queries,
+    }
+    for name, values in (filters or {}).items():
+        attributes[f"retrieval.filter.{name}"] = ",".join(values)
+    return span("retrieval.search", attributes)
+
+
+# Search filter -> the column it matches (same name on chunk_embeddings and document_chunks)
+FILTER_COLUMNS: Dict[str, str] = {"categories": "category", "source_files": "source_file"}
+
+
+def _filters(categories: Optional[Sequence[str]], source_files: Optional[Sequence[str]]) -> Dict[str, List[str]]:
+    """The requested filters by name, leaving out unset or empty ones."""
+    requested = {"categories": categories, "source_files": source_files}
+    return {name: list(values) for name, values in requested.items() if values}
+
+
+def _filter_sql(filters: Tuple[str, ...], alias: str) -> str:
+    """AND clauses keeping alias's rows in the requested categories / source files."""
+    return "".join(
+        f" AND {alias}.{FILTER_COLUMNS[name]} = ANY(CAST(:{name} AS text[]))" for name in filters
+    )
+
+
+def _model_sql(embedding_model: Optional[str]) -> str:
+    """Model filter on chunk_embeddings e.
+
+    A named model is written as a literal, the same predicate as its partial
+    ANN index (see vector_index.model_predicate): the planner can only match a
+    partial index when the predicate is visible at plan time, and a literal
+    keeps it visible in the generic plan a prepared statement reuses. Without
+    a model the filter is the :model parameter.
+    """
+    return f"e.{model_predicate(embedding_model)}" if embedding_model else "e.embedding_model = :model"
+
+
+# Query vector / text expressions of a single search; the batch statement passes its own
+QUERY_VECTOR_SQL = "CAST(:query_vector AS vector)"
+QUERY_TEXT_SQL = ":query_text"
+
+
+def _nearest_sql(
+    metric: Optional[str],
+    storage: str,
+    coarse_dimensions: Optional[int],
+    limit: str,
+    filters: Tuple[str, ...] = (),
+    exact: bool = False,
+    embedding_model: Optional[str] = None,
+    query_vector: str = QUERY_VECTOR_SQL
+) -> str:
+    """Nearest-neighbour subquery returning (chunk_id, distance) for the limit closest embeddings.
+
+    With full storage it orders by the bare distance operator on
+    chunk_embeddings alone, which is the shape the pgvector ANN index can
+    serve. With compact storage it runs in two phases: the ANN search orders
+    by the compact expression (matching the expression index) and keeps
+    :coarse_candidates rows, which are then reranked by the exact distance on
+    the full-precision vectors. exact orders by an expression no ANN index
+    matches, so the filtered rows are scanned and sorted exactly.
+    """
+    operator = get_distance_operator(metric)
+    where = f"{_model_sql(embedding_model)}{_filter_sql(filters, 'e')}"
+    if exact or storage == "full":
+        order = f"e.embedding {operator} {query_vector}"
+        return f"""
+            SELECT
+                e.chunk_id,
+                e.embedding {operator} {query_vector} AS distance
+            FROM chunk_embeddings e
+            WHERE {where}
+            ORDER BY {f"({order}) + 0" if exact else order}
+            LIMIT {limit}
+        """
+
+    coarse_operator = get_coarse_operator(metric, storage)
+    return f"""
+            SELECT
+                coarse.chunk_id,
+                coarse.embedding {operator} {query_vector} AS distance
+            FROM (
+                SELECT e.chunk_id, e.embedding
+                FROM chunk_embeddings e
+                WHERE {where}
+                ORDER BY {compact_expression("e.embedding", storage, coarse_dimensions)} {coarse_operator}
+                    {compact_expression(query_vector, storage, coarse_dimensions)}
+                LIMIT :coarse_candidates
+            ) coarse
+            ORDER BY distance
+            LIMIT {limit}
+        """
+
+
+@lru_cache(maxsize=None)
+def _build_search_sql(
+    metric: Optional[str] = None,
+    storage: str = "full",
+    coarse_dimensions: Optional[int] = None,
+    filters: Tuple[str, ...] = (),
+    exact: bool = False,
+    ids_only: bool = False,
+    embedding_model: Optional[str] = None,
+    query_vector: str = QUERY_VECTOR_SQL,
+    with_position: bool = False
+):
+    """Build the similarity search statement for a distance metric and vector storage.
+
+    The nearest-neighbour subquery touches chunk_embeddings alone (see
+    _nearest_sql), filters included; chunk content is joined only for the
+    top_k winners. ids_only returns just the subquery's (chunk_id, distance)
+    rows, for two-step retrieval.
+
+    The query vector is a bound parameter, so the SQL text is constant per
+    metric and embedding model: asyncpg prepares it once per connection and
+    reuses the plan, and the vector travels in pgvector's binary format (see
+    session.py). The model is part of the text (see _model_sql) so that
+    reused plan can be served by the model's partial ANN index.
+
+    query_vector replaces the bound query vector with another expression, and
+    with_position adds each row's rank as a position column (both for
+    _build_batch_sql).
+    """
+    nearest = _nearest_sql(
+        metric, storage, coarse_dimensions, ":limit", filters, exact, embedding_model, query_vector
+    )
+    position = ",\n            row_number() OVER (ORDER BY nn.distance, nn.chunk_id) AS position"
+    if ids_only:
+        if not with_position:
+            return text(nearest)
+        return text(f"SELECT nn.chunk_id, nn.distance{position} FROM ({nearest}) nn")
+    return text(f"""
+        SELECT
+            c.chunk_id,
+            c.content,
+            c.source_file,
+            c.category,
+            nn.distance{position if with_position else ""}
+        FROM ({nearest}) nn
+        JOIN document_chunks c ON nn.chunk_id = c.chunk_id
+        ORDER BY nn.distance
+    """)
+
+
+@lru_cache(maxsize=None)
+def _build_hybrid_sql(
+    metric: Optional[str] = None,
+    storage: str = "full",
+    coarse_dimensions: Optional[int] = None,
+    filters: Tuple[str, ...] = (),
+    exact: bool = False,
+    ids_only: bool = False,
+    embedding_model: Optional[str] = None,
+    query_vector: str = QUERY_VECTOR_SQL,
+    query_text: str = QUERY_TEXT_SQL,
+    with_position: bool = False
+):
+    """Build the hybrid search statement: vector + full-text, fused in one round trip.
+
+    Two rankings are computed side by side, each cut to :candidates rows:
+    the ANN subquery (same index-friendly shape as _build_search_sql) and a
+    full-text ranking over the GIN-indexed content_tsv column. They are merged
+    with reciprocal rank fusion, score = sum(1 / (:rrf_k + rank)), so exact
+    matches on names and acronyms ("Civis", "pgvector") surface even when
+    their embeddings aren't the closest.
+
+    Rows come back in fused order; the last column is still the vector
+    distance (computed for full-text-only hits) so callers see the same shape
+    as pure vector search. ids_only returns (chunk_id, distance) rows without
+    joining document_chunks for the winners (two-step retrieval). query_vector,
+    query_text and with_position are as for _build_search_sql; the position
+    is the fused rank.
+    """
+    operator = get_distance_operator(metric)
+    nearest = _nearest_sql(
+        metric, storage, coarse_dimensions, ":candidates", filters, exact, embedding_model, query_vector
+    )
+    position = ",\n            row_number() OVER (ORDER BY f.score DESC, f.chunk_id) AS position"
+    if ids_only:
+        columns, join = "f.chunk_id,", ""
+    else:
+        columns = "c.chunk_id,\n            c.content,\n            c.source_file,\n            c.category,"
+        join = "JOIN document_chunks c ON c.chunk_id = f.chunk_id"
+
+    return text(f"""
+        SELECT
+            {columns}
+            COALESCE(
+                f.distance,
+                (SELECT e.embedding {operator} {query_vector}
+                 FROM chunk_embeddings e
+                 WHERE e.chunk_id = f.chunk_id AND {_model_sql(embedding_model)})
+            ) AS distance{position if with_position else ""}
+        FROM (
+            SELECT
+                hits.chunk_id,
+                SUM(1.0 / (:rrf_k + hits.rank)) AS score,
+                MIN(hits.distance) AS distance
+            FROM (
+                SELECT
+                    nn.chunk_id,
+                    nn.distance,
+                    row_number() OVER (ORDER BY nn.distance) AS rank
+                FROM ({nearest}) nn
+                UNION ALL
+                SELECT
+                    lx.chunk_id,
+                    NULL,
+                    row_number() OVER (ORDER BY lx.score DESC) AS rank
+                FROM (
+                    SELECT
+                        c.chunk_id,
+                        ts_rank_cd(c.content_tsv, ts.query) AS score
+                    FROM document_chunks c,
+                        -- OR the terms together: a question rarely contains every word of its answer
+                        (SELECT replace(plainto_tsquery('english', {query_text})::text, '&', '|')::tsquery AS query) ts
+                    WHERE c.content_tsv @@ ts.query{_filter_sql(filters, "c")}
+                    ORDER BY score DESC
+                    LIMIT :candidates
+                ) lx
+            ) hits
+            GROUP BY hits.chunk_id
+            ORDER BY score DESC, hits.chunk_id
+            LIMIT :limit
+        ) f
+        {join}
+        ORDER BY f.score DESC, f.chunk_id
+    """)
+
+
+@lru_cache(maxsize=None)
+def _build_batch_sql(
+    metric: Optional[str] = None,
+    mode: str = "vector",
+    storage: str = "full",
+    coarse_dimensions: Optional[int] = None,
+    filters: Tuple[str, ...] = (),
+    ids_only: bool = False,
+    embedding_model: Optional[str] = None
+):
+    """Build a statement that runs the single-query search for many queries at once.
+
+    The query vectors and texts arrive as two arrays; each (vector, text) pair
+    drives one LATERAL evaluation of the normal vector or hybrid statement,
+    built with the unnested columns in place of its parameters, so every query
+    still gets its own index-served top-k, in one round trip. Vectors are bound
+    as a vector[] in pgvector's binary format, like the single-query vector.
+
+    Returns rows of (query_ordinal, chunk_id, content, source_file, category,
+    distance), or (query_ordinal, chunk_id, distance) with ids_only, in query
+    order and then in each query's ranking order (the position each statement
+    computes, since a subquery's ORDER BY doesn't carry through the join).
+    """
+    if mode == "hybrid":
+        single = _build_hybrid_sql(
+            metric, storage, coarse_dimensions, filters, ids_only=ids_only, embedding_model=embedding_model,
+            query_vector="queries.query_vector", query_text="queries.query_text", with_position=True
+        )
+    else:
+        single = _build_search_sql(
+            metric, storage, coarse_dimensions, filters, ids_only=ids_only, embedding_model=embedding_model,
+            query_vector="queries.query_vector", with_position=True
+        )
+
+    columns = ("chunk_id", "distance") if ids_only else ("chunk_id", "content", "source_file", "category", "distance")
+    select_list = ",\n            ".join(f"per_query.{column}" for column in columns)
+
+    return text(f"""
+        SELECT
+            queries.ord,
+            {select_list}
+        FROM unnest(CAST(:query_vectors AS vector[]), CAST(:query_texts AS text[]))
+            WITH ORDINALITY AS queries(query_vector, query_text, ord)
+        CROSS JOIN LATERAL ({single.text}) per_query
+        ORDER BY queries.ord, per_query.position
+    """)
+
+
+def _coarse_params(params: Dict[str, Any], storage: str) -> Dict[str, Any]:
+    """Add the coarse candidate count when compact storage searches in two phases."""
+    if storage != "full":
+        nearest = params.get("candidates", params["limit"])
+        params["coarse_candidates"] = max(settings.VECTOR_COARSE_CANDIDATES, nearest)
+    return params
+
+
+def _search_statement(query: str, query_vector: Any, embedding_model: str, top_k: int,
+                      metric: Optional[str], mode: Optional[str], storage: Optional[str] = None,
+                      coarse_dimensions: Optional[int] = None, filters: Optional[Dict[str, List[str]]] = None,
+                      exact: bool = False, ids_only: bool = False):
+    """Pick the statement for a retrieval mode, vector storage and filters and build its parameters.
+
+    exact searches the full-precision vectors without the ANN index (the
+    fallback for filtered searches that came back short). ids_only returns
+    (chunk_id, distance) rows for two-step retrieval.
+    """
+    mode = mode or settings.RETRIEVAL_MODE
+    storage = "full" if exact else storage or settings.VECTOR_STORAGE
+    coarse_dimensions = None if exact else coarse_dimensions or settings.VECTOR_COARSE_DIMENSIONS
+    filters = filters or {}
+    params = {
+        "query_vector": query_vector,
+        "limit": top_k,
+        **filters
+    }
+    if mode == "hybrid":
+        params.update(
+            query_text=query,
+            candidates=max(settings.HYBRID_CANDIDATES, top_k),
+            rrf_k=settings.HYBRID_RRF_K
+        )
+        statement = _build_hybrid_sql(
+            metric, storage, coarse_dimensions, tuple(filters), exact, ids_only, embedding_model
+        )
+    else:
+        statement = _build_search_sql(
+            metric, storage, coarse_dimensions, tuple(filters), exact, ids_only, embedding_model
+        )
+    return statement, _coarse_params(params, storage)
+
+
+async def _aexact_search(
+    session: AsyncSession,
+    query: str,
+    query_embedding: List[float],
+    embedding_model: str,
+    top_k: int,
+    metric: Optional[str],
+    mode: Optional[str],
+    filters: Dict[str, List[str]],
+    ids_only: bool = False
+) -> List[Tuple]:
+    """Re-run a filtered search that came back short as an exact scan of the matching rows."""
+    statement, params = _search_statement(
+        query, Vector(query_embedding), embedding_model, top_k, metric, mode, filters=filters, exact=True,
+        ids_only=ids_only
+    )
+    result = await session.execute(statement, params)
+    return result.fetchall()
 
 
 def retrieve_chunks(
     query: str,
     session: Session,
     top_k: int = 5,
-    embedding_model: str = "text-embedding-3-small"
+    embedding_model: str = "text-embedding-3-small",
+    metric: Optional[str] = None,
+    probes: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    query_embedding: Optional[List[float]] = None,
+    timings: Optional[Dict[str, float]] = None,
+    mode: Optional[str] = None,
+    backend: Optional[str] = None,
+    categories: Optional[Sequence[str]] = None,
+    source_files: Optional[Sequence[str]] = None,
+    fetch: Optional[str] = None
 ) -> List[Tuple[int, str, str, str, float]]:
     """Retrieve most relevant chunks for a query.
 
@@ -21,36 +423,299 @@ def retrieve_chunks(
         session: Database session
         top_k: Number of chunks to retrieve
         embedding_model: OpenAI embedding model to use
+        metric: Distance metric (defaults to settings.VECTOR_DISTANCE_METRIC)
+        probes: IVFFlat probes for this query (defaults to settings)
+        ef_search: HNSW ef_search for this query (defaults to settings)
+        query_embedding: Precomputed query embedding (skips embedding the query)
+        timings: Optional dict filled with embed_ms / search_ms latencies
+        mode: "vector" or "hybrid" (defaults to settings.RETRIEVAL_MODE)
+        backend: "postgres" or "memory" (defaults to settings.RETRIEVAL_BACKEND);
+            the in-memory index is vector-only, exact, and ignores mode, probes and ef_search
+        categories: Only retrieve chunks in these categories
+        source_files: Only retrieve chunks from these source files
+        fetch: "join" or "two_step" (defaults to settings.RETRIEVAL_FETCH); how the
+            postgres backend gets chunk content
 
     Returns:
-        List of (chunk_id, content, source_file, category, distance) tuples
+        List of (chunk_id, content, source_file, category, distance) tuples; top_k
+        of them whenever at least top_k chunks match the filters
     """
-    # Generate query embedding
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    response = client.embeddings.create(
-        model=embedding_model,
-        input=query
-    )
-    query_embedding = response.data[0].embedding
+    # Generate query embedding (cached for repeated questions)
+    start = time.perf_counter()
+    if query_embedding is None:
+        with span("embed", {"embedding.model": embedding_model}):
+            query_embedding = embed_query(query, embedding_model)
+        _record(timings, "embed_ms", start)
 
-    # Convert to PostgreSQL vector format
-    vector_str = '[' + ','.join(map(str, query_embedding)) + ']'
+    start = time.perf_counter()
+    backend = backend or settings.RETRIEVAL_BACKEND
+    filters = _filters(categories, source_files)
+    with _search_span(backend, mode, top_k, filters=filters) as search_span:
+        if backend == "memory":
+            index = get_memory_index(embedding_model, metric)
+            index.refresh(session)  # No-op unless the content version changed
+            results = index.search(query_embedding, top_k, filters)
+        else:
+            two_step = (fetch or settings.RETRIEVAL_FETCH) == "two_step"
+            search_span.set_attribute("retrieval.fetch", "two_step" if two_step else "join")
+            session.execute(search_tuning_sql(probes=probes, ef_search=ef_search))
+            iterative = iterative_scan_sql(pgvector_version=get_pgvector_version(session)) if filters else None
+            if iterative is not None:
+                session.execute(iterative)
+            # psycopg2 has no binary parameters; pgvector's text form is the best it can do
+            vector = Vector(query_embedding).to_text()
+            statement, params = _search_statement(
+                query, vector, embedding_model, top_k, metric, mode, filters=filters, ids_only=two_step
+            )
+            search_span.set_attribute("db.statement", statement.text)
+            results = session.execute(statement, params).fetchall()
+            if filters and len(results) < top_k:
+                search_span.set_attribute("retrieval.exact_fallback", True)
+                statement, params = _search_statement(
+                    query, vector, embedding_model, top_k, metric, mode, filters=filters, exact=True,
+                    ids_only=two_step
+                )
+                results = session.execute(statement, params).fetchall()
+            if two_step:
+                results = attach_content(session, results)
+        search_span.set_attribute("retrieval.rows", len(results))
+    _record(timings, "search_ms", start)
+    return results
 
-    # Search using l2_distance (Supabase pgvector requirement)
-    # Note: For normalized embeddings (OpenAI's), L2 and cosine distance rank identically
-    sql = text(f"""
-        SELECT
-            c.chunk_id,
-            c.content,
-            c.source_file,
-            c.category,
-            l2_distance(e.embedding, '{vector_str}'::vector) AS distance
-        FROM chunk_embeddings e
-        JOIN document_chunks c ON e.chunk_id = c.chunk_id
-        WHERE e.embedding_model = :model
-        ORDER BY distance
-        LIMIT :limit
-    """)
 
-    results = session.execute(sql, {"model": embedding_model, "limit": top_k}).fetchall()
+async def aretrieve_chunks(
+    query: str,
+    session: AsyncSession,
+    top_k: int = 5,
+    embedding_model: str = "text-embedding-3-small",
+    metric: Optional[str] = None,
+    probes: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    query_embedding: Optional[List[float]] = None,
+    timings: Optional[Dict[str, float]] = None,
+    mode: Optional[str] = None,
+    backend: Optional[str] = None,
+    categories: Optional[Sequence[str]] = None,
+    source_files: Optional[Sequence[str]] = None,
+    fetch: Optional[str] = None
+) -> List[Tuple[int, str, str, str, float]]:
+    """Async variant of retrieve_chunks for the API request path.
+
+    Awaits both the embeddings call and the database query so the event
+    loop stays free to serve other requests while this one waits on I/O.
+
+    Args:
+        query: User's question
+        session: Async database session
+        top_k: Number of chunks to retrieve
+        embedding_model: OpenAI embedding model to use
+        metric: Distance metric (defaults to settings.VECTOR_DISTANCE_METRIC)
+        probes: IVFFlat probes for this query (defaults to settings)
+        ef_search: HNSW ef_search for this query (defaults to settings)
+        query_embedding: Precomputed query embedding (skips embedding the query)
+        timings: Optional dict filled with embed_ms / search_ms latencies
+        mode: "vector" or "hybrid" (defaults to settings.RETRIEVAL_MODE)
+        backend: "postgres" or "memory" (defaults to settings.RETRIEVAL_BACKEND);
+            the in-memory index is vector-only, exact, and ignores mode, probes and ef_search
+        categories: Only retrieve chunks in these categories
+        source_files: Only retrieve chunks from these source files
+        fetch: "join" or "two_step" (defaults to settings.RETRIEVAL_FETCH); how the
+            postgres backend gets chunk content
+
+    Returns:
+        List of (chunk_id, content, source_file, category, distance) tuples; top_k
+        of them whenever at least top_k chunks match the filters
+    """
+    # Generate query embedding (cached for repeated questions)
+    start = time.perf_counter()
+    if query_embedding is None:
+        with span("embed", {"embedding.model": embedding_model}):
+            query_embedding = await aembed_query(query, embedding_model)
+        _record(timings, "embed_ms", start)
+
+    start = time.perf_counter()
+    backend = backend or settings.RETRIEVAL_BACKEND
+    filters = _filters(categories, source_files)
+    with _search_span(backend, mode, top_k, filters=filters) as search_span:
+        if backend == "memory":
+            index = get_memory_index(embedding_model, metric)
+            await index.arefresh(session)  # No-op unless the content version changed
+            rows = index.search(query_embedding, top_k, filters)
+        else:
+            two_step = (fetch or settings.RETRIEVAL_FETCH) == "two_step"
+            search_span.set_attribute("retrieval.fetch", "two_step" if two_step else "join")
+            await session.execute(search_tuning_sql(probes=probes, ef_search=ef_search))
+            iterative = None
+            if filters:
+                iterative = iterative_scan_sql(pgvector_version=await aget_pgvector_version(session))
+            if iterative is not None:
+                await session.execute(iterative)
+            # Encoded by the asyncpg binary codec registered on every connection
+            statement, params = _search_statement(
+                query, Vector(query_embedding), embedding_model, top_k, metric, mode, filters=filters,
+                ids_only=two_step
+            )
+            search_span.set_attribute("db.statement", statement.text)
+            result = await session.execute(statement, params)
+            rows = result.fetchall()
+            if filters and len(rows) < top_k:
+                search_span.set_attribute("retrieval.exact_fallback", True)
+                rows = await _aexact_search(
+                    session, query, query_embedding, embedding_model, top_k, metric, mode, filters, two_step
+                )
+            if two_step:
+                rows = await aattach_content(session, rows)
+        search_span.set_attribute("retrieval.rows", len(rows))
+    _record(timings, "search_ms", start)
+    return rows
+
+
+async def aretrieve_chunks_batch(
+    queries: List[str],
+    session: AsyncSession,
+    top_k: int = 5,
+    embedding_model: str = "text-embedding-3-small",
+    metric: Optional[str] = None,
+    probes: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    query_embeddings: Optional[List[List[float]]] = None,
+    timings: Optional[Dict[str, float]] = None,
+    mode: Optional[str] = None,
+    backend: Optional[str] = None,
+    categories: Optional[Sequence[str]] = None,
+    source_files: Optional[Sequence[str]] = None,
+    fetch: Optional[str] = None
+) -> List[List[Tuple[int, str, str, str, float]]]:
+    """Retrieve chunks for many queries with one embeddings call and one SQL statement.
+
+    Args:
+        queries: User questions
+        session: Async database session
+        top_k: Number of chunks to retrieve per query
+        embedding_model: OpenAI embedding model to use
+        metric: Distance metric (defaults to settings.VECTOR_DISTANCE_METRIC)
+        probes: IVFFlat probes (defaults to settings)
+        ef_search: HNSW ef_search (defaults to settings)
+        query_embeddings: Precomputed embeddings, one per query (skips embedding)
+        timings: Optional dict filled with embed_ms / search_ms for the whole batch
+        mode: "vector" or "hybrid" (defaults to settings.RETRIEVAL_MODE)
+        backend: "postgres" or "memory" (defaults to settings.RETRIEVAL_BACKEND)
+        categories: Only retrieve chunks in these categories (every query)
+        source_files: Only retrieve chunks from these source files (every query)
+        fetch: "join" or "two_step" (defaults to settings.RETRIEVAL_FETCH); with
+            two_step, content for the whole batch is looked up once
+
+    Returns:
+        One list of (chunk_id, content, source_file, category, distance) tuples per query
+    """
+    if not queries:
+        return []
+
+    start = time.perf_counter()
+    if query_embeddings is None:
+        with span("embed", {"embedding.model": embedding_model, "embedding.queries": len(queries)}):
+            query_embeddings = await aembed_queries(queries, embedding_model)
+        _record(timings, "embed_ms", start)
+
+    start = time.perf_counter()
+    backend = backend or settings.RETRIEVAL_BACKEND
+    filters = _filters(categories, source_files)
+    with _search_span(backend, mode, top_k, len(queries), filters) as search_span:
+        if backend == "memory":
+            index = get_memory_index(embedding_model, metric)
+            await index.arefresh(session)
+            results = [index.search(embedding, top_k, filters) for embedding in query_embeddings]
+        else:
+            two_step = (fetch or settings.RETRIEVAL_FETCH) == "two_step"
+            search_span.set_attribute("retrieval.fetch", "two_step" if two_step else "join")
+            await session.execute(search_tuning_sql(probes=probes, ef_search=ef_search))
+            iterative = None
+            if filters:
+                iterative = iterative_scan_sql(pgvector_version=await aget_pgvector_version(session))
+            if iterative is not None:
+                await session.execute(iterative)
+            mode = mode or settings.RETRIEVAL_MODE
+            params = {
+                "query_vectors": [Vector(embedding) for embedding in query_embeddings],
+                "query_texts": list(queries),
+                "limit": top_k,
+                **filters
+            }
+            if mode == "hybrid":
+                params.update(candidates=max(settings.HYBRID_CANDIDATES, top_k), rrf_k=settings.HYBRID_RRF_K)
+            _coarse_params(params, settings.VECTOR_STORAGE)
+            statement = _build_batch_sql(
+                metric, mode, settings.VECTOR_STORAGE, settings.VECTOR_COARSE_DIMENSIONS, tuple(filters), two_step,
+                embedding_model
+            )
+            search_span.set_attribute("db.statement", statement.text)
+            result = await session.execute(statement, params)
+
+            results: List[List[Tuple]] = [[] for _ in queries]
+            for ordinal, *row in result.fetchall():
+                results[ordinal - 1].append(tuple(row))
+            for i, rows in enumerate(results):
+                if filters and len(rows) < top_k:
+                    search_span.set_attribute("retrieval.exact_fallback", True)
+                    results[i] = await _aexact_search(
+                        session, queries[i], query_embeddings[i], embedding_model, top_k, metric, mode, filters,
+                        two_step
+                    )
+            if two_step:
+                fields = await aget_chunk_fields(session, [row[0] for rows in results for row in rows])
+                results = [with_content(rows, fields) for rows in results]
+        search_span.set_attribute("retrieval.rows", sum(len(rows) for rows in results))
+    _record(timings, "search_ms", start)
     return results
+
+
+def explain_search(
+    session: Session,
+    query_embedding: List[float],
+    top_k: int = 5,
+    embedding_model: str = "text-embedding-3-small",
+    metric: Optional[str] = None,
+    index_type: Optional[str] = None,
+    mode: Optional[str] = None,
+    query: str = "experience",
+    storage: Optional[str] = None,
+    coarse_dimensions: Optional[int] = None,
+    categories: Optional[Sequence[str]] = None,
+    source_files: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """Run EXPLAIN on the retrieval query and report whether an ANN index serves it.
+
+    Args:
+        session: Database session
+        query_embedding: Any vector with the right dimensions
+        top_k: LIMIT used by the search
+        embedding_model: Model filter used by the search
+        metric: Distance metric (defaults to settings.VECTOR_DISTANCE_METRIC)
+        index_type: Index type whose search setting to apply (defaults to settings)
+        mode: "vector" or "hybrid" (defaults to settings.RETRIEVAL_MODE)
+        query: Query text for the full-text side of hybrid search
+        storage: full, halfvec or binary (defaults to settings.VECTOR_STORAGE)
+        coarse_dimensions: Leading dimensions of the compact index (defaults to settings)
+        categories: Category filter to explain
+        source_files: Source file filter to explain
+
+    Returns:
+        Dict with 'uses_vector_index', 'index_names' and the raw 'plan'
+    """
+    filters = _filters(categories, source_files)
+    session.execute(search_tuning_sql(index_type=index_type, storage=storage))
+    iterative = iterative_scan_sql(index_type, get_pgvector_version(session)) if filters else None
+    if iterative is not None:
+        session.execute(iterative)
+    statement, params = _search_statement(
+        query, Vector(query_embedding).to_text(), embedding_model, top_k, metric, mode, storage, coarse_dimensions,
+        filters, ids_only=settings.RETRIEVAL_FETCH == "two_step"
+    )
+    explain = text(f"EXPLAIN (FORMAT JSON) {statement.text}")
+    plan = session.execute(explain, params).scalar()[0]["Plan"]
+
+    return {
+        "uses_vector_index": uses_vector_index(plan),
+        "index_names": find_index_scans(plan),
+        "plan": plan,
+    }
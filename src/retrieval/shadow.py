@@ -0,0 +1,152 @@
+"""Shadow retrieval: try candidate embedding models on live queries, off the request path.
+
+For each shadow model in the registry (see src/database/model_registry.py),
+a SHADOW_SAMPLE_RATE fraction of /query requests is retrieved a second time
+with that model in a background task, on its own database session, after the
+response no longer depends on it. The shadow result is compared with what
+the active model retrieved for the same query:
+
+- overlap: fraction of the active model's chunks the shadow model also found
+- top1: whether both put the same chunk first
+- embed / search latency of the shadow model
+
+Results are aggregated per model (GET /models) and exported as Prometheus
+histograms (rag_shadow_overlap, rag_shadow_duration_seconds). At most
+SHADOW_MAX_PENDING shadow retrievals run at once per worker; samples beyond
+that are skipped and counted, so shadowing can never pile up behind a slow
+model.
+
+Usage:
+    get_shadow_runner().submit(query, chunks, top_k, shadow_models(models), AsyncSessionLocal)
+"""
+
+import asyncio
+import random
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from src.config import settings
+from src.observability import record_shadow, span
+from src.retrieval.search import aretrieve_chunks
+
+
+class ShadowRunner:
+    """Schedules sampled shadow retrievals and aggregates how they compare."""
+
+    def __init__(self, sample_rate: float, max_pending: int):
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self.skipped = 0
+
+    def submit(
+        self,
+        query: str,
+        primary_chunks: Sequence[tuple],
+        top_k: int,
+        models: List[Dict[str, Any]],
+        session_factory: Callable,
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> int:
+        """Start a shadow retrieval for each sampled shadow model (never blocks).
+
+        Args:
+            query: The user's question
+            primary_chunks: What the active model retrieved (chunk_id first)
+            top_k: How many chunks the active model was asked for
+            models: Shadow models from the registry
+            session_factory: Opens an AsyncSession for the background task
+            filters: categories / source_files the active model's search used
+
+        Returns:
+            Number of shadow retrievals started
+        """
+        primary_ids = [chunk[0] for chunk in primary_chunks]
+        started = 0
+        for model in models:
+            if random.random() >= self.sample_rate:
+                continue
+            if len(self._tasks) >= self.max_pending:
+                self.skipped += 1
+                continue
+            task = asyncio.create_task(self._run(query, primary_ids, top_k, model, session_factory, filters or {}))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            started += 1
+        return started
+
+    async def _run(
+        self,
+        query: str,
+        primary_ids: List[int],
+        top_k: int,
+        model: Dict[str, Any],
+        session_factory: Callable,
+        filters: Dict[str, List[str]]
+    ) -> None:
+        name = model["name"]
+        stats = self._stats.setdefault(name, {
+            "queries": 0, "errors": 0, "overlap_sum": 0.0, "top1_matches": 0, "embed_ms_sum": 0.0, "search_ms_sum": 0.0
+        })
+        timings: Dict[str, float] = {}
+        try:
+            with span("shadow.retrieve", {"embedding.model": name, "retrieval.top_k": top_k}) as shadow_span:
+                async with session_factory() as session:
+                    chunks = await aretrieve_chunks(
+                        query, session, top_k=top_k, embedding_model=name, metric=model["metric"], timings=timings,
+                        **filters
+                    )
+                shadow_ids = [chunk[0] for chunk in chunks]
+                overlap = len(set(primary_ids) & set(shadow_ids)) / len(primary_ids) if primary_ids else 1.0
+                shadow_span.set_attribute("shadow.overlap", overlap)
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"Warning: Shadow retrieval with {name} failed: {e}")
+            return
+
+        stats["queries"] += 1
+        stats["overlap_sum"] += overlap
+        stats["top1_matches"] += bool(primary_ids and shadow_ids and primary_ids[0] == shadow_ids[0])
+        stats["embed_ms_sum"] += timings.get("embed_ms", 0.0)
+        stats["search_ms_sum"] += timings.get("search_ms", 0.0)
+        if settings.METRICS_ENABLED:
+            record_shadow(name, overlap, timings)
+
+    async def drain(self, timeout: Optional[float] = 5.0) -> None:
+        """Wait for in-flight shadow retrievals (API shutdown); cancel what's left after timeout."""
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-model comparison with the active model, plus scheduling counters."""
+        models = {}
+        for name, stats in self._stats.items():
+            queries = stats["queries"]
+            models[name] = {
+                "queries": queries,
+                "errors": stats["errors"],
+                "mean_overlap": stats["overlap_sum"] / queries if queries else None,
+                "top1_agreement": stats["top1_matches"] / queries if queries else None,
+                "mean_embed_ms": stats["embed_ms_sum"] / queries if queries else None,
+                "mean_search_ms": stats["search_ms_sum"] / queries if queries else None,
+            }
+        return {
+            "sample_rate": self.sample_rate,
+            "pending": len(self._tasks),
+            "skipped": self.skipped,
+            "models": models,
+        }
+
+
+_runner: Optional[ShadowRunner] = None
+
+
+def get_shadow_runner() -> ShadowRunner:
+    """Get the process-wide shadow runner (configured from settings)."""
+    global _runner
+    if _runner is None:
+        _runner = ShadowRunner(settings.SHADOW_SAMPLE_RATE, settings.SHADOW_MAX_PENDING)
+    return _runner
@@ -0,0 +1,338 @@
+"""pgvector ANN index configuration: distance metrics, index DDL and plan checks.
+
+The retrieval SQL, the index operator class and the distance metric must agree,
+otherwise Postgres silently falls back to a sequential scan. This module is the
+single place that maps a metric to its operator and operator class.
+
+Compact storage (VECTOR_STORAGE=halfvec or binary) indexes an expression over
+the full-precision column instead of the column itself: the embedding cast to
+half precision, or binary-quantized to one bit per dimension, optionally cut
+to its first VECTOR_COARSE_DIMENSIONS dimensions. text-embedding-3 vectors are
+trained so that a prefix is itself a usable embedding (it is what the API's
+`dimensions` parameter returns, before re-normalization, which neither cosine
+ranking nor sign bits depend on). The index, which is what ANN search walks,
+shrinks accordingly, while the full vectors stay in the table for the exact
+rerank of the coarse candidates.
+
+With more than one embedding model in chunk_embeddings (see
+src/database/model_registry.py), each model gets its own partial index
+(WHERE embedding_model = '...'). A shared index would hand back the nearest
+rows of every model and leave fewer than top_k after the model filter.
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import settings
+
+
+# metric -> distance operator and the index operator class that serves it
+# Note: <#> returns the *negative* inner product so that ascending order is best-first
+DISTANCE_METRICS: Dict[str, Dict[str, str]] = {
+    "cosine": {"operator": "<=>", "opclass": "vector_cosine_ops"},
+    "inner_product": {"operator": "<#>", "opclass": "vector_ip_ops"},
+    "l2": {"operator": "<->", "opclass": "vector_l2_ops"},
+}
+
+INDEX_TYPES = ("hnsw", "ivfflat")
+
+VECTOR_STORAGES = ("full", "halfvec", "binary")
+
+# metric -> operator class for the halfvec expression index (operators are unchanged)
+HALFVEC_OPCLASSES: Dict[str, str] = {
+    "cosine": "halfvec_cosine_ops",
+    "inner_product": "halfvec_ip_ops",
+    "l2": "halfvec_l2_ops",
+}
+
+# Binary-quantized vectors are compared by Hamming distance whatever the metric
+BINARY_OPERATOR = "<~>"
+BINARY_OPCLASS = "bit_hamming_ops"
+
+# Postgres truncates identifiers longer than this
+MAX_IDENTIFIER_LENGTH = 63
+
+# Index bytes per stored vector element, by storage
+STORAGE_BYTES_PER_DIMENSION: Dict[str, float] = {"full": 4, "halfvec": 2, "binary": 1 / 8}
+
+# First pgvector release with halfvec, binary_quantize and subvector (compact storage)
+COMPACT_STORAGE_MIN_VERSION = (0, 7)
+
+# First pgvector release with hnsw.iterative_scan / ivfflat.iterative_scan
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+
+PGVECTOR_VERSION_SQL = text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+
+# Installed pgvector version, read once per process
+_pgvector_version: Optional[Tuple[int, ...]] = None
+
+
+def get_distance_operator(metric: Optional[str] = None) -> str:
+    """Get the pgvector distance operator for a metric (defaults to settings)."""
+    metric = metric or settings.VECTOR_DISTANCE_METRIC
+    if metric not in DISTANCE_METRICS:
+        raise ValueError(f"Unknown distance metric: {metric}")
+    return DISTANCE_METRICS[metric]["operator"]
+
+
+def get_index_name(
+    metric: str,
+    index_type: str,
+    storage: str = "full",
+    coarse_dimensions: Optional[int] = None,
+    embedding_model: Optional[str] = None
+) -> str:
+    """Name of the ANN index for a metric/index type (and compact storage, and model) combination."""
+    if storage == "full":
+        name = f"idx_embedding_vector_{index_type}_{metric}"
+    else:
+        if storage == "binary":
+            metric = "hamming"
+        name = f"idx_embedding_vector_{storage}{coarse_dimensions or ''}_{index_type}_{metric}"
+    if embedding_model is None:
+        return name
+
+    name = f"{name}_{re.sub(r'[^a-z0-9]+', '_', embedding_model.lower()).strip('_')}"
+    if len(name) > MAX_IDENTIFIER_LENGTH:
+        # Keep names unique (and stable) once truncated
+        digest = hashlib.sha1(embedding_model.encode("utf-8")).hexdigest()[:8]
+        name = f"{name[:MAX_IDENTIFIER_LENGTH - 9]}_{digest}"
+    return name
+
+
+def model_predicate(embedding_model: str) -> str:
+    """WHERE clause of a model's partial index (the name as a quoted literal)."""
+    return "embedding_model = '" + embedding_model.replace("'", "''") + "'"
+
+
+def compact_expression(vector_sql: str, storage: str, coarse_dimensions: Optional[int] = None) -> str:
+    """SQL for the compact form of a full-precision vector expression.
+
+    Used both in the expression index and in the coarse ORDER BY, which must
+    match it exactly for the planner to use the index.
+
+    Args:
+        vector_sql: Expression of type vector(EMBEDDING_DIMENSIONS)
+        storage: halfvec or binary
+        coarse_dimensions: Keep only this many leading dimensions (None = all)
+    """
+    if storage not in VECTOR_STORAGES or storage == "full":
+        raise ValueError(f"Unknown compact vector storage: {storage}")
+    dimensions = int(coarse_dimensions or settings.EMBEDDING_DIMENSIONS)
+    if coarse_dimensions:
+        vector_sql = f"subvector({vector_sql}, 1, {dimensions})"
+    if storage == "halfvec":
+        return f"({vector_sql})::halfvec({dimensions})"
+    return f"binary_quantize({vector_sql})::bit({dimensions})"
+
+
+def get_coarse_operator(metric: Optional[str], storage: str) -> str:
+    """Distance operator for the coarse (compact) search phase."""
+    return BINARY_OPERATOR if storage == "binary" else get_distance_operator(metric)
+
+
+def bytes_per_vector(storage: str, dimensions: int) -> float:
+    """Bytes one indexed vector takes for a storage (element data only, no tuple overhead)."""
+    return STORAGE_BYTES_PER_DIMENSION[storage] * dimensions
+
+
+def create_index_sql(
+    metric: str,
+    index_type: str,
+    lists: int = 100,
+    m: int = 16,
+    ef_construction: int = 64,
+    embedding_model: Optional[str] = None,
+    concurrently: bool = False
+) -> str:
+    """Build the CREATE INDEX statement for chunk_embeddings.embedding.
+
+    Args:
+        metric: cosine, inner_product, or l2
+        index_type: hnsw or ivfflat
+        lists: IVFFlat list count (roughly rows / 1000, min 1)
+        m: HNSW max connections per layer
+        ef_construction: HNSW candidate list size at build time
+        embedding_model: Build a partial index over this model's rows only
+        concurrently: CREATE INDEX CONCURRENTLY (no write lock; must run outside a transaction)
+
+    Returns:
+        SQL string
+    """
+    if metric not in DISTANCE_METRICS:
+        raise ValueError(f"Unknown distance metric: {metric}")
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    opclass = DISTANCE_METRICS[metric]["opclass"]
+    if index_type == "hnsw":
+        options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    else:
+        options = f"lists = {int(lists)}"
+
+    name = get_index_name(metric, index_type, embedding_model=embedding_model)
+    return f"""
+        CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name}
+        ON chunk_embeddings
+        USING {index_type} (embedding {opclass})
+        WITH ({options}){_where(embedding_model)}
+    """
+
+
+def _where(embedding_model: Optional[str]) -> str:
+    return f"\n        WHERE {model_predicate(embedding_model)}" if embedding_model else ""
+
+
+def create_compact_index_sql(
+    metric: str,
+    index_type: str,
+    storage: str,
+    coarse_dimensions: Optional[int] = None,
+    lists: int = 100,
+    m: int = 16,
+    ef_construction: int = 64,
+    embedding_model: Optional[str] = None,
+    concurrently: bool = False
+) -> str:
+    """Build the CREATE INDEX statement for a compact (halfvec / binary) expression index.
+
+    Args:
+        metric: cosine, inner_product, or l2 (binary indexes always use Hamming distance)
+        index_type: hnsw or ivfflat
+        storage: halfvec or binary
+        coarse_dimensions: Index only this many leading dimensions (None = all)
+        lists: IVFFlat list count
+        m: HNSW max connections per layer
+        ef_construction: HNSW candidate list size at build time
+        embedding_model: Build a partial index over this model's rows only
+        concurrently: CREATE INDEX CONCURRENTLY (must run outside a transaction)
+
+    Returns:
+        SQL string
+    """
+    if metric not in DISTANCE_METRICS:
+        raise ValueError(f"Unknown distance metric: {metric}")
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    opclass = BINARY_OPCLASS if storage == "binary" else HALFVEC_OPCLASSES[metric]
+    if index_type == "hnsw":
+        options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    else:
+        options = f"lists = {int(lists)}"
+
+    name = get_index_name(metric, index_type, storage, coarse_dimensions, embedding_model)
+    return f"""
+        CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name}
+        ON chunk_embeddings
+        USING {index_type} (({compact_expression("embedding", storage, coarse_dimensions)}) {opclass})
+        WITH ({options}){_where(embedding_model)}
+    """
+
+
+def model_index_sql(embedding_model: str, metric: str, concurrently: bool = False) -> str:
+    """CREATE INDEX for a model's partial index under the configured index type and storage."""
+    if settings.VECTOR_STORAGE == "full":
+        return create_index_sql(
+            metric, settings.VECTOR_INDEX_TYPE, embedding_model=embedding_model, concurrently=concurrently
+        )
+    return create_compact_index_sql(
+        metric, settings.VECTOR_INDEX_TYPE, settings.VECTOR_STORAGE, settings.VECTOR_COARSE_DIMENSIONS,
+        embedding_model=embedding_model, concurrently=concurrently
+    )
+
+
+def search_tuning_sql(
+    index_type: Optional[str] = None,
+    probes: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    storage: Optional[str] = None
+):
+    """Build the SET LOCAL statement that tunes recall for the next search.
+
+    SET LOCAL only lasts until the end of the current transaction, so the
+    setting never leaks to other requests sharing the pooled connection.
+    With compact storage, ef_search is raised to at least
+    VECTOR_COARSE_CANDIDATES: an HNSW scan returns at most ef_search rows, and
+    the coarse phase needs all of its candidates.
+    """
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    if index_type == "hnsw":
+        value = int(ef_search or settings.HNSW_EF_SEARCH)
+        if (storage or settings.VECTOR_STORAGE) != "full":
+            value = max(value, settings.VECTOR_COARSE_CANDIDATES)
+        return text(f"SET LOCAL hnsw.ef_search = {value}")
+    value = int(probes or settings.IVFFLAT_PROBES)
+    return text(f"SET LOCAL ivfflat.probes = {value}")
+
+
+def iterative_scan_sql(index_type: Optional[str] = None, pgvector_version: Optional[Tuple[int, ...]] = None):
+    """Build the SET LOCAL statement enabling iterative index scans, or None when off.
+
+    A filtered ANN search (category, source file) takes ef_search / probes
+    worth of nearest rows from the index and only then applies the filter,
+    which can leave fewer than top_k. With pgvector 0.8+ iterative scans the
+    index keeps returning rows until enough pass. relaxed_order may return
+    them slightly out of order; the search SQL re-sorts by distance. IVFFlat
+    only supports relaxed_order.
+
+    Also None when pgvector_version is older than 0.8: pgvector reserves the
+    hnsw./ivfflat. prefixes, so setting an unknown parameter would fail the
+    transaction. Search code gets the version from get_pgvector_version.
+    """
+    mode = settings.VECTOR_ITERATIVE_SCAN
+    if mode == "off":
+        return None
+    if pgvector_version is not None and pgvector_version < ITERATIVE_SCAN_MIN_VERSION:
+        return None
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    if index_type == "ivfflat":
+        mode = "relaxed_order"
+    return text(f"SET LOCAL {index_type}.iterative_scan = {mode}")
+
+
+def _parse_version(version: Optional[str]) -> Tuple[int, ...]:
+    """"0.8.0" -> (0, 8, 0); missing extension -> (0,)."""
+    return tuple(int(part) for part in re.findall(r"\d+", version or "0")) or (0,)
+
+
+def get_pgvector_version(session: Session) -> Tuple[int, ...]:
+    """Installed pgvector version (read once per process)."""
+    global _pgvector_version
+    if _pgvector_version is None:
+        _pgvector_version = _parse_version(session.execute(PGVECTOR_VERSION_SQL).scalar())
+    return _pgvector_version
+
+
+async def aget_pgvector_version(session: AsyncSession) -> Tuple[int, ...]:
+    """Async variant of get_pgvector_version for the API request path."""
+    global _pgvector_version
+    if _pgvector_version is None:
+        _pgvector_version = _parse_version((await session.execute(PGVECTOR_VERSION_SQL)).scalar())
+    return _pgvector_version
+
+
+def reset_pgvector_version() -> None:
+    """Forget the memoized version (after upgrading the extension, and in tests)."""
+    global _pgvector_version
+    _pgvector_version = None
+
+
+def find_index_scans(plan: Dict[str, Any]) -> List[str]:
+    """Collect index names used by Index Scan nodes in an EXPLAIN JSON plan."""
+    found = []
+    if plan.get("Node Type") in ("Index Scan", "Index Only Scan") and plan.get("Index Name"):
+        found.append(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        found.extend(find_index_scans(child))
+    return found
+
+
+def uses_vector_index(plan: Dict[str, Any]) -> bool:
+    """Whether an EXPLAIN JSON plan is served by one of our ANN indexes."""
+    return any(name.startswith("idx_embedding_vector") for name in find_index_scans(plan))
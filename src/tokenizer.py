@@ -0,0 +1,76 @@
+"""Token counting shared by ingestion (embedding batches) and generation (prompt budget).
+
+Uses tiktoken's encoding for the model when its BPE file is available
+(tiktoken downloads it once and caches it). Otherwise falls back to an
+estimate of ~4 characters per token, which is close for English prose and
+keeps offline runs and tests working.
+
+The download is blocking network I/O, so the API loads the generation model's
+encoding at startup, in a worker thread (load_encoding), rather than on the
+first request's event loop.
+
+Usage:
+    from src.tokenizer import count_tokens, truncate_to_tokens
+
+    count_tokens("How did Franklin use pgvector?", "gpt-4o-mini")
+"""
+
+import re
+from functools import lru_cache
+
+# Rough characters per token when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+# Prefer cutting a truncated passage here: paragraph, line, then sentence ends
+_BOUNDARIES = (re.compile(r"\n\s*\n"), re.compile(r"\n"), re.compile(r"[.!?](?=\s)"))
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """tiktoken encoding for a model, or None if tiktoken or its BPE file is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return None
+
+
+def load_encoding(model: str) -> bool:
+    """Load and cache a model's encoding ahead of first use.
+
+    Returns:
+        False if tiktoken or the BPE file is unavailable (estimates are used)
+    """
+    return _encoding(model) is not None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Token count with tiktoken, or a ~4 characters/token estimate without it."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Cut text to at most max_tokens, at a paragraph or sentence end where possible.
+
+    Falls back to the hard token cut if the last boundary would discard more
+    than half of what fits.
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    encoding = _encoding(model)
+    if encoding is None:
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        cut = encoding.decode(encoding.encode(text)[:max_tokens])
+
+    for boundary in _BOUNDARIES:
+        ends = [match.end() for match in boundary.finditer(cut)]
+        if ends and ends[-1] >= len(cut) // 2:
+            return cut[:ends[-1]].rstrip()
+    return cut.rstrip()